@@ -1,10 +1,9 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify, render_template_string
 import os
 import qrcode
 import io
 import base64
-from service.mixing_service import MixingService
-from service.fee_model import default_tiers, quote
+from service.mixing_service import MixingService, tracing, fee_model
 
 app = Flask(__name__)
 service = MixingService()
@@ -752,6 +751,11 @@ def mix_request():
         hops = int(data.get('hops', 0)) or int(os.environ.get('TIER_STANDARD_HOPS', '1'))
         if amount <= Decimal('0'):
             return jsonify({'error': 'Amount must be positive'}), 400
+        valid = service.iface.is_valid_address(target_address)
+        if valid is None:
+            return jsonify({'error': 'Cannot validate target address: node unavailable'}), 503
+        if not valid:
+            return jsonify({'error': 'Invalid target address'}), 400
         
         job = service.create_job(target_address, amount, shards, hops)
         return jsonify({
@@ -797,8 +801,12 @@ def mix_status():
     # Or if status is stuck but funds arrived at target (complex to check without knowing target balance before).
     # We rely on shardTxidsFinal being populated.
     if job.status != 'completed' and job.shard_txids_final and len(job.shard_txids_final) >= job.shard_count:
-        job.status = 'completed'
-        service._save_state()
+        try:
+            service._set_status(job, 'completed')
+            service._save_state()
+        except Exception:
+            # e.g. the lease moved to another worker: report what we have
+            pass
 
     mix_ready = False
     shard_ready_count = 0
@@ -825,9 +833,13 @@ def mix_status():
     # Fix display lag: Actively query RPC for the latest confirmations
     if job.txid1 and job.status == 'waiting_confirmations':
         try:
-            tx_info = service.iface._rpc('gettransaction', [job.txid1])
-            if tx_info:
-                job.confirmations = int(tx_info.get('confirmations', 0))
+            if service.confs is not None and job.txid1 in service.confs.heights:
+                # tracked by block: no RPC needed
+                job.confirmations = service.confs.confirmations(job.txid1)
+            else:
+                tx_info = service.iface.get_wallet_transaction(job.txid1)
+                if tx_info:
+                    job.confirmations = int(tx_info.get('confirmations', 0))
         except Exception:
             pass
             
@@ -843,17 +855,17 @@ def mix_status():
                 recv = Decimal(str(service.iface._rpc('getreceivedbyaddress', [job.deposit_address, 0])))
                 if recv >= job.deposit_required:
                     # Deposit spent! Find the spending tx.
-                    txs = service.iface._rpc('listtransactions', ["*", 100])
+                    txs = service.wallet_entries(100)
                     for tx in reversed(txs):
                         tid = tx.get('txid')
                         if tid:
                             try:
-                                raw = service.iface._rpc('getrawtransaction', [tid, 1])
+                                raw = service.iface.get_raw_transaction(tid)
                                 for vin in raw.get('vin', []):
                                     prev_txid = vin.get('txid')
                                     prev_vout = vin.get('vout')
                                     if prev_txid:
-                                        prev = service.iface._rpc('getrawtransaction', [prev_txid, 1])
+                                        prev = service.iface.get_raw_transaction(prev_txid)
                                         if prev and 'vout' in prev:
                                             p_out = prev['vout'][prev_vout]
                                             if job.deposit_address in p_out['scriptPubKey'].get('addresses', []):
@@ -863,7 +875,7 @@ def mix_status():
                                                 # If we find final txs sending to target_address, we can jump to completed.
                                                 # This is a bit expensive, but worth it for recovery.
                                                 try:
-                                                    recent_txs = service.iface._rpc('listtransactions', ["*", 50])
+                                                    recent_txs = service.wallet_entries(50, address=job.target_address)
                                                     final_txs = []
                                                     for rt in recent_txs:
                                                         if rt.get('category') == 'send' and rt.get('address') == job.target_address:
@@ -871,13 +883,13 @@ def mix_status():
                                                     
                                                     if len(final_txs) >= job.shard_count:
                                                         job.shard_txids_final = final_txs
-                                                        job.status = 'completed'
+                                                        service._set_status(job, 'completed')
                                                         job.txid2 = final_txs[0] # Show one of them
                                                     elif job.status == 'waiting_deposit':
-                                                        job.status = 'waiting_confirmations'
+                                                        service._set_status(job, 'waiting_confirmations')
                                                 except Exception:
                                                     if job.status == 'waiting_deposit':
-                                                        job.status = 'waiting_confirmations'
+                                                        service._set_status(job, 'waiting_confirmations')
                                                 
                                                 service._save_state()
                                                 break
@@ -890,24 +902,14 @@ def mix_status():
     # Populate final shard txids proactively to ensure UI focuses on mix progress
     try:
         if job.target_address:
-            recent = service.iface._rpc('listtransactions', ["*", 200]) or []
-            finals_scan = []
-            for rt in recent:
-                addr = rt.get('address')
-                cat = rt.get('category')
-                tid = rt.get('txid')
-                if tid and addr == job.target_address and cat in ('send', 'receive'):
-                    finals_scan.append(tid)
-            # de-duplicate preserving order
-            seen = set()
-            finals_scan = [t for t in finals_scan if not (t in seen or seen.add(t))]
-            if finals_scan:
+            finals_scan = service.final_txids_seen(job)
+            if len(finals_scan) > len(job.shard_txids_final or []):
                 job.shard_txids_final = finals_scan
                 if not job.txid2:
                     job.txid2 = finals_scan[-1]
                 # If enough finals exist, mark completed
                 if job.status != 'completed' and len(finals_scan) >= max(1, int(job.shard_count)):
-                    job.status = 'completed'
+                    service._set_status(job, 'completed')
                 service._save_state()
     except Exception:
         pass
@@ -944,7 +946,7 @@ def mix_status():
 
 @app.route('/api/mix/tiers')
 def mix_tiers():
-    return jsonify({'tiers': default_tiers()})
+    return jsonify({'tiers': fee_model.default_tiers()})
 
 @app.route('/api/mix/resume', methods=['POST'])
 def mix_resume():
@@ -966,31 +968,132 @@ def mix_quote():
         amount = Decimal(str(data['amount']))
         shards = int(data['shards'])
         hops = int(data['hops'])
-        q = quote(amount, shards, hops)
+        service._sync_fee_rate()
+        q = fee_model.quote(amount, shards, hops)
         # Convert decimals to float for JSON serialization
         q_out = {k: (float(v) if isinstance(v, Decimal) else v) for k, v in q.items()}
         
-        try:
-            q_out['fee_source'] = service.iface.get_fee_source_hint()
-        except Exception:
-            q_out['fee_source'] = 'constant'
+        q_out['fee_source'] = 'node' if fee_model.node_fee_rate() is not None else 'constant'
         return jsonify(q_out)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+QUOTE_CURVE_MAX_POINTS = 2000
+
+def _curve_amounts(data):
+    if isinstance(data.get('amounts'), list):
+        amounts = [Decimal(str(a)) for a in data['amounts']]
+    else:
+        lo = Decimal(str(data.get('min', 1)))
+        hi = Decimal(str(data.get('max', 1000)))
+        points = max(2, min(QUOTE_CURVE_MAX_POINTS, int(data.get('points', 100))))
+        step = (hi - lo) / Decimal(points - 1)
+        amounts = [(lo + step * i).quantize(Decimal('0.00000001')) for i in range(points)]
+    if len(amounts) > QUOTE_CURVE_MAX_POINTS:
+        raise ValueError('Too many amounts (max %d)' % QUOTE_CURVE_MAX_POINTS)
+    if any(a <= 0 for a in amounts):
+        raise ValueError('Amounts must be positive')
+    return amounts
+
+def _curve_out(qm):
+    return {
+        'percent': float(qm['percent']),
+        'tx_count': qm['tx_count'],
+        'miner_fee': float(qm['miner_fee']),
+        'cap': float(qm['cap']),
+        'extra_to_service': float(qm['extra_to_service']),
+        'amounts': [a / fee_model.DING for a in qm['amount_ding']],
+        'abs_fee': [f / fee_model.DING for f in qm['abs_fee_ding']],
+        'net_amount': [n / fee_model.DING for n in qm['net_amount_ding']],
+    }
+
+@app.route('/api/mix/quote/curve', methods=['POST'])
+def mix_quote_curve():
+    data = request.get_json() or {}
+    try:
+        amounts = _curve_amounts(data)
+        service._sync_fee_rate()
+        if 'shards' in data and 'hops' in data:
+            return jsonify(_curve_out(fee_model.quote_many(amounts, int(data['shards']), int(data['hops']))))
+        curves = {}
+        for t in fee_model.default_tiers():
+            c = _curve_out(fee_model.quote_many(amounts, t['shards'], t['hops']))
+            c.update({'shards': t['shards'], 'hops': t['hops']})
+            curves[t['name']] = c
+        return jsonify({'tiers': curves})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/system/status')
 def system_status():
+    cache = service.node_status
+    snap = cache.snapshot()
+    if snap is None:
+        cache.refresh(force=True)
+        snap = cache.snapshot()
+    if snap is None:
+        return jsonify({'error': cache.last_error or 'node unavailable', 'blockHeight': 0, 'peerCount': 0, 'difficulty': 0}), 500
+    resp = jsonify({
+        'blockHeight': snap['blockHeight'],
+        'peerCount': snap['peerCount'],
+        'difficulty': snap['difficulty'],
+        'updatedAt': int(snap['updatedAt']),
+        'stale': snap['stale'],
+    })
+    resp.headers['Cache-Control'] = 'public, max-age=%d' % max(1, int(cache.interval))
+    resp.set_etag('%d-%d-%d' % (snap['blockHeight'], snap['peerCount'], snap['difficulty']))
+    return resp.make_conditional(request)
+
+def _is_local_request() -> bool:
+    if os.environ.get('ADMIN_ALLOW_REMOTE', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.remote_addr in ('127.0.0.1', '::1', 'localhost')
+
+@app.route('/api/wallet/notify', methods=['POST'])
+@app.route('/api/wallet/notify/<txid>', methods=['POST'])
+def wallet_notify(txid=None):
+    # target of the node's -walletnotify hook; local only
+    if not _is_local_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    txid = (txid or request.args.get('txid') or (request.get_json(silent=True) or {}).get('txid') or '').strip().lower()
+    if len(txid) != 64 or any(c not in '0123456789abcdef' for c in txid):
+        return jsonify({'error': 'Invalid txid'}), 400
     try:
-        height = service.iface._rpc('getblockcount')
-        peers = service.iface._rpc('getpeerinfo')
-        peer_count = len(peers) if isinstance(peers, list) else 0
-        diff_val = service.iface._rpc('getdifficulty')
-        if not isinstance(diff_val, (int, float, Decimal)):
-            diff_val = 0
-        difficulty = int(diff_val)
-        return jsonify({'blockHeight': height, 'peerCount': peer_count, 'difficulty': difficulty})
+        return jsonify(service.wallet_notify(txid))
     except Exception as e:
-        return jsonify({'error': str(e), 'blockHeight': 0, 'peerCount': 0, 'difficulty': 0}), 500
+        return jsonify({'error': str(e)}), 502
+
+@app.route('/api/admin/broadcasts')
+def admin_broadcasts():
+    if not _is_local_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    q = service.broadcasts
+    out = q.stats() if q is not None else {}
+    if service.rebroadcasts is not None:
+        out['rebroadcast'] = dict(service.rebroadcasts.stats(), conflictTxs=service.rebroadcasts.conflicts())
+    if service.mempool is not None:
+        out['mempool'] = service.mempool.stats()
+    if service.utxo_cache is not None:
+        out['utxoCache'] = service.utxo_cache.stats()
+    if service.tx_cache is not None:
+        out['txCache'] = service.tx_cache.stats()
+    return jsonify(out)
+
+@app.route('/api/admin/jobs/<job_id>/timeline')
+def admin_job_timeline(job_id):
+    if not _is_local_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    job = service.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    fmt = (request.args.get('format') or 'json').lower()
+    if fmt == 'jsonl':
+        return Response(tracing.to_jsonl(job), mimetype='application/x-ndjson')
+    if fmt == 'otlp':
+        return jsonify(tracing.to_otlp([job]))
+    return jsonify(tracing.timeline(job))
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,110 @@
+import os
+import time
+import heapq
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+# Shared broadcast queue.
+# Job threads hand their signed transactions here instead of calling
+# sendrawtransaction themselves. Dispatchers send in priority order (final payouts,
+# then hops, fanouts and step 1) under a global tx/sec ceiling, so a wave of jobs
+# reaching step 2 together cannot flood the node with signature verification.
+# submit() blocks once BROADCAST_QUEUE_MAX items are waiting (backpressure).
+
+PRIORITIES = {'final': 0, 'hop': 1, 'fanout': 2, 'step1': 3}
+
+
+def _env_float(name: str, default: str) -> float:
+    try:
+        return max(0.0, float(os.environ.get(name, default)))
+    except Exception:
+        return float(default)
+
+
+class BroadcastQueue:
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                 workers: Optional[int] = None, max_depth: Optional[int] = None):
+        # rate 0 disables the ceiling (priority ordering still applies)
+        self.rate = rate if rate is not None else _env_float('BROADCAST_TX_PER_SEC', '10')
+        self.burst = burst if burst is not None else max(1.0, _env_float('BROADCAST_BURST', str(self.rate or 1)))
+        self.workers = workers if workers is not None else max(1, int(_env_float('BROADCAST_WORKERS', '2')))
+        self.max_depth = max_depth if max_depth is not None else max(1, int(_env_float('BROADCAST_QUEUE_MAX', '1000')))
+        self._heap: List[tuple] = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._tokens = self.burst
+        self._filled_at = time.monotonic()
+        self._threads: List[threading.Thread] = []
+        self.submitted = 0
+        self.sent = 0
+        self.failed = 0
+        self.peak_depth = 0
+        self.wait_total = 0.0
+        self.by_kind: Dict[str, int] = {}
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args) -> Future:
+        fut: Future = Future()
+        with self._cond:
+            while len(self._heap) >= self.max_depth:
+                self._cond.wait()
+            self._seq += 1
+            heapq.heappush(self._heap, (PRIORITIES.get(kind, len(PRIORITIES)), self._seq, kind, time.monotonic(), fn, args, fut))
+            self.submitted += 1
+            self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+            self.peak_depth = max(self.peak_depth, len(self._heap))
+            self._cond.notify_all()
+            if len(self._threads) < self.workers:
+                t = threading.Thread(target=self._run, daemon=True)
+                self._threads.append(t)
+                t.start()
+        return fut
+
+    def run(self, kind: str, fn: Callable[..., Any], *args) -> Any:
+        """submit() and wait for the result (exceptions are re-raised here)."""
+        return self.submit(kind, fn, *args).result()
+
+    def _take_token(self) -> None:
+        # token bucket, refilled at `rate` per second up to `burst`
+        while self.rate > 0:
+            with self._cond:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._filled_at) * self.rate)
+                self._filled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                short = (1 - self._tokens) / self.rate
+            time.sleep(short)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+            self._take_token()
+            with self._cond:
+                if not self._heap:
+                    continue
+                _p, _s, kind, queued_at, fn, args, fut = heapq.heappop(self._heap)
+                self.by_kind[kind] -= 1
+                self.wait_total += time.monotonic() - queued_at
+                self._cond.notify_all()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                res = fn(*args)
+            except BaseException as e:
+                self.failed += 1
+                fut.set_exception(e)
+            else:
+                self.sent += 1
+                fut.set_result(res)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            done = self.sent + self.failed
+            return {'depth': len(self._heap), 'depth_by_kind': {k: n for k, n in self.by_kind.items() if n},
+                    'peak_depth': self.peak_depth, 'submitted': self.submitted, 'sent': self.sent,
+                    'failed': self.failed, 'rate_limit': self.rate,
+                    'avg_wait_ms': round(self.wait_total / done * 1000, 2) if done else 0.0}
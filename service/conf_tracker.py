@@ -0,0 +1,173 @@
+import time
+import threading
+from typing import Any, Dict, Optional
+
+# Block-scoped confirmation tracker.
+# Every in-flight txid (step 1, fanouts, hops, finals) is registered here. Each new
+# block is fetched once and its tx list resolves the inclusion height of any watched
+# txid; confirmations are then tip - height + 1, with no per-job RPC. Block hashes
+# of the last REORG_DEPTH blocks are kept so a reorg rewinds the heights it undid.
+
+REORG_DEPTH = 12
+MAX_CATCHUP = 24
+
+
+class ConfirmationTracker:
+    def __init__(self, iface):
+        self.iface = iface
+        self.heights: Dict[str, Optional[int]] = {}
+        self.owners: Dict[str, str] = {}
+        self.hashes: Dict[int, str] = {}
+        # txids of recent blocks, for txids registered just after their block was seen
+        self.recent: Dict[str, int] = {}
+        self.tip: Optional[int] = None
+        self.synced_at = 0.0
+        self.blocks = 0
+        self.lock = threading.RLock()
+        self.cond = threading.Condition(self.lock)
+        # one block walk at a time (block listener vs. sync from a waiting job)
+        self._scan = threading.Lock()
+
+    # -- registration --------------------------------------------------------
+
+    def watch(self, txid: str, owner: Optional[str] = None, seed: bool = False) -> None:
+        """Track `txid`. seed=True asks the node once for a txid that may already be mined."""
+        if not txid:
+            return
+        with self.lock:
+            if owner:
+                # the first owner keeps it (the rebroadcast manager outlives jobs)
+                self.owners.setdefault(txid, owner)
+            if txid in self.heights:
+                return
+            self.heights[txid] = self.recent.get(txid)
+            if self.heights[txid] is not None or not seed:
+                return
+        self._seed(txid)
+
+    def _seed(self, txid: str) -> None:
+        try:
+            info = self.iface._rpc('gettransaction', [txid]) or {}
+            conf = int(info.get('confirmations', 0))
+            tip = self.tip if self.tip is not None else int(self.iface._rpc('getblockcount', []))
+        except Exception:
+            return
+        with self.lock:
+            if self.tip is None:
+                self.tip = tip
+            if conf > 0 and txid in self.heights and self.heights[txid] is None:
+                self.heights[txid] = self.tip - conf + 1
+            self.cond.notify_all()
+
+    def forget(self, txid: str) -> None:
+        with self.lock:
+            self.heights.pop(txid, None)
+            self.owners.pop(txid, None)
+
+    def forget_owner(self, owner: str) -> None:
+        with self.lock:
+            for txid in [t for t, o in self.owners.items() if o == owner]:
+                self.forget(txid)
+
+    # -- blocks --------------------------------------------------------------
+
+    def _fetch(self, height: int) -> Dict[str, Any]:
+        blk = self.iface._rpc('getblock', [self.iface._rpc('getblockhash', [height])]) or {}
+        self.blocks += 1
+        return blk
+
+    def on_block(self, height: int) -> None:
+        """New tip (node_status block listener): resolve txids from each block not yet seen."""
+        with self._scan:
+            self._walk(int(height))
+
+    def _walk(self, height: int) -> None:
+        with self.lock:
+            tip = self.tip
+        if tip is None:
+            # first block seen: anything registered before may already be mined
+            with self.lock:
+                open_txids = [t for t, h in self.heights.items() if h is None]
+            for t in open_txids:
+                self._seed(t)
+            start = height
+        elif height <= tip and self.hashes.get(height):
+            return
+        else:
+            start = min(tip, height) + 1
+        if height - start + 1 > MAX_CATCHUP:
+            # too far behind to walk every block: ask the node for what is still open
+            with self.lock:
+                open_txids = [t for t, h in self.heights.items() if h is None]
+                self.tip, self.hashes = height, {}
+            for t in open_txids:
+                self._seed(t)
+            return
+        h = start
+        while h <= height:
+            blk = self._fetch(h)
+            prev = blk.get('previousblockhash')
+            with self.lock:
+                if h - 1 in self.hashes and prev and prev != self.hashes[h - 1]:
+                    # reorg: step back one block and rewind what it had confirmed
+                    self._rewind(h - 1)
+                    h = max(h - 1, height - REORG_DEPTH)
+                    continue
+                self.hashes[h] = blk.get('hash', '')
+                for k in [k for k in self.hashes if k <= h - REORG_DEPTH]:
+                    del self.hashes[k]
+                for t in [t for t, th in self.recent.items() if th <= h - REORG_DEPTH]:
+                    del self.recent[t]
+                for t in blk.get('tx') or []:
+                    self.recent[t] = h
+                    if t in self.heights:
+                        self.heights[t] = h
+                self.tip = h
+                self.synced_at = time.time()
+                self.cond.notify_all()
+            h += 1
+
+    def _rewind(self, height: int) -> None:
+        self.hashes.pop(height, None)
+        for t, th in list(self.heights.items()):
+            if th is not None and th >= height:
+                self.heights[t] = None
+        for t, th in list(self.recent.items()):
+            if th >= height:
+                del self.recent[t]
+        self.tip = height - 1
+
+    def sync(self, max_age: float = 0.0) -> None:
+        """Catch up on our own when no block listener has run for `max_age` seconds."""
+        if time.time() - self.synced_at < max_age:
+            return
+        self.synced_at = time.time()
+        try:
+            self.on_block(int(self.iface._rpc('getblockcount', [])))
+        except Exception:
+            pass
+
+    # -- queries -------------------------------------------------------------
+
+    def confirmations(self, txid: str) -> int:
+        with self.lock:
+            h = self.heights.get(txid)
+            if h is None or self.tip is None:
+                return 0
+            return max(0, self.tip - h + 1)
+
+    def wait(self, txid: str, confs: int, timeout: float) -> int:
+        """Block until `txid` has `confs` confirmations or `timeout` passes; returns the count."""
+        deadline = time.time() + timeout
+        with self.lock:
+            while True:
+                n = self.confirmations(txid)
+                left = deadline - time.time()
+                if n >= confs or left <= 0:
+                    return n
+                self.cond.wait(left)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {'watched': len(self.heights), 'pending': sum(1 for h in self.heights.values() if h is None),
+                    'tip': self.tip, 'blocks_fetched': self.blocks}
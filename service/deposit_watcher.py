@@ -0,0 +1,173 @@
+import os
+import time
+import threading
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+# One poller for every pending deposit address.
+# Jobs register their deposit address; each tick issues one listunspent per chunk
+# of DEPOSIT_WATCH_CHUNK addresses (instead of several RPCs per job) and wakes the
+# job waiting on each address with its current credit.
+# With the node's walletnotify hook wired up (touch()), deposits are credited as
+# soon as they reach the wallet and the periodic poll relaxes to a safety net.
+
+
+def _interval() -> float:
+    try:
+        return max(0.05, float(os.environ.get('DEPOSIT_POLL_INTERVAL_SEC', '15')))
+    except Exception:
+        return 15.0
+
+
+def _safety_interval() -> float:
+    try:
+        return max(_interval(), float(os.environ.get('DEPOSIT_SAFETY_POLL_SEC', '120')))
+    except Exception:
+        return 120.0
+
+
+def _chunk() -> int:
+    try:
+        return max(1, int(os.environ.get('DEPOSIT_WATCH_CHUNK', '500')))
+    except Exception:
+        return 500
+
+
+class _Watch:
+    __slots__ = ('job_id', 'event', 'credit')
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.event = threading.Event()
+        self.credit: Optional[Dict[str, Any]] = None
+
+
+class DepositWatcher:
+    def __init__(self, iface, interval: Optional[float] = None, chunk: Optional[int] = None):
+        self.iface = iface
+        self.interval = interval if interval is not None else _interval()
+        self.chunk = chunk if chunk is not None else _chunk()
+        self.index: Dict[str, _Watch] = {}
+        self.lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # None until known: node may not accept an address filter on listunspent
+        self._filtered: Optional[bool] = None
+        self.ticks = 0
+        self.notified_at = 0.0
+        self.last_error: Optional[str] = None
+
+    def watch(self, address: str, job_id: str) -> None:
+        with self.lock:
+            if address not in self.index:
+                self.index[address] = _Watch(job_id)
+        self._wake.set()
+        self.start()
+
+    def unwatch(self, address: str) -> None:
+        with self.lock:
+            self.index.pop(address, None)
+
+    def job_for(self, address: str) -> Optional[str]:
+        w = self.index.get(address)
+        return w.job_id if w else None
+
+    def wait(self, address: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until the next tick covering `address`; returns its credit or None on timeout.
+
+        An address that is not watched (unwatched, or a restarted watcher) also waits
+        out the timeout before returning None, so callers looping on wait() never spin.
+        """
+        timeout = timeout if timeout is not None else self.interval * 4
+        w = self.index.get(address)
+        if w is None:
+            self._stop.wait(timeout)
+            return None
+        if not w.event.wait(timeout):
+            return None
+        w.event.clear()
+        return w.credit
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with self.lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            # new registrations are polled right away; a burst of them shares one tick
+            self._wake.clear()
+            try:
+                self.poll()
+            except Exception as e:
+                self.last_error = str(e)
+            # once walletnotify has been heard from, polling is only the safety net
+            self._wake.wait(_safety_interval() if self.notified_at else self.interval)
+
+    def _fetch(self, addresses: List[str]) -> List[dict]:
+        if self._filtered is not False:
+            try:
+                rows: List[dict] = []
+                for i in range(0, len(addresses), self.chunk):
+                    rows.extend(self.iface.listunspent_for_addresses(addresses[i:i + self.chunk], minconf=0))
+                self._filtered = True
+                return rows
+            except Exception as e:
+                if self._filtered or getattr(e, 'code', None) is None:
+                    raise
+                self._filtered = False
+        wanted = set(addresses)
+        return [u for u in (self.iface.listunspent(minconf=0) or []) if u.get('address') in wanted]
+
+    def touch(self, addresses) -> Dict[str, str]:
+        """walletnotify: credit just these addresses now; returns {address: job_id} for watched ones."""
+        self.notified_at = time.time()
+        with self.lock:
+            hit = {a: self.index[a].job_id for a in addresses if a in self.index}
+        if hit:
+            self.poll(hit)
+        return hit
+
+    def on_block(self, _height: int = 0) -> None:
+        """New block: re-credit deposits still waiting for their first confirmation."""
+        with self.lock:
+            waiting = {a for a, w in self.index.items() if w.credit and w.credit['total'] > 0 and not w.credit['ready']}
+        if waiting:
+            self.poll(waiting)
+
+    def poll(self, only=None) -> Dict[str, Dict[str, Any]]:
+        """One tick: credit every watched address (or those in `only`) and wake its job."""
+        with self.lock:
+            watched = {a: w for a, w in self.index.items() if only is None or a in only}
+        if not watched:
+            return {}
+        minconf = int(os.environ.get('MINCONF', '1'))
+        credits = {a: {'total': Decimal('0'), 'ready': 0, 'utxos': 0} for a in watched}
+        for u in self._fetch(sorted(watched)):
+            c = credits.get(u.get('address'))
+            if c is None:
+                continue
+            c['total'] += Decimal(str(u.get('amount', 0)))
+            c['utxos'] += 1
+            if int(u.get('confirmations', 0) or 0) >= minconf:
+                c['ready'] += 1
+        for a, w in watched.items():
+            w.credit = credits[a]
+            w.event.set()
+        if only is None:
+            self.ticks += 1
+        self.last_error = None
+        return credits
+
+    def stats(self) -> Dict[str, Any]:
+        return {'watched': len(self.index), 'ticks': self.ticks, 'chunk': self.chunk, 'notified_at': self.notified_at,
+                'filtered': self._filtered, 'last_error': self.last_error}
@@ -1,7 +1,30 @@
 import os
+import time
+import threading
 
 from decimal import Decimal
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DING = 100000000
+MATRIX_MAX_SHARDS = 16
+MATRIX_MAX_HOPS = 8
+# batches at least this long use the NumPy path when it is available
+NUMPY_MIN_BATCH = 64
+
+_FEE_KEYS = ('FEE_BASE_P', 'FEE_SHARD_P', 'FEE_HOP_P', 'FEE_MIN_P', 'ABS_FEE_FLOOR',
+             'TX_FEE_PER_TX', 'MINER_FEE_CAP', 'MIN_RELAY_FEE_FLOOR', 'MINER_FEE_MODE')
+_matrix = {'version': None, 'cells': {}, 'floor_ding': 0}
+_matrix_lock = threading.Lock()
+# node fee rate in coins per kB, pushed by MixingService; None prices at TX_FEE_PER_TX
+_node_rate = {'rate': None, 'at': 0.0}
+# fee settings as last read: refreshed with the node rate (each block) and at most
+# every FEE_CONFIG_REFRESH_SEC otherwise, so quotes do not read the environment
+_config = {'version': None, 'until': 0.0}
+
 def _f(key, default):
     try:
         return Decimal(os.environ.get(key, str(default)))
@@ -37,28 +60,224 @@ def calc_miner_fee(tx_count):
     per_tx = _f('TX_FEE_PER_TX', '0.01')
     return (Decimal(tx_count) * per_tx).quantize(Decimal('0.00000001'))
 
-def quote(amount, shards, hops):
-    amount = Decimal(str(amount))
+def set_node_fee_rate(rate):
+    _node_rate.update({'rate': Decimal(str(rate)) if rate else None, 'at': time.time()})
+    refresh_config()
+
+def fee_rate_age():
+    return time.time() - _node_rate['at'] if _node_rate['at'] else float('inf')
+
+def node_fee_rate():
+    if os.environ.get('MINER_FEE_MODE', 'sized').lower() == 'flat':
+        return None
+    if fee_rate_age() > float(_f('FEE_RATE_MAX_AGE_SEC', '3600')):
+        return None
+    return _node_rate['rate']
+
+def estimate_tx_size(num_inputs, num_outputs):
+    # same estimate as AbcmintBlockchainInterface._estimate_tx_size_nonsegwit
+    return 10 + max(0, int(num_inputs)) * 148 + max(0, int(num_outputs)) * 34
+
+def tx_fee(num_inputs, num_outputs):
+    # node rate per started kB, floored at the rate (estimate_fee_coins_for_counts)
+    rate = node_fee_rate()
+    if rate is None:
+        return _f('TX_FEE_PER_TX', '0.01')
+    kb = (estimate_tx_size(num_inputs, num_outputs) + 999) // 1000
+    return max(rate * kb, rate).quantize(Decimal('0.00000001'))
+
+def planned_txs(shards, hops):
+    # (inputs, outputs) per step 2 transaction: fanout, hops and final of each shard
+    # are single-input sends with a change output (MixingService._single_send_from)
+    return [(1, 2)] * estimate_tx_count(shards, hops)
+
+def calc_miner_fee_for(shards, hops):
+    if node_fee_rate() is None:
+        return calc_miner_fee(estimate_tx_count(shards, hops))
+    total = sum((tx_fee(i, o) for i, o in planned_txs(shards, hops)), Decimal('0'))
+    return total.quantize(Decimal('0.00000001'))
+
+def split_shard_amounts(total, shards):
+    total = Decimal(str(total))
+    shards = max(1, int(shards))
+    base = (total / Decimal(shards)).quantize(Decimal('0.00000001'))
+    amounts = [base] * (shards - 1)
+    last = total - base * Decimal(shards - 1)
+    amounts.append(max(Decimal('0.0'), last))
+    return [a for a in amounts if a > 0]
+
+def hop_amount_after_fee(amount, fee):
+    # amount carried to the next hop once the per-hop fee guess is deducted
+    return max(Decimal('0.0'), Decimal(str(amount)) - Decimal(str(fee))).quantize(Decimal('0.00000001'))
+
+def dust_floor():
+    return _f('DUST_COINS_FLOOR', '0.000055')
+
+def spend_split(total, amount, reserve, miner_fee):
+    # (payment, change) of a send of `amount` out of `total` coins paying `miner_fee`,
+    # as MixingService builds it: the payment shrinks to what `total` covers after
+    # `reserve`, and change at or below the dust floor is added to the payment.
+    # None when `total` cannot pay the fee
+    total, amount = Decimal(str(total)), Decimal(str(amount))
+    if total < amount + reserve:
+        amount = max(Decimal('0.0'), total - reserve)
+    need = amount + miner_fee
+    if total < need:
+        return None
+    change = (total - need).quantize(Decimal('0.00000001'))
+    if change <= dust_floor():
+        return (amount + change).quantize(Decimal('0.00000001')), Decimal('0.0')
+    return amount.quantize(Decimal('0.00000001')), change
+
+def refresh_config():
+    """Re-read the fee settings now (after changing fee env vars)."""
+    now = time.time()
+    version = tuple(os.environ.get(k) for k in _FEE_KEYS) + (node_fee_rate(),)
+    until = now + float(_f('FEE_CONFIG_REFRESH_SEC', '5'))
+    if _node_rate['rate'] is not None and _node_rate['at']:
+        # the node rate stops counting once it is too old
+        until = min(until, _node_rate['at'] + float(_f('FEE_RATE_MAX_AGE_SEC', '3600')) + 0.001)
+    _config.update({'version': version, 'until': until})
+    return version
+
+def config_version():
+    if _config['version'] is None or time.time() >= _config['until']:
+        return refresh_config()
+    return _config['version']
+
+def _build_cell(shards, hops):
     percent = calc_fee_percent(shards, hops)
     tx_count = estimate_tx_count(shards, hops)
-    abs_fee = calc_abs_fee(amount, percent).quantize(Decimal('0.00000001'))
-    miner_fee_est = calc_miner_fee(tx_count)
+    miner_fee_est = calc_miner_fee_for(shards, hops)
     cap = _f('MINER_FEE_CAP', '1.0')
     floor_v = _f('MIN_RELAY_FEE_FLOOR', '0.001')
     miner_fee = min(max(miner_fee_est, floor_v), cap).quantize(Decimal('0.00000001'))
     extra_to_service = max(Decimal('0.0'), miner_fee_est - cap).quantize(Decimal('0.00000001'))
+    # percent as an exact fraction for integer ding math
+    num, den = _fraction(percent)
+    return {
+        'percent': percent,
+        'tx_count': tx_count,
+        'miner_fee': miner_fee,
+        'cap': cap,
+        'extra_to_service': extra_to_service,
+        'percent_num': num,
+        'percent_den': den,
+        'miner_fee_ding': int(miner_fee * DING),
+        'extra_ding': int(extra_to_service * DING),
+    }
+
+def _fraction(d):
+    sign, digits, exp = d.as_tuple()
+    num = int(''.join(str(x) for x in digits) or '0')
+    if sign:
+        num = -num
+    if exp >= 0:
+        return num * (10 ** exp), 1
+    return num, 10 ** (-exp)
+
+def fee_matrix():
+    """Per-(shards, hops) fee cells, rebuilt whenever the fee settings change (see config_version)."""
+    version = config_version()
+    m = _matrix
+    if m['version'] == version:
+        return m
+    with _matrix_lock:
+        if _matrix['version'] == version:
+            return _matrix
+        cells = {}
+        for sh in range(1, MATRIX_MAX_SHARDS + 1):
+            for hp in range(0, MATRIX_MAX_HOPS + 1):
+                cells[(sh, hp)] = _build_cell(sh, hp)
+        floor_ding = int(_f('ABS_FEE_FLOOR', '0.001').quantize(Decimal('0.00000001')) * DING)
+        _matrix.update({'version': version, 'cells': cells, 'floor_ding': floor_ding})
+        return _matrix
+
+def _cell(shards, hops):
+    m = fee_matrix()
+    key = (int(shards), int(hops))
+    c = m['cells'].get(key)
+    if c is None:
+        c = _build_cell(key[0], key[1])
+        with _matrix_lock:
+            c = m['cells'].setdefault(key, c)
+    return c
+
+def quote(amount, shards, hops):
+    amount = Decimal(str(amount))
+    c = _cell(shards, hops)
+    percent = c['percent']
+    miner_fee = c['miner_fee']
+    extra_to_service = c['extra_to_service']
+    abs_fee = calc_abs_fee(amount, percent).quantize(Decimal('0.00000001'))
     abs_fee = (abs_fee + extra_to_service).quantize(Decimal('0.00000001'))
     net_amount = max(Decimal('0.0'), amount - abs_fee - miner_fee).quantize(Decimal('0.00000001'))
     return {
         'percent': percent,
         'abs_fee': abs_fee,
         'miner_fee': miner_fee,
-        'tx_count': tx_count,
+        'tx_count': c['tx_count'],
         'net_amount': net_amount,
-        'cap': cap,
+        'cap': c['cap'],
         'extra_to_service': extra_to_service,
     }
 
+def to_ding(amount):
+    return int((Decimal(str(amount)) * DING).quantize(Decimal('1')))
+
+def _mul_round_half_even(a, num, den):
+    # a * num / den rounded half-to-even, without overflowing int64 in the NumPy path
+    hi, lo = divmod(a, den)
+    q = hi * num + (lo * num) // den
+    r = (lo * num) % den
+    return q, r
+
+def _abs_fees_py(amounts_ding, c, floor_ding):
+    num, den = c['percent_num'], c['percent_den']
+    out = []
+    for a in amounts_ding:
+        q, r = _mul_round_half_even(a, num, den)
+        if 2 * r > den or (2 * r == den and q % 2 == 1):
+            q += 1
+        out.append(max(q, floor_ding) + c['extra_ding'])
+    return out
+
+def _abs_fees_np(amounts_ding, c, floor_ding):
+    a = np.asarray(amounts_ding, dtype=np.int64)
+    num, den = c['percent_num'], c['percent_den']
+    q, r = _mul_round_half_even(a, np.int64(num), np.int64(den))
+    up = (2 * r > den) | ((2 * r == den) & (q % 2 == 1))
+    q = q + up.astype(np.int64)
+    return np.maximum(q, floor_ding) + c['extra_ding']
+
+def quote_many(amounts, shards, hops):
+    """Quote a whole array of amounts for one (shards, hops) pair.
+
+    Amounts are rounded to whole ding; per-amount results are returned as ding
+    integers and match quote() for any amount with at most 8 decimals.
+    """
+    c = _cell(shards, hops)
+    floor_ding = fee_matrix()['floor_ding']
+    amounts_ding = [to_ding(a) for a in amounts]
+    miner = c['miner_fee_ding']
+    if np is not None and len(amounts_ding) >= NUMPY_MIN_BATCH and c['percent_den'] <= 10 ** 9:
+        fees = _abs_fees_np(amounts_ding, c, floor_ding)
+        nets = np.maximum(np.asarray(amounts_ding, dtype=np.int64) - fees - miner, 0)
+        abs_fee_ding, net_ding = fees.tolist(), nets.tolist()
+    else:
+        abs_fee_ding = _abs_fees_py(amounts_ding, c, floor_ding)
+        net_ding = [max(0, a - f - miner) for a, f in zip(amounts_ding, abs_fee_ding)]
+    return {
+        'percent': c['percent'],
+        'tx_count': c['tx_count'],
+        'miner_fee': c['miner_fee'],
+        'cap': c['cap'],
+        'extra_to_service': c['extra_to_service'],
+        'amount_ding': amounts_ding,
+        'abs_fee_ding': abs_fee_ding,
+        'net_amount_ding': net_ding,
+    }
+
 def default_tiers():
     return [
         {'name': 'SL1', 'shards': int(os.environ.get('TIER_STANDARD_SHARDS', '3')), 'hops': int(os.environ.get('TIER_STANDARD_HOPS', '1'))},
@@ -0,0 +1,308 @@
+"""
+Offline fee-model simulator.
+
+Replays a distribution of job amounts and tiers through fee_model.quote and the
+step 1 / fanout / hop / final sends MixingService makes on chain (priced and
+split by the same fee_model.tx_fee and spend_split), for every point of a
+parameter grid, and prints one row per point:
+
+    python service/fee_sim.py --jobs 5000 --tiers SL1:0.6,SL3:0.3,SL5:0.1 \\
+        --grid FEE_BASE_P=0.002,0.003,0.004 --grid TX_FEE_PER_TX=0.005,0.01
+
+Grid keys are fee_model env vars plus DEPOSIT_EXTRA, DUST_COINS_FLOOR and
+NODE_PAYTXFEE (simulated node fee rate per kB; unset means the TX_FEE_PER_TX
+fallback MixingService uses without a node estimate). MINER_FEE_MODE=flat
+prices every transaction at TX_FEE_PER_TX for comparison. Each grid point runs
+in its own worker process because fee_model reads its settings from os.environ.
+
+Fanouts are simulated as chained from the mix change, i.e. the intended flow.
+"""
+import os
+import sys
+import csv
+import json
+import math
+import random
+import itertools
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+
+def _load_module(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+fee_model = _load_module(os.path.join(here, 'fee_model.py'), 'fee_model')
+
+Q8 = Decimal('0.00000001')
+SIM_KEYS = ('DEPOSIT_EXTRA', 'DUST_COINS_FLOOR', 'NODE_PAYTXFEE')
+GRID_KEYS = fee_model._FEE_KEYS + SIM_KEYS
+COLUMNS = ('jobs', 'failed', 'volume', 'revenue', 'revenue_rate', 'miner', 'miner_rate', 'miner_cover',
+           'dust_loss', 'dust_loss_rate', 'abandoned_shards', 'shortfall_rate', 'user_cost_rate')
+
+
+def _env_dec(key: str, default: str) -> Decimal:
+    try:
+        return Decimal(os.environ.get(key, default))
+    except Exception:
+        return Decimal(default)
+
+
+def _send(value: Decimal, amount: Decimal, fee_guess: Decimal, dust: Decimal) -> Optional[Tuple[Decimal, Decimal, Decimal]]:
+    # MixingService._send_from_outpoint; returns (output, change, miner fee) or None
+    # when the node would reject the transaction
+    miner = fee_model.tx_fee(1, 2)
+    split = fee_model.spend_split(value, amount, fee_guess, miner)
+    if split is None or split[0] < dust:
+        return None
+    return split[0], split[1], miner
+
+
+def simulate_job(amount: Decimal, shards: int, hops: int) -> Dict[str, Any]:
+    amount = Decimal(str(amount))
+    q = fee_model.quote(amount, shards, hops)
+    dust = fee_model.dust_floor()
+    fee_guess = fee_model.tx_fee(1, 2)
+    deposit = (amount + _env_dec('DEPOSIT_EXTRA', '0.1') + q['extra_to_service']).quantize(Q8)
+    r = {'amount': amount, 'deposit': deposit, 'quoted_net': q['net_amount'], 'quoted_miner': q['miner_fee'],
+         'service_fee': Decimal('0.0'), 'retained': Decimal('0.0'), 'miner': Decimal('0.0'),
+         'delivered': Decimal('0.0'), 'dust_loss': Decimal('0.0'), 'shards': 0, 'abandoned': 0, 'failed': False}
+
+    # step 1: apply_deduction_outputs in deduct mode plus the extra service output
+    ded = (amount * q['percent']).quantize(Q8)
+    mix = amount
+    if ded > 0 and amount - ded > dust:
+        mix = (amount - ded).quantize(Q8)
+    fee_out = max(ded, dust) if ded > 0 else Decimal('0.0')
+    fee_out += q['extra_to_service']
+    miner1 = fee_model.tx_fee(1, 3)
+    split = fee_model.spend_split(deposit, mix + fee_out, miner1, miner1)
+    if split is None or split[0] < mix + fee_out:
+        r['failed'] = True
+        return r
+    mix += split[0] - (mix + fee_out)
+    r['retained'] += split[1]
+    r['service_fee'] = fee_out
+    r['miner'] += miner1
+
+    # step 2: fanouts from the mix UTXO, then hops and the final send per shard
+    pool = mix
+    for planned in fee_model.split_shard_amounts(mix, shards):
+        r['shards'] += 1
+        sent = _send(pool, planned, fee_guess, dust)
+        if sent is None:
+            r['abandoned'] += 1
+            continue
+        value, pool, miner = sent
+        r['miner'] += miner
+        current = planned
+        for n in range(hops + 1):
+            if n < hops and current <= fee_guess:
+                sent = None
+            else:
+                sent = _send(value, current, fee_guess, dust)
+            if sent is None:
+                r['abandoned'] += 1
+                r['dust_loss'] += value
+                break
+            value, change, miner = sent
+            r['retained'] += change
+            r['miner'] += miner
+            current = fee_model.hop_amount_after_fee(current, fee_guess)
+        else:
+            r['delivered'] += value
+    r['dust_loss'] += pool
+    return r
+
+
+def _aggregate(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [r for r in results if not r['failed']]
+    volume = sum((r['amount'] for r in ok), Decimal('0'))
+    revenue = sum((r['service_fee'] + r['retained'] for r in ok), Decimal('0'))
+    miner = sum((r['miner'] for r in ok), Decimal('0'))
+    quoted_miner = sum((r['quoted_miner'] for r in ok), Decimal('0'))
+    dust_loss = sum((r['dust_loss'] for r in ok), Decimal('0'))
+    shortfall = sum((max(Decimal('0'), r['quoted_net'] - r['delivered']) for r in ok), Decimal('0'))
+    paid = sum((r['deposit'] - r['delivered'] for r in ok), Decimal('0'))
+    shards = sum(r['shards'] for r in ok)
+
+    def rate(x):
+        return float(x / volume) if volume else 0.0
+
+    return {
+        'jobs': len(results),
+        'failed': len(results) - len(ok),
+        'volume': float(volume),
+        'revenue': float(revenue),
+        'revenue_rate': rate(revenue),
+        'miner': float(miner),
+        'miner_rate': rate(miner),
+        'miner_cover': float(quoted_miner / miner) if miner else 0.0,
+        'dust_loss': float(dust_loss),
+        'dust_loss_rate': rate(dust_loss),
+        'abandoned_shards': (sum(r['abandoned'] for r in ok) / shards) if shards else 0.0,
+        'shortfall_rate': rate(shortfall),
+        'user_cost_rate': rate(paid),
+    }
+
+
+def run_point(task: Tuple[Dict[str, str], List[Tuple[str, int, int]]]) -> Dict[str, Any]:
+    overrides, jobs = task
+    saved = {k: os.environ.get(k) for k in overrides}
+    saved_rate = dict(fee_model._node_rate)
+    os.environ.update(overrides)
+    fee_model.set_node_fee_rate(os.environ.get('NODE_PAYTXFEE'))
+    try:
+        results = [simulate_job(Decimal(a), sh, hp) for a, sh, hp in jobs]
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        # run in-process, later quotes must not see the simulated node rate
+        fee_model._node_rate.update(saved_rate)
+        fee_model.refresh_config()
+    row = dict(overrides)
+    row.update(_aggregate(results))
+    return row
+
+
+def parse_grid(specs: List[str]) -> List[Dict[str, str]]:
+    axes = []
+    for spec in specs or []:
+        key, _, vals = spec.partition('=')
+        key = key.strip()
+        if key not in GRID_KEYS:
+            raise ValueError('unknown grid key: ' + key)
+        values = [v.strip() for v in vals.split(',') if v.strip()]
+        if key != 'MINER_FEE_MODE':
+            for v in values:
+                Decimal(v)
+        if not values:
+            raise ValueError('no values for ' + key)
+        axes.append([(key, v) for v in values])
+    return [dict(p) for p in itertools.product(*axes)]
+
+
+def parse_tiers(spec: str) -> List[Tuple[int, int, float]]:
+    named = {t['name']: (t['shards'], t['hops']) for t in fee_model.default_tiers()}
+    out = []
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        name, _, w = part.partition(':')
+        name = name.strip()
+        if name in named:
+            sh, hp = named[name]
+        elif 'x' in name:
+            sh, hp = (int(x) for x in name.split('x', 1))
+        else:
+            raise ValueError('unknown tier: ' + name)
+        out.append((sh, hp, float(w) if w else 1.0))
+    if not out:
+        raise ValueError('no tiers')
+    return out
+
+
+def sample_jobs(n: int, tiers: List[Tuple[int, int, float]], median: float, sigma: float,
+                min_amount: float, seed: int) -> List[Tuple[str, int, int]]:
+    rng = random.Random(seed)
+    weights = [w for _sh, _hp, w in tiers]
+    jobs = []
+    for _ in range(n):
+        amt = max(min_amount, rng.lognormvariate(math.log(median), sigma))
+        sh, hp, _w = rng.choices(tiers, weights)[0]
+        jobs.append((str(Decimal(repr(amt)).quantize(Decimal('0.0001'))), sh, hp))
+    return jobs
+
+
+def load_jobs(path: str) -> List[Tuple[str, int, int]]:
+    """Jobs from a MixingService state file (jobs_state.json) or an amount,shards,hops CSV."""
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return [(str(d['amount']), int(d.get('shard_count', 3)), int(d.get('hop_count', 1)))
+                for d in data.values()]
+    jobs = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.reader(f):
+            if not row or row[0].strip().lower() in ('', 'amount'):
+                continue
+            jobs.append((str(Decimal(row[0].strip())), int(row[1]), int(row[2])))
+    return jobs
+
+
+def run_grid(points: List[Dict[str, str]], jobs: List[Tuple[str, int, int]], workers: int = 0) -> List[Dict[str, Any]]:
+    tasks = [(p, jobs) for p in (points or [{}])]
+    if workers == 1 or len(tasks) == 1:
+        return [run_point(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=workers or None) as pool:
+        return list(pool.map(run_point, tasks))
+
+
+def format_table(rows: List[Dict[str, Any]], keys: List[str]) -> str:
+    cols = list(keys) + list(COLUMNS)
+    cells = [[k for k in cols]]
+    for r in rows:
+        line = []
+        for k in cols:
+            v = r.get(k, '')
+            if isinstance(v, float):
+                v = '%.5f' % v if k.endswith(('_rate', '_shards', '_cover')) else '%.4f' % v
+            line.append(str(v))
+        cells.append(line)
+    widths = [max(len(c[i]) for c in cells) for i in range(len(cols))]
+    return '\n'.join('  '.join(c[i].rjust(widths[i]) for i in range(len(cols))) for c in cells)
+
+
+def _parse_args(argv):
+    import argparse
+    p = argparse.ArgumentParser(description='Sweep fee parameters over a simulated job mix')
+    p.add_argument('--grid', action='append', default=[], help='KEY=v1,v2,... (repeatable)')
+    p.add_argument('--jobs', type=int, default=2000)
+    p.add_argument('--jobs-file', default=None, help='jobs_state.json or amount,shards,hops CSV to replay')
+    p.add_argument('--tiers', default='SL1:0.6,SL3:0.3,SL5:0.1', help='NAME[:weight] or SHARDSxHOPS[:weight]')
+    p.add_argument('--median', type=float, default=20.0, help='median job amount (coins)')
+    p.add_argument('--sigma', type=float, default=1.0, help='log-normal spread of amounts')
+    p.add_argument('--min-amount', type=float, default=0.5)
+    p.add_argument('--seed', type=int, default=1)
+    p.add_argument('--workers', type=int, default=0, help='worker processes (0 = cpu count)')
+    p.add_argument('--sort', default='revenue_rate')
+    p.add_argument('--desc', action='store_true')
+    p.add_argument('--csv', default=None, help='also write rows as CSV')
+    p.add_argument('--json', default=None, help='also write rows as JSON')
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv if argv is not None else sys.argv[1:])
+    points = parse_grid(args.grid)
+    if args.jobs_file:
+        jobs = load_jobs(args.jobs_file)
+    else:
+        jobs = sample_jobs(args.jobs, parse_tiers(args.tiers), args.median, args.sigma, args.min_amount, args.seed)
+    rows = run_grid(points, jobs, args.workers)
+    rows.sort(key=lambda r: r.get(args.sort, 0), reverse=args.desc)
+    keys = [k for k in GRID_KEYS if any(k in p for p in points)]
+    print(format_table(rows, keys))
+    if args.csv:
+        with open(args.csv, 'w', encoding='utf-8', newline='') as f:
+            w = csv.DictWriter(f, fieldnames=keys + list(COLUMNS))
+            w.writeheader()
+            w.writerows(rows)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+# Shared job store for several MixingService workers (processes or hosts on a
+# shared volume). Each row carries the job JSON, a version for optimistic writes
+# and a lease: the worker holding an unexpired lease is the only one that runs
+# the job; a crashed worker's leases simply run out and another worker claims them.
+# Rollback-journal mode is kept on purpose: WAL does not work on network filesystems.
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    status TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    lease_owner TEXT,
+    lease_kind TEXT,
+    lease_until REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)'''
+
+
+class JobStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+        d = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(d):
+            os.makedirs(d)
+        self._db().executescript(_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self.local.db = db
+        return db
+
+    def load_all(self, active_only: bool = False) -> Dict[str, Tuple[str, int]]:
+        q = 'SELECT job_id, data, version FROM jobs' + (" WHERE status != 'completed'" if active_only else '')
+        return {r[0]: (r[1], r[2]) for r in self._db().execute(q)}
+
+    def load(self, job_id: str) -> Optional[Tuple[str, int]]:
+        r = self._db().execute('SELECT data, version FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return (r[0], r[1]) if r else None
+
+    def insert(self, job_id: str, data: str, status: str) -> Optional[int]:
+        cur = self._db().execute('INSERT OR IGNORE INTO jobs (job_id, data, status) VALUES (?, ?, ?)',
+                                 (job_id, data, status))
+        return 1 if cur.rowcount else None
+
+    def put(self, job_id: str, data: str, status: str) -> None:
+        """Unconditional upsert, for a store only this process writes (the completed-job archive)."""
+        self._db().execute('INSERT OR REPLACE INTO jobs (job_id, data, status) VALUES (?, ?, ?)', (job_id, data, status))
+
+    def save(self, job_id: str, data: str, status: str, owner: str, version: int) -> Optional[int]:
+        """Write if `owner` holds the lease, or nobody does and `version` is still current."""
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            cur = db.execute(
+                'UPDATE jobs SET data = ?, status = ?, version = version + 1 WHERE job_id = ? AND '
+                '((lease_owner = ? AND lease_until >= ?) OR ((lease_owner IS NULL OR lease_until < ?) AND version = ?))',
+                (data, status, job_id, owner, time.time(), time.time(), version))
+            row = db.execute('SELECT version FROM jobs WHERE job_id = ?', (job_id,)).fetchone() if cur.rowcount else None
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        return row[0] if row else None
+
+    def claim(self, job_id: str, owner: str, kind: str, ttl: float) -> Optional[Tuple[str, int]]:
+        """Take the lease if it is free, expired or already ours; returns the current row."""
+        db = self._db()
+        now = time.time()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            cur = db.execute(
+                'UPDATE jobs SET lease_owner = ?, lease_kind = ?, lease_until = ? WHERE job_id = ? AND '
+                '(lease_owner IS NULL OR lease_owner = ? OR lease_until < ?)',
+                (owner, kind, now + ttl, job_id, owner, now))
+            row = db.execute('SELECT data, version FROM jobs WHERE job_id = ?', (job_id,)).fetchone() if cur.rowcount else None
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        return (row[0], row[1]) if row else None
+
+    def renew(self, owner: str, ttl: float) -> Set[str]:
+        """Extend every unexpired lease of `owner`; returns the job ids it still holds."""
+        db = self._db()
+        now = time.time()
+        db.execute('UPDATE jobs SET lease_until = ? WHERE lease_owner = ? AND lease_until >= ?', (now + ttl, owner, now))
+        return {r[0] for r in db.execute('SELECT job_id FROM jobs WHERE lease_owner = ? AND lease_until >= ?', (owner, now))}
+
+    def release(self, job_id: str, owner: str) -> None:
+        self._db().execute('UPDATE jobs SET lease_owner = NULL, lease_kind = NULL, lease_until = 0 '
+                           'WHERE job_id = ? AND lease_owner = ?', (job_id, owner))
+
+    def leases(self) -> Dict[str, Dict[str, object]]:
+        now = time.time()
+        return {r[0]: {'owner': r[1], 'kind': r[2], 'expires_in': round(r[3] - now, 1)}
+                for r in self._db().execute('SELECT job_id, lease_owner, lease_kind, lease_until FROM jobs '
+                                            'WHERE lease_owner IS NOT NULL AND lease_until >= ?', (now,))}
@@ -0,0 +1,108 @@
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set
+
+# Mempool diff monitor.
+# One getrawmempool (txids only) every MEMPOOL_POLL_INTERVAL_SEC replaces
+# per-transaction acceptance checks. Each snapshot is diffed against the previous
+# one and only watched txids that entered or left produce events:
+#   accepted  - now in the mempool
+#   confirmed - left the mempool into a block (per the confirmation tracker)
+#   evicted   - left the mempool without being mined (trimmed, expired, replaced)
+
+
+def _interval() -> float:
+    try:
+        return max(0.5, float(os.environ.get('MEMPOOL_POLL_INTERVAL_SEC', '10')))
+    except Exception:
+        return 10.0
+
+
+class MempoolMonitor:
+    def __init__(self, iface, confs, interval: Optional[float] = None):
+        self.iface = iface
+        self.confs = confs
+        self.interval = interval if interval is not None else _interval()
+        self.txids: FrozenSet[str] = frozenset()
+        self.watched: Set[str] = set()
+        self.taken_at = 0.0
+        self.polls = 0
+        self.events = 0
+        self.last_changes = 0
+        self.last_error: Optional[str] = None
+        self.lock = threading.Lock()
+        self._listeners: List[Callable[[str, str], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, cb: Callable[[str, str], None]) -> None:
+        """cb(event, txid) for watched txids; see the module comment for events."""
+        self._listeners.append(cb)
+
+    def watch(self, txid: str) -> None:
+        with self.lock:
+            self.watched.add(txid)
+
+    def unwatch(self, txid: str) -> None:
+        with self.lock:
+            self.watched.discard(txid)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+
+    def snapshot(self, max_age: float = 0.0) -> FrozenSet[str]:
+        """Current mempool txids, polling only when the last snapshot is older than `max_age`."""
+        if self.polls == 0 or time.time() - self.taken_at > max_age:
+            self.poll()
+        return self.txids
+
+    def poll(self) -> Dict[str, List[str]]:
+        new = frozenset(self.iface._rpc('getrawmempool', [False]) or [])
+        with self.lock:
+            old, self.txids = self.txids, new
+            self.taken_at = time.time()
+            first = self.polls == 0
+            self.polls += 1
+            added, removed = new - old, old - new
+            self.last_changes = len(added) + len(removed)
+            watched = self.watched
+            # intersect from the smaller side: cost follows the changes, not the pool
+            accepted = [t for t in added if t in watched] if len(added) < len(watched) else [t for t in watched if t in added]
+            left = [t for t in removed if t in watched] if len(removed) < len(watched) else [t for t in watched if t in removed]
+        out: Dict[str, List[str]] = {'accepted': [] if first else accepted, 'confirmed': [], 'evicted': []}
+        if left:
+            # one catch-up tells mined from dropped
+            self.confs.sync()
+            for t in left:
+                out['confirmed' if self.confs.confirmations(t) > 0 else 'evicted'].append(t)
+        for event in ('accepted', 'confirmed', 'evicted'):
+            for t in out[event]:
+                self.events += 1
+                for cb in list(self._listeners):
+                    try:
+                        cb(event, t)
+                    except Exception:
+                        pass
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {'size': len(self.txids), 'watched': len(self.watched), 'polls': self.polls,
+                    'events': self.events, 'last_changes': self.last_changes,
+                    'age_sec': round(time.time() - self.taken_at, 1) if self.polls else None,
+                    'interval': self.interval, 'last_error': self.last_error}
@@ -4,9 +4,10 @@ import importlib.util
 import time
 import uuid
 import threading
+import socket
 from decimal import Decimal
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 import random
 import json
@@ -25,14 +26,45 @@ if jm_root not in sys.path:
 def _load_module(path, name):
     spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
     mod = importlib.util.module_from_spec(spec)
+    # registered so process pools can pickle the module's functions by name
+    sys.modules[name] = mod
     spec.loader.exec_module(mod)
     return mod
 
+def _load_service_module(name):
+    # package-qualified, so `from service import fee_model` finds this same module
+    # and nothing else on sys.path named e.g. `rawtx` or `tracing` is shadowed
+    return _load_module(os.path.join(here, name + '.py'), 'service.' + name)
+
+# before the interface, which decodes transactions with it
+rawtx = _load_service_module('rawtx')
+# workers of the CPU pool import the interface by its file name (see _cpu_pool)
 abcmint_iface = _load_module(abcmint_iface_path, 'abcmint_interface')
 jm_jsonrpc = _load_module(jsonrpc_path, 'jm_jsonrpc')
-fee_model = _load_module(os.path.join(here, 'fee_model.py'), 'fee_model')
+fee_model = _load_service_module('fee_model')
+tracing = _load_service_module('tracing')
+node_status = _load_service_module('node_status')
+rpc_pool = _load_service_module('rpc_pool')
+job_store = _load_service_module('job_store')
+deposit_watcher = _load_service_module('deposit_watcher')
+wallet_feed = _load_service_module('wallet_feed')
+conf_tracker = _load_service_module('conf_tracker')
+broadcast_queue = _load_service_module('broadcast_queue')
+mempool_monitor = _load_service_module('mempool_monitor')
+rebroadcast = _load_service_module('rebroadcast')
+utxo_cache = _load_service_module('utxo_cache')
+tx_cache = _load_service_module('tx_cache')
+
+
+def _slotted(cls):
+    # what dataclass(slots=True) does on Python 3.10+: no per-instance __dict__
+    names = tuple(f.name for f in fields(cls))
+    ns = {k: v for k, v in cls.__dict__.items() if k not in names and k not in ('__dict__', '__weakref__')}
+    ns['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, ns)
 
 
+@_slotted
 @dataclass
 class MixJob:
     job_id: str
@@ -64,9 +96,39 @@ class MixJob:
     error: Optional[str] = None
     last_poll_at: datetime = field(default_factory=datetime.now)
     last_update_at: datetime = field(default_factory=datetime.now)
+    mix_outpoint: Optional[Dict[str, Any]] = None
+    shard_outpoints: List[Optional[Dict[str, Any]]] = field(default_factory=list)
+    spans: List[Dict[str, Any]] = field(default_factory=list)
+
+
+_JOB_FIELDS = tuple(f.name for f in fields(MixJob))
+
+
+class LeaseLost(RuntimeError):
+    """Another worker took over the job; this thread must stop touching it."""
+
+
+# bounded most-recently-used map (archived jobs looked up by the front end)
+_LRU = abcmint_iface.LRUCache
 
 
 class MixingService:
+    # legacy single-process mode (jobs_state.json) unless JOB_STORE is set
+    store = None
+    archive = None
+    recent: Optional[_LRU] = None
+    deposits = None
+    wallet_feed = None
+    confs = None
+    broadcasts = None
+    rebroadcasts = None
+    mempool = None
+    utxo_cache = None
+    tx_cache = None
+    _lost: frozenset = frozenset()
+    # guards the check-and-set of `monitors` in _claim
+    _claim_lock = threading.Lock()
+
     def __init__(self):
         self._ensure_env()
         # Initialize RPC with retry logic wrapper
@@ -74,58 +136,165 @@ class MixingService:
         
         self.jobs: Dict[str, MixJob] = {}
         self.lock = threading.Lock()
-        self._load_state()
         self.monitors: Dict[str, str] = {}
+        self._init_store()
+        self._load_state()
         self.addr_pool: List[str] = []
+        self.rawtx = rawtx.RawTxBuilder()
         try:
             self._ensure_wallet_unlocked()
         except Exception:
             pass
-        threading.Thread(target=self._guardian, daemon=True).start()
+        self.node_status = node_status.NodeStatusCache(self.iface)
+        self.node_status.add_block_listener(self._refresh_fee_rate)
+        self.node_status.start()
+        self.deposits = deposit_watcher.DepositWatcher(self.iface)
+        self.node_status.add_block_listener(self.deposits.on_block)
+        self.confs = conf_tracker.ConfirmationTracker(self.iface)
+        self.node_status.add_block_listener(self.confs.on_block)
+        self.broadcasts = broadcast_queue.BroadcastQueue()
+        self.rebroadcasts = rebroadcast.RebroadcastManager(
+            self.iface, self.confs, os.path.join(os.path.dirname(self._state_path()), 'broadcasts.sqlite3'),
+            send=lambda kind, hex_tx: self.broadcasts.run(kind, self.iface.broadcast_raw_transaction, hex_tx))
+        self.rebroadcasts.on_conflict = self._on_broadcast_conflict
+        self.mempool = mempool_monitor.MempoolMonitor(self.iface, self.confs)
+        self.rebroadcasts.use_mempool(self.mempool)
+        self.utxo_cache = utxo_cache.UtxoCache(os.path.join(os.path.dirname(self._state_path()), 'utxo_cache.sqlite3'))
+        self.node_status.add_block_listener(self.utxo_cache.on_block)
+        self.iface.utxo_cache = self.utxo_cache
+        self.tx_cache = tx_cache.TxCache(os.path.join(os.path.dirname(self._state_path()), 'tx_cache'))
+        self.tx_cache.status = self.node_status
+        self.node_status.add_block_listener(self.tx_cache.on_block)
+        self.iface.tx_cache = self.tx_cache
+        self.rebroadcasts.on_buried = lambda _txid, hex_tx: self.utxo_cache.add_spent(self._tx_inputs(hex_tx))
+        self.wallet_feed = wallet_feed.WalletFeed(self.iface, os.path.join(os.path.dirname(self._state_path()), 'wallet_feed.sqlite3'))
+        self.node_status.add_block_listener(self.wallet_feed.notify)
+        self.iface.tx_feed = self.wallet_feed
+        self.wallet_feed.start()
+        if self._is_worker():
+            self.mempool.start()
+            self.rebroadcasts.start()
+            threading.Thread(target=self._guardian, daemon=True).start()
+
+    def _init_store(self):
+        # completed jobs leave memory; recent lookups of them are served from here
+        self.recent = _LRU(int(os.environ.get('JOB_CACHE_SIZE', '1024')))
+        # JOB_STORE=sqlite (data dir) or a path on a volume shared by all workers
+        where = os.environ.get('JOB_STORE', '').strip()
+        if not where:
+            return
+        if where.lower() == 'sqlite':
+            where = os.path.join(os.path.dirname(self._state_path()), 'jobs.sqlite3')
+        self.store = job_store.JobStore(where)
+        self.archive = self.store
+        self.worker_id = '%s:%d:%s' % (socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+        self._versions: Dict[str, int] = {}
+        self._saved: Dict[str, str] = {}
+        self._lost = set()
+        # when each lease we hold runs out unless the guardian renews it
+        self._lease_until: Dict[str, float] = {}
+
+    def _is_worker(self) -> bool:
+        # MIX_WORKER=false: front end only (creates and reads jobs, runs none)
+        return (os.environ.get('MIX_WORKER') or 'true').lower() in ('1', 'true', 'yes')
+
+    def _lease_sec(self) -> float:
+        return float(os.environ.get('JOB_LEASE_SEC', '120'))
+
+    def _claim(self, job_id: str, kind: str) -> bool:
+        # one running monitor per job: a thread hands over by releasing when it ends.
+        # Within this process the monitors map decides (the store lets a worker take
+        # its own lease again); the slot is reserved before asking the store
+        with self._claim_lock:
+            if job_id in self.monitors:
+                return False
+            self.monitors[job_id] = kind
+        if self.store is not None:
+            start = time.time()
+            try:
+                row = self.store.claim(job_id, self.worker_id, kind, self._lease_sec())
+            except Exception:
+                row = None
+            if row is None:
+                with self._claim_lock:
+                    if self.monitors.get(job_id) == kind:
+                        del self.monitors[job_id]
+                return False
+            if row[1] != self._versions.get(job_id):
+                # another worker advanced the job since we last looked
+                if self._adopt(job_id, row, claiming=True).status == 'completed':
+                    with self._claim_lock:
+                        self.monitors.pop(job_id, None)
+                    try:
+                        self.store.release(job_id, self.worker_id)
+                    except Exception:
+                        pass
+                    return False
+            self._lease_until[job_id] = start + self._lease_sec()
+            self._lost.discard(job_id)
+        return True
+
+    def _release(self, job_id: str) -> None:
+        with self._claim_lock:
+            self.monitors.pop(job_id, None)
+        if self.confs is not None:
+            self.confs.forget_owner(job_id)
+        if self.store is not None:
+            # persist the final state while the lease still keeps other workers out
+            self._save_state()
+            try:
+                self.store.release(job_id, self.worker_id)
+            except Exception:
+                pass
+            self._lease_until.pop(job_id, None)
+
+    def _renew_leases(self) -> None:
+        start = time.time()
+        held = self.store.renew(self.worker_id, self._lease_sec())
+        with self._claim_lock:
+            for jid in list(self.monitors):
+                if jid in held:
+                    self._lease_until[jid] = start + self._lease_sec()
+                else:
+                    # expired while we stalled; its thread stops at the next status change
+                    self.monitors.pop(jid, None)
+                    self._lost.add(jid)
+
+    def _lease_expired(self, job_id: str) -> bool:
+        if self.store is None:
+            return False
+        until = self._lease_until.get(job_id)
+        return until is not None and time.time() >= until
 
     def _init_rpc(self):
-        self.rpc = jm_jsonrpc.JsonRpc(
-            os.environ.get('ABCMINT_RPC_HOST', '127.0.0.1'),
-            int(os.environ.get('ABCMINT_RPC_PORT', '8332')),
-            os.environ.get('ABCMINT_RPC_USER', ''),
-            os.environ.get('ABCMINT_RPC_PASSWORD', '')
-        )
-        
+        # wallet node plus optional read/broadcast replicas (ABCMINT_RPC_NODES);
+        # connections are per thread and per endpoint
+        self.rpc = rpc_pool.RpcPool.from_env(jm_jsonrpc.JsonRpc)
+
         # Monkey patch the call method to add retry logic
-        original_call = self.rpc.call
-        
+        pool_call = self.rpc.call
+
         def safe_call(method, params=None):
+            tracing.count_rpc(method)
             retries = 3
             delay = 1
             last_err = None
             for i in range(retries):
                 try:
-                    return original_call(method, params)
+                    return pool_call(method, params)
                 except Exception as e:
                     last_err = e
-                    # If it's a connection error, wait and retry
-                    if 'CannotSendRequest' in str(e) or 'Connection refused' in str(e) or 'Remote end closed connection' in str(e):
+                    # node-level errors are answers; sends are only retried when they never left
+                    if rpc_pool.retryable(method, e) and i < retries - 1:
                         time.sleep(delay)
                         delay *= 2
-                        # Re-initialize connection if possible (JsonRpc implementation usually handles this, 
-                        # but creating a new instance forces a fresh http.client connection)
-                        try:
-                             self.rpc = jm_jsonrpc.JsonRpc(
-                                os.environ.get('ABCMINT_RPC_HOST', '127.0.0.1'),
-                                int(os.environ.get('ABCMINT_RPC_PORT', '8332')),
-                                os.environ.get('ABCMINT_RPC_USER', ''),
-                                os.environ.get('ABCMINT_RPC_PASSWORD', '')
-                            )
-                             # Update the interface to use the new rpc instance
-                             self.iface.jsonRpc = self.rpc
-                        except:
-                            pass
                         continue
                     raise e
             raise last_err
 
         self.rpc.call = safe_call
         self.iface = abcmint_iface.ABCmintBlockchainInterface(self.rpc, '')
+        self.rpc.start()
 
     def _ensure_env(self):
         defaults = {
@@ -139,6 +308,12 @@ class MixingService:
             'MINCONF_STEP2': '6',
             'REQUIRED_CONF': '6',
             'CONF_POLL_INTERVAL_SEC': '15',
+            'DEPOSIT_POLL_INTERVAL_SEC': '15',
+            'GUARDIAN_INTERVAL_SEC': '10',
+            'FEE_RATE_REFRESH_SEC': '600',
+            'HOP_CHAIN_MODE': 'chained',
+            'MEMPOOL_ANCESTOR_LIMIT': '25',
+            'HOP_CHAIN_WAIT_SEC': '3600',
             'ABCMINT_DEDUCTION_MODE': 'deduct',
             'ABCMINT_FEE_ADDRESS': '8P3aFLXr9F6BPvzC6yR4fTiD4RzFT3wJbjhyMn5uJ1ZFARTRb'
         }
@@ -179,6 +354,7 @@ class MixingService:
             os.environ['FIXED_FEE'] = '0.01'
             os.environ['TX_FEE_PER_TX'] = '0.01'
             os.environ['MINER_FEE_CAP'] = '1'
+        fee_model.refresh_config()
 
     def _prefetch_addresses(self, count: int) -> None:
         n = max(0, int(count))
@@ -200,6 +376,54 @@ class MixingService:
             return a
         return self.addr_pool.pop(0)
 
+    def wallet_notify(self, txid: str) -> Dict[str, Any]:
+        """Node walletnotify hook: resolve the transaction once and credit the deposits it pays."""
+        tx = self.iface._rpc('gettransaction', [txid]) or {}
+        paid = {d.get('address') for d in (tx.get('details') or []) if d.get('category') == 'receive'}
+        hit = self.deposits.touch(paid) if self.deposits is not None else {}
+        if self.wallet_feed is not None:
+            self.wallet_feed.notify()
+        return {'txid': txid, 'jobs': sorted(hit.values())}
+
+    def wallet_entries(self, count: int = 200, address: Optional[str] = None) -> List[dict]:
+        """Recent wallet rows (listtransactions shape), from the change feed's index when the node supports it."""
+        if self.wallet_feed is not None and self.wallet_feed.sync():
+            return self.wallet_feed.entries(count, address=address)
+        rows = self.iface._rpc('listtransactions', ["*", count]) or []
+        return [r for r in rows if r.get('address') == address] if address is not None else rows
+
+    def final_txids_seen(self, job: MixJob, count: int = 200) -> List[str]:
+        """This job's final txids: its recorded ones plus wallet sends to its target since it fanned out.
+
+        A target address may be reused across jobs, so rows older than the job, rows
+        before its fanout, txids another job already recorded and anything past the
+        job's shard count are not counted."""
+        finals = list(job.shard_txids_final or [])
+        want = max(1, int(job.shard_count))
+        if not job.target_address or not job.shard_txids_fanout or len(finals) >= want:
+            return finals
+        since = job.created_at.timestamp()
+        own = set(finals) | set(job.shard_txids_fanout or []) | set(job.shard_txids_hops or [])
+        others = set()
+        for other in list(self.jobs.values()):
+            if other.job_id != job.job_id:
+                others.update(other.shard_txids_final or [])
+        for row in self.wallet_entries(count, address=job.target_address):
+            tid = row.get('txid')
+            if (not tid or tid in own or tid in others or row.get('category') != 'send'
+                    or row.get('address') != job.target_address):
+                continue
+            try:
+                if float(row.get('time') or 0) < since:
+                    continue
+            except Exception:
+                continue
+            own.add(tid)
+            finals.append(tid)
+            if len(finals) >= want:
+                break
+        return finals
+
     def _label_address(self, address: str, label: str) -> None:
         try:
             self.iface._rpc('setaccount', [address, label])
@@ -231,7 +455,49 @@ class MixingService:
             os.makedirs(data_dir)
         return os.path.join(data_dir, 'jobs_state.json')
 
+    @staticmethod
+    def _job_from_dict(jd: Dict[str, Any]) -> MixJob:
+        try:
+            jd['amount'] = Decimal(str(jd.get('amount', 0)))
+            jd['deposit_received'] = Decimal(str(jd.get('deposit_received', 0)))
+            jd['deposit_required'] = Decimal(str(jd.get('deposit_required', 0)))
+            jd['fee_percent'] = Decimal(str(jd.get('fee_percent', 0)))
+            jd['abs_fee'] = Decimal(str(jd.get('abs_fee', 0)))
+            jd['miner_fee'] = Decimal(str(jd.get('miner_fee', 0)))
+            jd['net_amount'] = Decimal(str(jd.get('net_amount', 0)))
+            jd['extra_service_fee'] = Decimal(str(jd.get('extra_service_fee', 0)))
+
+            jd['created_at'] = datetime.fromisoformat(jd.get('created_at')) if isinstance(jd.get('created_at'), str) else datetime.now()
+            jd['last_poll_at'] = datetime.fromisoformat(jd.get('last_poll_at')) if isinstance(jd.get('last_poll_at'), str) else datetime.now()
+            jd['last_update_at'] = datetime.fromisoformat(jd.get('last_update_at')) if isinstance(jd.get('last_update_at'), str) else datetime.now()
+        except Exception:
+            jd['created_at'] = datetime.now()
+            jd['last_poll_at'] = datetime.now()
+            jd['last_update_at'] = datetime.now()
+        return MixJob(**jd)
+
+    @staticmethod
+    def _job_dict(j: MixJob) -> Dict[str, Any]:
+        # shallow: callers serialize it straight away under the service lock
+        d = {k: getattr(j, k) for k in _JOB_FIELDS}
+        d['amount'] = str(j.amount)
+        d['deposit_received'] = str(j.deposit_received)
+        d['deposit_required'] = str(j.deposit_required)
+        d['fee_percent'] = str(j.fee_percent)
+        d['abs_fee'] = str(j.abs_fee)
+        d['miner_fee'] = str(j.miner_fee)
+        d['net_amount'] = str(j.net_amount)
+        d['extra_service_fee'] = str(j.extra_service_fee)
+
+        d['spans'] = tracing.persisted(j.spans)
+        d['created_at'] = j.created_at.isoformat()
+        d['last_poll_at'] = j.last_poll_at.isoformat()
+        d['last_update_at'] = j.last_update_at.isoformat()
+        return d
+
     def _load_state(self):
+        if self.store is not None:
+            return self._load_store()
         try:
             path = self._state_path()
             if not os.path.exists(path):
@@ -239,90 +505,144 @@ class MixingService:
             with open(path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             for jid, jd in data.items():
-                try:
-                    jd['amount'] = Decimal(str(jd.get('amount', 0)))
-                    jd['deposit_received'] = Decimal(str(jd.get('deposit_received', 0)))
-                    jd['deposit_required'] = Decimal(str(jd.get('deposit_required', 0)))
-                    jd['fee_percent'] = Decimal(str(jd.get('fee_percent', 0)))
-                    jd['abs_fee'] = Decimal(str(jd.get('abs_fee', 0)))
-                    jd['miner_fee'] = Decimal(str(jd.get('miner_fee', 0)))
-                    jd['net_amount'] = Decimal(str(jd.get('net_amount', 0)))
-                    jd['extra_service_fee'] = Decimal(str(jd.get('extra_service_fee', 0)))
-
-                    jd['created_at'] = datetime.fromisoformat(jd.get('created_at')) if isinstance(jd.get('created_at'), str) else datetime.now()
-                    jd['last_poll_at'] = datetime.fromisoformat(jd.get('last_poll_at')) if isinstance(jd.get('last_poll_at'), str) else datetime.now()
-                    jd['last_update_at'] = datetime.fromisoformat(jd.get('last_update_at')) if isinstance(jd.get('last_update_at'), str) else datetime.now()
-                except Exception:
-                    jd['created_at'] = datetime.now()
-                    jd['last_poll_at'] = datetime.now()
-                    jd['last_update_at'] = datetime.now()
-                job = MixJob(**jd)
+                if jid in self.monitors:
+                    # a running job's in-memory copy is newer than the file
+                    continue
+                job = self._job_from_dict(jd)
                 self.jobs[jid] = job
         except Exception:
             pass
 
     def _save_state(self):
+        if self.store is not None:
+            return self._save_store()
         try:
-            with self.lock:
-                data = {}
-                for jid, j in self.jobs.items():
-                    d = asdict(j)
-                    d['amount'] = str(j.amount)
-                    d['deposit_received'] = str(j.deposit_received)
-                    d['deposit_required'] = str(j.deposit_required)
-                    d['fee_percent'] = str(j.fee_percent)
-                    d['abs_fee'] = str(j.abs_fee)
-                    d['miner_fee'] = str(j.miner_fee)
-                    d['net_amount'] = str(j.net_amount)
-                    d['extra_service_fee'] = str(j.extra_service_fee)
-
-                    d['created_at'] = j.created_at.isoformat()
-                    d['last_poll_at'] = j.last_poll_at.isoformat()
-                    d['last_update_at'] = j.last_update_at.isoformat()
-                    data[jid] = d
+            with self.lock, tracing.lock:
+                text = json.dumps({jid: self._job_dict(j) for jid, j in self.jobs.items()}, ensure_ascii=False)
             tmp_path = self._state_path() + '.tmp'
             with open(tmp_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False)
+                f.write(text)
             os.replace(tmp_path, self._state_path())
         except Exception:
             pass
 
+    def _adopt(self, job_id: str, row, claiming: bool = False) -> MixJob:
+        text, version = row
+        job = self._job_from_dict(json.loads(text))
+        with self.lock:
+            if job.status == 'completed' and (claiming or job_id not in self.monitors):
+                self.jobs.pop(job_id, None)
+                self._versions.pop(job_id, None)
+                self._saved.pop(job_id, None)
+                self.recent.put(job_id, job)
+                return job
+            self.jobs[job_id] = job
+            self._versions[job_id] = version
+            self._saved[job_id] = text
+        return job
+
+    def _load_store(self):
+        try:
+            rows = self.store.load_all(active_only=True)
+            if not rows and not self.jobs and os.path.exists(self._state_path()) and not self.store.load_all():
+                # first start on a shared store: bring over the single-process state file
+                with open(self._state_path(), 'r', encoding='utf-8') as f:
+                    for jid, jd in json.load(f).items():
+                        self.store.insert(jid, json.dumps(jd, ensure_ascii=False, sort_keys=True), jd.get('status', ''))
+                rows = self.store.load_all(active_only=True)
+            for jid, row in rows.items():
+                # jobs we run are authoritative here; everything else follows the store
+                if jid in self.monitors or self._versions.get(jid) == row[1]:
+                    continue
+                self._adopt(jid, row)
+            with self.lock:
+                # completed (archived) elsewhere: drop our copy, get_job reloads it on demand
+                for jid in [j for j in self.jobs if j not in rows and j in self._versions and j not in self.monitors]:
+                    self.jobs.pop(jid, None)
+                    self._versions.pop(jid, None)
+                    self._saved.pop(jid, None)
+        except Exception:
+            pass
+
+    def _save_store(self):
+        try:
+            with self.lock, tracing.lock:
+                rows = [(jid, json.dumps(self._job_dict(j), ensure_ascii=False, sort_keys=True), j.status)
+                        for jid, j in self.jobs.items()]
+            for jid, text, status in rows:
+                if self._saved.get(jid) == text:
+                    continue
+                version = self._versions.get(jid)
+                if version is None:
+                    new = self.store.insert(jid, text, status)
+                else:
+                    new = self.store.save(jid, text, status, self.worker_id, version)
+                if new is None:
+                    # another worker owns or advanced it: take the stored copy
+                    if jid not in self.monitors:
+                        row = self.store.load(jid)
+                        if row:
+                            self._adopt(jid, row)
+                    continue
+                self._versions[jid] = new
+                self._saved[jid] = text
+        except Exception:
+            pass
+
     def _guardian(self):
         while True:
             try:
+                if self.store is not None:
+                    # pick up jobs created or released elsewhere, and keep our leases alive
+                    self._load_state()
+                    self._renew_leases()
                 with self.lock:
                     ids = list(self.jobs.keys())
                 for jid in ids:
-                    job = self.get_job(jid)
+                    job = self.jobs.get(jid)
                     if not job:
                         continue
                     job.last_poll_at = datetime.now()
                     # Normal states
                     if job.status == 'waiting_deposit' and self.monitors.get(jid) != 'deposit':
-                        threading.Thread(target=self._monitor_deposit, args=(jid,), daemon=True).start()
-                        self.monitors[jid] = 'deposit'
+                        if self._claim(jid, 'deposit'):
+                            self._spawn(self._monitor_deposit, jid)
                     if job.status == 'deposit_received' and self.monitors.get(jid) != 'deposit':
-                        threading.Thread(target=self._monitor_deposit, args=(jid,), daemon=True).start()
-                        self.monitors[jid] = 'deposit'
+                        if self._claim(jid, 'deposit'):
+                            self._spawn(self._monitor_deposit, jid)
                     if job.status == 'waiting_confirmations' and self.monitors.get(jid) != 'confirm' and job.txid1:
-                        threading.Thread(target=self._resume_confirmations, args=(jid,), daemon=True).start()
-                        self.monitors[jid] = 'confirm'
+                        if self._claim(jid, 'confirm'):
+                            self._spawn(self._resume_confirmations, jid)
                     
                     # Error recovery
                     has_shards = bool(job.shard_txids_fanout or [])
                     if job.status in ('mixing_step2', 'error') and has_shards and self.monitors.get(jid) != 'shard':
-                        threading.Thread(target=self._resume_sharded_hops, args=(jid,), daemon=True).start()
-                        self.monitors[jid] = 'shard'
+                        if self._claim(jid, 'shard'):
+                            self._spawn(self._resume_sharded_hops, jid)
                     
                     # Recover from error/stuck state where txid1 exists but no shards yet (Step 1 done/confirming)
                     if job.status in ('error', 'waiting_deposit') and job.txid1 and not has_shards and self.monitors.get(jid) != 'confirm':
-                        threading.Thread(target=self._resume_confirmations, args=(jid,), daemon=True).start()
-                        self.monitors[jid] = 'confirm'
+                        if self._claim(jid, 'confirm'):
+                            self._spawn(self._resume_confirmations, jid)
 
                 self._save_state()
+                self._archive_finished()
             except Exception:
                 pass
-            time.sleep(10)
+            time.sleep(float(os.environ.get('GUARDIAN_INTERVAL_SEC', '10')))
+
+    def _set_status(self, job: MixJob, status: str) -> None:
+        if job.job_id in self._lost and status != 'error':
+            raise LeaseLost('Job lease lost to another worker')
+        job.status = status
+        tracing.phase(job, status)
+
+    def _spawn(self, target, job_id: str) -> None:
+        threading.Thread(target=self._run_bound, args=(target, job_id), daemon=True).start()
+
+    def _run_bound(self, target, job_id: str) -> None:
+        with tracing.bind(self.jobs.get(job_id)):
+            target(job_id)
 
     def _resume_confirmations(self, job_id: str):
         job = self.jobs.get(job_id)
@@ -332,31 +652,30 @@ class MixingService:
             required_conf = int(os.environ['REQUIRED_CONF'])
             minconf2 = int(os.environ['MINCONF_STEP2'])
             min_needed = max(required_conf, minconf2)
+            self._track(job, job.txid1, seed=True)
             while True:
-                info = self.iface._rpc('gettransaction', [job.txid1])
-                conf = int(info.get('confirmations', 0)) if info else 0
+                conf = self._wait_confs(job.txid1, min_needed)
                 job.confirmations = conf
                 job.last_update_at = datetime.now()
                 self._save_state()
                 if conf >= min_needed:
                     break
-                time.sleep(int(os.environ['CONF_POLL_INTERVAL_SEC']))
             src_addr = job.mix_address or os.environ.get('ABCMINT_PRIMARY_ADDRESS', '')
             while True:
                 utxos_ready = self.iface.listunspent_for_addresses([src_addr], minconf=minconf2)
                 if utxos_ready:
                     break
-                time.sleep(int(os.environ['CONF_POLL_INTERVAL_SEC']))
+                time.sleep(float(os.environ['CONF_POLL_INTERVAL_SEC']))
                 self._save_state()
-            job.status = 'mixing_step2'
+            self._set_status(job, 'mixing_step2')
             self._execute_sharded_hops(job, src_addr)
-            job.status = 'completed'
-            self.monitors.pop(job_id, None)
+            self._set_status(job, 'completed')
+            self._release(job_id)
             self._save_state()
         except Exception as e:
-            job.status = 'error'
             job.error = str(e)
-            self.monitors.pop(job_id, None)
+            self._set_status(job, 'error')
+            self._release(job_id)
             self._save_state()
 
     def _resume_sharded_hops(self, job_id: str):
@@ -364,15 +683,15 @@ class MixingService:
         if not job or not job.mix_address:
             return
         try:
-            job.status = 'mixing_step2'
+            self._set_status(job, 'mixing_step2')
             self._execute_sharded_hops(job, job.mix_address)
-            job.status = 'completed'
-            self.monitors.pop(job_id, None)
+            self._set_status(job, 'completed')
+            self._release(job_id)
             self._save_state()
         except Exception as e:
-            job.status = 'error'
             job.error = str(e)
-            self.monitors.pop(job_id, None)
+            self._set_status(job, 'error')
+            self._release(job_id)
             self._save_state()
 
     def _derive_shard_sources(self, job: MixJob) -> List[Dict[str, Any]]:
@@ -400,6 +719,7 @@ class MixingService:
             pass
         sc = shard_count if shard_count is not None else int(os.environ.get('TIER_STANDARD_SHARDS', '3'))
         hc = hop_count if hop_count is not None else int(os.environ.get('TIER_STANDARD_HOPS', '1'))
+        self._sync_fee_rate()
         q = fee_model.quote(amount, sc, hc)
         step1_fee = Decimal(os.environ.get('DEPOSIT_EXTRA', '0.1'))
         miner_est = q['miner_fee']
@@ -423,63 +743,134 @@ class MixingService:
         with self.lock:
             self.jobs[job_id] = job
         self._save_state()
-        threading.Thread(target=self._monitor_deposit, args=(job_id,), daemon=True).start()
-        self.monitors[job_id] = 'deposit'
+        if self._is_worker() and self._claim(job_id, 'deposit'):
+            self._spawn(self._monitor_deposit, job_id)
         return job
 
     def get_job(self, job_id: str) -> Optional[MixJob]:
-        return self.jobs.get(job_id)
+        if self.recent is not None:
+            done = self.recent.get(job_id)
+            if done is not None:
+                return done
+        if self.store is not None and job_id not in self.monitors:
+            # front ends and other workers see the latest stored state
+            try:
+                row = self.store.load(job_id)
+                if row and row[1] != self._versions.get(job_id):
+                    return self._adopt(job_id, row)
+            except Exception:
+                pass
+        job = self.jobs.get(job_id)
+        if job is None and self.store is None and self.recent is not None:
+            job = self._load_archived(job_id)
+        return job
+
+    def _archive_store(self):
+        if self.archive is None:
+            self.archive = job_store.JobStore(os.path.join(os.path.dirname(self._state_path()), 'jobs_archive.sqlite3'))
+        return self.archive
+
+    def _load_archived(self, job_id: str) -> Optional[MixJob]:
+        try:
+            row = self._archive_store().load(job_id)
+        except Exception:
+            return None
+        if not row:
+            return None
+        job = self._job_from_dict(json.loads(row[0]))
+        self.recent.put(job_id, job)
+        return job
+
+    def _archive_finished(self) -> None:
+        """Move completed jobs out of memory; get_job loads them back on demand."""
+        with self.lock:
+            done = [j for jid, j in self.jobs.items() if j.status == 'completed' and jid not in self.monitors]
+        if not done:
+            return
+        if self.store is None:
+            archive = self._archive_store()
+            with self.lock, tracing.lock:
+                rows = [(j.job_id, json.dumps(self._job_dict(j), ensure_ascii=False, sort_keys=True)) for j in done]
+            for jid, text in rows:
+                archive.put(jid, text, 'completed')
+        else:
+            # the shared store already holds them; flush anything not yet written
+            self._save_state()
+        with self.lock:
+            for j in done:
+                if self.jobs.get(j.job_id) is j:
+                    del self.jobs[j.job_id]
+                    if self.store is not None:
+                        self._versions.pop(j.job_id, None)
+                        self._saved.pop(j.job_id, None)
+                self.recent.put(j.job_id, j)
+        if self.store is None:
+            self._save_state()
 
     def _monitor_deposit(self, job_id: str):
         job = self.jobs.get(job_id)
         if not job:
             return
+        if self.deposits is None:
+            self.deposits = deposit_watcher.DepositWatcher(self.iface)
+        address = job.deposit_address
         try:
-            job.status = 'waiting_deposit'
+            self._set_status(job, 'waiting_deposit')
             job.error = None
+            self.deposits.watch(address, job_id)
+            checked_spent = False
             while True:
-                utxos = self.iface.listunspent_for_addresses([job.deposit_address], minconf=0)
-                total = sum(Decimal(str(u.get('amount', 0))) for u in utxos)
-                
+                # credits come from the shared watcher's batched listunspent
+                credit = self.deposits.wait(address)
+                if credit is None:
+                    if job_id in self._lost:
+                        break
+                    if self.deposits.job_for(address) is None:
+                        # dropped from the index (watcher replaced, or a race with unwatch)
+                        self.deposits.watch(address, job_id)
+                    continue
+                total = credit['total']
+
                 # Check if funds were received but already spent (recovery from crash post-broadcast)
-                if total == 0:
+                if total == 0 and not checked_spent:
+                    checked_spent = True
                     try:
-                        received = Decimal(str(self.iface._rpc('getreceivedbyaddress', [job.deposit_address, 0])))
+                        received = Decimal(str(self.iface._rpc('getreceivedbyaddress', [address, 0])))
                         if received >= job.deposit_required:
+                            # the deposit may simply have landed after this tick's listunspent
+                            credit = self.deposits.poll({address}).get(address) or credit
+                            total = credit['total']
+                        if received >= job.deposit_required and total == 0:
                             # Funds arrived and moved. Transition to next step to trigger error or recovery.
                             # Calling _execute_mixing will fail with "No UTXOs" -> Error state.
                             # This prevents infinite "recovering" loop.
-                            job.status = 'deposit_received'
+                            self.deposits.unwatch(address)
+                            self._set_status(job, 'deposit_received')
                             job.last_update_at = datetime.now()
                             self._execute_mixing(job_id)
                             break
                     except Exception:
                         pass
 
-                if total == 0:
-                    all_utxos = self.iface.listunspent(minconf=0)
-                    total = sum(
-                        Decimal(str(u.get('amount', 0)))
-                        for u in (all_utxos or [])
-                        if u.get('address') == job.deposit_address
-                    )
+                changed = total != job.deposit_received
                 job.deposit_received = total
                 if total >= job.deposit_required:
-                    job.status = 'deposit_received'
+                    self._set_status(job, 'deposit_received')
                     job.last_update_at = datetime.now()
-                    minconf_step1 = int(os.environ.get('MINCONF', '1'))
-                    utxos_ready = self.iface.listunspent_for_addresses([job.deposit_address], minconf=minconf_step1)
-                    if utxos_ready:
+                    if credit['ready']:
+                        self.deposits.unwatch(address)
                         self._execute_mixing(job_id)
                         break
                     # Not enough confirmations for step 1, continue waiting
-                self._save_state()
-                time.sleep(15)
+                if changed:
+                    self._save_state()
         except Exception as e:
-            job.status = 'error'
             job.error = str(e)
-            self.monitors.pop(job_id, None)
+            self._set_status(job, 'error')
+            self._release(job_id)
             self._save_state()
+        finally:
+            self.deposits.unwatch(address)
 
     def _execute_mixing(self, job_id: str):
         job = self.jobs.get(job_id)
@@ -490,7 +881,7 @@ class MixingService:
                 self._ensure_wallet_unlocked()
             except Exception:
                 pass
-            job.status = 'mixing_step1'
+            self._set_status(job, 'mixing_step1')
             os.environ['ABCMINT_DEDUCTION_MODE'] = os.environ.get('ABCMINT_DEDUCTION_MODE', 'deduct')
             os.environ['ABCMINT_DEDUCTION_ENABLED'] = 'true'
             os.environ['ABCMINT_DEDUCTION_PERCENT'] = str(job.fee_percent)
@@ -500,7 +891,7 @@ class MixingService:
             if not utxos:
                 raise RuntimeError('No UTXOs at deposit address')
             
-            fee_guess = Decimal(os.environ.get('TX_FEE_PER_TX', os.environ.get('FIXED_FEE', '0.01')))
+            self._sync_fee_rate()
             ded_percent = job.fee_percent
             ded_amt = (job.amount * ded_percent).quantize(Decimal('0.00000001'))
             selected, total = [], Decimal('0')
@@ -517,8 +908,7 @@ class MixingService:
             outputs1 = self.iface.apply_deduction_outputs(job.amount, outputs1)
             fee_addr = os.environ.get('ABCMINT_FEE_ADDRESS')
             if fee_addr and job.extra_service_fee > Decimal('0'):
-                v = self.iface._rpc('validateaddress', [fee_addr])
-                if v and v.get('isvalid', False):
+                if self.iface.is_valid_address(fee_addr) is True:
                     outputs1[fee_addr] = (outputs1.get(fee_addr, Decimal('0.0')) + job.extra_service_fee).quantize(Decimal('0.00000001'))
             
             num_outputs_est = len(outputs1)
@@ -529,96 +919,166 @@ class MixingService:
                 ident = {'txid': u['txid'], 'vout': int(u['vout'])}
                 selected.append(ident)
                 total += a
-                mf = self.iface.estimate_fee_coins_for_counts(len(selected), num_outputs_est + 1)
+                mf = fee_model.tx_fee(len(selected), num_outputs_est + 1)
                 miner_fee = mf
                 need = sum(outputs1.values()) + miner_fee
                 if total >= need:
                     break
-            if total < (sum(outputs1.values()) + miner_fee):
+            owed = sum(outputs1.values())
+            split = fee_model.spend_split(total, owed, miner_fee, miner_fee)
+            if split is None or split[0] < owed:
                 raise RuntimeError('Insufficient funds for step 1')
-            dust_floor = Decimal(os.environ.get('DUST_COINS_FLOOR', '0.000055'))
-            change1 = (total - (sum(outputs1.values()) + miner_fee)).quantize(Decimal('0.00000001'))
+            paid, change1 = split
+            if paid > owed:
+                # dust change goes to the mix output
+                outputs1[mix_addr] = (outputs1[mix_addr] + paid - owed).quantize(Decimal('0.00000001'))
             if change1 > Decimal('0'):
-                if change1 <= dust_floor:
-                    outputs1[mix_addr] = (outputs1[mix_addr] + change1).quantize(Decimal('0.00000001'))
-                else:
-                    change_addr1 = self._get_address()
-                    try:
-                        self._label_address(change_addr1, 'CH')
-                    except Exception:
-                        pass
-                    outputs1[change_addr1] = (outputs1.get(change_addr1, Decimal('0.0')) + change1).quantize(Decimal('0.00000001'))
+                change_addr1 = self._get_address()
+                try:
+                    self._label_address(change_addr1, 'CH')
+                except Exception:
+                    pass
+                outputs1[change_addr1] = (outputs1.get(change_addr1, Decimal('0.0')) + change1).quantize(Decimal('0.00000001'))
             
-            raw1 = self.iface.create_raw_transaction(selected, outputs1)
-            signed1 = self.iface.sign_raw_transaction(raw1)
-            job.txid1 = self.iface.broadcast_raw_transaction(signed1)
+            with tracing.span(job, 'broadcast', tx_kind='step1', inputs=len(selected), outputs=len(outputs1)):
+                signed1 = self._build_signed(selected, outputs1)
+                job.txid1 = self._send_signed('step1', signed1)
+            self._track(job, job.txid1)
+            # step 2 waits for confirmations, so the mix output starts a fresh chain
+            job.mix_outpoint = {'txid': job.txid1, 'vout': self._vout_of(signed1, outputs1, mix_addr),
+                                'value': str(outputs1[mix_addr]), 'depth': 0}
             self._save_state()
             
             # Wait for confirmations
-            job.status = 'waiting_confirmations'
+            self._set_status(job, 'waiting_confirmations')
             job.error = ''
             self.monitors[job_id] = 'confirm'
             required_conf = int(os.environ['REQUIRED_CONF'])
             minconf2 = int(os.environ['MINCONF_STEP2'])
             min_needed = max(required_conf, minconf2)
             while True:
-                info = self.iface._rpc('gettransaction', [job.txid1])
-                conf = int(info.get('confirmations', 0)) if info else 0
+                conf = self._wait_confs(job.txid1, min_needed)
                 job.confirmations = conf
                 job.last_update_at = datetime.now()
                 if conf >= min_needed:
                     break
-                time.sleep(int(os.environ['CONF_POLL_INTERVAL_SEC']))
                 self._save_state()
             while True:
                 utxos_ready = self.iface.listunspent_for_addresses([mix_addr], minconf=minconf2)
                 if utxos_ready:
                     break
-                time.sleep(int(os.environ['CONF_POLL_INTERVAL_SEC']))
+                time.sleep(float(os.environ['CONF_POLL_INTERVAL_SEC']))
                 self._save_state()
             
-            job.status = 'mixing_step2'
+            self._set_status(job, 'mixing_step2')
             job.error = ''
             self._execute_sharded_hops(job, mix_addr)
-            job.status = 'completed'
+            self._set_status(job, 'completed')
             job.error = ''
             self._save_state()
-            self.monitors.pop(job_id, None)
+            self._release(job_id)
             self._save_state()
             
         except Exception as e:
-            job.status = 'error'
             job.error = str(e)
-            self.monitors.pop(job_id, None)
+            self._set_status(job, 'error')
+            self._release(job_id)
+            self._save_state()
+
+    def _refresh_fee_rate(self, height: Optional[int] = None):
+        est = self.iface._estimate_fee_basic(1)
+        fee_model.set_node_fee_rate(Decimal(est[0]) / Decimal(fee_model.DING) if est else None)
+
+    def _sync_fee_rate(self):
+        # new blocks refresh the rate via node_status; this covers startup and quiet chains
+        try:
+            if fee_model.fee_rate_age() > float(os.environ.get('FEE_RATE_REFRESH_SEC', '600')):
+                self._refresh_fee_rate()
+        except Exception:
+            pass
+
+    def _build_signed(self, inputs: List[Dict[str, Any]], outputs: Dict[str, Decimal]) -> str:
+        # unsigned tx is serialized locally once the builder has matched the node's
+        # createrawtransaction; the node is then only asked to sign. Outputs to
+        # addresses the wallet did not hand out (target, fee) stay node-built, so a
+        # mistyped address is rejected by the node instead of becoming a script
+        b = self.rawtx
+        local = b.ready() and all(self.iface.known_wallet_address(a) for a in outputs)
+        if local:
+            raw = b.build(inputs, outputs)
+        else:
+            raw = self.iface.create_raw_transaction(inputs, outputs)
+            if b.state == 'uncalibrated' and b.enabled():
+                try:
+                    b.calibrate(inputs, outputs, raw, self.iface._decode_raw(raw))
+                except Exception:
+                    b.state = 'disabled'
+        tracing.annotate(unsigned_size=len(raw) // 2, signed_size_est=b.signed_size(raw, len(inputs)),
+                         local_build=local)
+        signed = self.iface.sign_raw_transaction(raw)
+        b.observe_signed(raw, signed, len(inputs))
+        decoded = b.decode(signed, outputs)
+        if decoded is not None:
+            self.iface.remember_decoded(signed, decoded)
+        return signed
+
+    def _send_signed(self, kind: str, signed: str) -> str:
+        # through the shared queue: priority by kind, global tx/sec ceiling
+        if self.broadcasts is None:
+            self.broadcasts = broadcast_queue.BroadcastQueue()
+        ctx = tracing.carry()
+        job = ctx[0]
+        if job is not None and (job.job_id in self._lost or self._lease_expired(job.job_id)):
+            # never broadcast for a job another worker may own by now, even if the
+            # guardian has not noticed yet
+            raise LeaseLost('Job lease lost to another worker')
+
+        def send():
+            with tracing.adopt(ctx):
+                return self.iface.broadcast_raw_transaction(signed)
+        txid = self.broadcasts.run(kind, send)
+        if self.utxo_cache is not None:
+            self.utxo_cache.spending(self._tx_inputs(signed))
+        if self.rebroadcasts is not None:
+            # kept until buried, and sent again if the node drops it
+            self.rebroadcasts.track(txid, signed, kind, getattr(ctx[0], 'job_id', None))
+        return txid
+
+    @staticmethod
+    def _tx_inputs(hex_tx: str) -> List[Tuple[str, int]]:
+        decoded = abcmint_iface.decode_tx_local(hex_tx) or {}
+        return [(i['txid'], int(i['vout'])) for i in decoded.get('vin') or []]
+
+    def _on_broadcast_conflict(self, job_id: Optional[str], txid: str, err: str) -> None:
+        job = self.jobs.get(job_id) if job_id else None
+        if job is not None and job.status != 'completed':
+            # shown by mix_status; the page's recovery path then calls resume
+            job.error = 'broadcast conflict for ' + txid + ': ' + err
             self._save_state()
 
     def _compute_shard_amounts(self, total: Decimal, shards: int) -> List[Decimal]:
-        shards = max(1, int(shards))
-        base = (total / Decimal(shards)).quantize(Decimal('0.00000001'))
-        amounts = [base] * (shards - 1)
-        last = total - base * Decimal(shards - 1)
-        amounts.append(max(Decimal('0.0'), last))
-        return [a for a in amounts if a > 0]
-
-    def _single_send_from(self, from_addrs: List[str], amount: Decimal, fee: Decimal, to_addr: str, minconf: int) -> str:
+        return fee_model.split_shard_amounts(total, shards)
+
+    def _single_send_from(self, from_addrs: List[str], amount: Decimal, fee: Decimal, to_addr: str, minconf: int,
+                          change_addr: Optional[str] = None, kind: str = 'hop') -> str:
         utxos = self.iface.listunspent_for_addresses(from_addrs, minconf=minconf)
         if not utxos:
             raise RuntimeError('No UTXOs available')
-        target = amount + fee
         selected, total = [], Decimal('0')
+        reserve = fee
         for u in sorted(utxos, key=lambda x: Decimal(str(x.get('amount', 0))), reverse=True):
             a = Decimal(str(u.get('amount', 0)))
             if a <= 0:
                 continue
             selected.append({'txid': u['txid'], 'vout': int(u['vout'])})
             total += a
-            if total >= target:
+            # every extra input grows the transaction, so re-price before comparing
+            reserve = max(fee, fee_model.tx_fee(len(selected), 2))
+            if total >= amount + reserve:
                 break
-        if total < target:
-            amount = max(Decimal('0.0'), total - fee)
-            target = amount + fee
-        outputs = {to_addr: amount}
-        miner_fee = self.iface.estimate_fee_coins_for_counts(len(selected), 2)
+        if total < amount + reserve:
+            amount = max(Decimal('0.0'), total - reserve)
+        miner_fee = fee_model.tx_fee(len(selected), 2)
         need = amount + miner_fee
         if total < need:
             for u in sorted(utxos, key=lambda x: Decimal(str(x.get('amount', 0))), reverse=True):
@@ -630,33 +1090,124 @@ class MixingService:
                     continue
                 selected.append(ident)
                 total += a
-                miner_fee = self.iface.estimate_fee_coins_for_counts(len(selected), 2)
+                miner_fee = fee_model.tx_fee(len(selected), 2)
                 need = amount + miner_fee
                 if total >= need:
                     break
-        change_dec = (total - need).quantize(Decimal('0.00000001'))
-        dust_floor = Decimal(os.environ.get('DUST_COINS_FLOOR', '0.000055'))
-        if change_dec > Decimal('0'):
-            if change_dec <= dust_floor:
-                outputs[to_addr] = (outputs.get(to_addr, Decimal('0.0')) + change_dec).quantize(Decimal('0.00000001'))
-            else:
-                change_addr = self._get_address()
-                outputs[change_addr] = (outputs.get(change_addr, Decimal('0.0')) + change_dec).quantize(Decimal('0.00000001'))
-        raw = self.iface.create_raw_transaction(selected, outputs)
-        signed = self.iface.sign_raw_transaction(raw)
+        split = fee_model.spend_split(total, amount, miner_fee, miner_fee)
+        if split is None:
+            raise RuntimeError('Insufficient funds for send')
+        outputs = {to_addr: split[0]}
+        if split[1] > Decimal('0'):
+            change_addr = change_addr or self._get_address()
+            outputs[change_addr] = split[1]
+        signed = self._build_signed(selected, outputs)
         try:
-            txid = self.iface.broadcast_raw_transaction(signed)
+            txid = self._send_signed(kind, signed)
             return txid
         except Exception:
             if minconf == 0:
-                wait_s = int(os.environ.get('CONF_POLL_INTERVAL_SEC', '15'))
+                wait_s = float(os.environ.get('CONF_POLL_INTERVAL_SEC', '15'))
                 for _ in range(6):
                     time.sleep(wait_s)
                     ready = self.iface.listunspent_for_addresses(from_addrs, minconf=1)
                     if ready:
-                        return self._single_send_from(from_addrs, amount, fee, to_addr, 1)
+                        return self._single_send_from(from_addrs, amount, fee, to_addr, 1, change_addr, kind)
             raise RuntimeError('broadcast failed minconf=' + str(minconf) + ' inputs=' + str(len(selected)) + ' outputs=' + str(len(outputs)))
 
+    def _hop_chaining(self, minconf_shard: int) -> bool:
+        return minconf_shard == 0 and os.environ.get('HOP_CHAIN_MODE', 'chained').lower() == 'chained'
+
+    def _is_chain_limit_error(self, e: Exception) -> bool:
+        msg = (getattr(e, 'message', None) or str(e)).lower()
+        return 'too-long-mempool-chain' in msg or 'too long mempool chain' in msg or 'ancestor' in msg
+
+    def _entry_outpoint(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # starting outpoint of a shard chain; depth counts unconfirmed ancestors including itself
+        if entry.get('vout') is not None:
+            return {'txid': entry['txid'], 'vout': int(entry['vout']),
+                    'value': Decimal(str(entry.get('value', entry['amount']))), 'depth': int(entry.get('depth', 1))}
+        utxos = self.iface.listunspent_for_addresses([entry['address']], minconf=0)
+        for u in sorted(utxos or [], key=lambda x: x.get('txid') != entry['txid']):
+            return {'txid': u['txid'], 'vout': int(u['vout']), 'value': Decimal(str(u.get('amount', 0))),
+                    'depth': 0 if int(u.get('confirmations', 0)) > 0 else 1}
+        return None
+
+    def _track(self, job: MixJob, txid: str, seed: bool = False) -> None:
+        if self.confs is None:
+            self.confs = conf_tracker.ConfirmationTracker(self.iface)
+        self.confs.watch(txid, job.job_id, seed)
+
+    def _wait_confs(self, txid: str, needed: int) -> int:
+        # block up to one poll interval; new blocks arrive through the node_status listener
+        if self.confs is None:
+            self.confs = conf_tracker.ConfirmationTracker(self.iface)
+        self.confs.watch(txid, seed=True)
+        poll = float(os.environ.get('CONF_POLL_INTERVAL_SEC', '15'))
+        conf = self.confs.wait(txid, needed, poll)
+        if conf < needed:
+            # no listener running or a block missed: one shared catch-up per interval
+            self.confs.sync(max_age=poll)
+            conf = self.confs.confirmations(txid)
+        return conf
+
+    def _wait_tx_confirmed(self, txid: str):
+        deadline = time.time() + float(os.environ.get('HOP_CHAIN_WAIT_SEC', '3600'))
+        while time.time() < deadline:
+            if self._wait_confs(txid, 1) > 0:
+                return
+        raise RuntimeError('timed out waiting for confirmation of ' + txid)
+
+    def _outpoint_state(self, op: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        # JSON-safe copy for job state
+        if not op:
+            return None
+        return {'txid': op['txid'], 'vout': int(op['vout']), 'value': str(op['value']), 'depth': int(op.get('depth', 1))}
+
+    def _vout_of(self, signed_hex: str, outputs: Dict[str, Decimal], addr: str) -> int:
+        decoded = self.iface._decode_raw(signed_hex)
+        for o in (decoded or {}).get('vout', []):
+            if addr in ((o.get('scriptPubKey') or {}).get('addresses') or []):
+                return int(o.get('n', 0))
+        return list(outputs).index(addr)
+
+    def _send_from_outpoint(self, outpoint: Dict[str, Any], amount: Decimal, fee: Decimal, to_addr: str,
+                            change_addr: Optional[str] = None, kind: str = 'hop') -> Dict[str, Any]:
+        """Build, sign and broadcast a spend of one known outpoint (txid, vout, value, depth).
+
+        No wallet listing is needed, so the outpoint may still be unconfirmed. Only a
+        chain-length rejection waits for the parent to confirm; other errors raise.
+        Returns the new outpoint paying `to_addr`, with `change` set to the change
+        outpoint (or None).
+        """
+        split = fee_model.spend_split(outpoint['value'], amount, fee, fee_model.tx_fee(1, 2))
+        if split is None:
+            raise RuntimeError('Insufficient funds at outpoint')
+        outputs = {to_addr: split[0]}
+        if split[1] > Decimal('0'):
+            change_addr = change_addr or self._get_address()
+            outputs[change_addr] = split[1]
+        depth = int(outpoint.get('depth', 1))
+        limit = int(os.environ.get('MEMPOOL_ANCESTOR_LIMIT', '25'))
+        if limit > 0 and depth + 1 > limit:
+            self._wait_tx_confirmed(outpoint['txid'])
+            depth = 0
+        signed = self._build_signed([{'txid': outpoint['txid'], 'vout': int(outpoint['vout'])}], outputs)
+        try:
+            txid = self._send_signed(kind, signed)
+        except Exception as e:
+            if not self._is_chain_limit_error(e):
+                raise
+            self._wait_tx_confirmed(outpoint['txid'])
+            depth = 0
+            txid = self._send_signed(kind, signed)
+        out = {'txid': txid, 'vout': self._vout_of(signed, outputs, to_addr), 'value': outputs[to_addr],
+               'depth': depth + 1, 'change': None}
+        if change_addr in outputs and change_addr != to_addr:
+            out['change'] = {'txid': txid, 'vout': self._vout_of(signed, outputs, change_addr),
+                             'value': outputs[change_addr], 'depth': depth + 1}
+        return out
+
     def _process_shard_sequence(self, job: MixJob, entry: Dict[str, Any], fee_guess: Decimal, minconf_shard: int):
         src_addr = entry['address']
         current_amt = entry['amount']
@@ -695,32 +1246,53 @@ class MixingService:
         # Calculate remaining hops needed
         hops_done = len(current_hops_list)
         hops_needed = max(0, int(job.hop_count) - hops_done)
+        shard_idx = next((i for i, h in enumerate(job.shard_txids_hops) if h is current_hops_list), -1)
+        prev = self._entry_outpoint(entry) if self._hop_chaining(minconf_shard) else None
+        while len(job.shard_outpoints) < len(job.shard_txids_hops):
+            job.shard_outpoints.append(None)
 
-        for _ in range(hops_needed):
+        for n in range(hops_needed):
             # Safety check: If funds are exhausted by fees, stop to avoid dust errors or infinite loops
             if current_amt <= fee_guess:
                 # Mark as completed (failed path) to allow job to finish
                 job.shard_progress_completed += 1
+                job.shard_outpoints[shard_idx] = None
                 return
 
-            next_addr = self._get_address()
-            try:
-                self._label_address(next_addr, 'H')
-            except Exception:
-                pass
-            txid_hop = self._single_send_from([src_addr], max(Decimal('0.0'), current_amt).quantize(Decimal('0.00000001')), fee_guess, next_addr, minconf=minconf_shard)
+            with tracing.span(job, 'hop', shard=shard_idx, hop=hops_done + n):
+                next_addr = self._get_address()
+                try:
+                    self._label_address(next_addr, 'H')
+                except Exception:
+                    pass
+                with tracing.span(job, 'broadcast', tx_kind='hop', shard=shard_idx, hop=hops_done + n):
+                    if prev is not None:
+                        prev = self._send_from_outpoint(prev, max(Decimal('0.0'), current_amt), fee_guess, next_addr)
+                        txid_hop = prev['txid']
+                    else:
+                        txid_hop = self._single_send_from([src_addr], max(Decimal('0.0'), current_amt).quantize(Decimal('0.00000001')), fee_guess, next_addr, minconf=minconf_shard)
             current_hops_list.append(txid_hop)
+            self._track(job, txid_hop)
+            job.shard_outpoints[shard_idx] = self._outpoint_state(prev)
             self._save_state()
             src_addr = next_addr
-            current_amt = max(Decimal('0.0'), current_amt - fee_guess).quantize(Decimal('0.00000001'))
+            current_amt = fee_model.hop_amount_after_fee(current_amt, fee_guess)
 
-        txid_fin = self._single_send_from([src_addr], max(Decimal('0.0'), current_amt).quantize(Decimal('0.00000001')), fee_guess, job.target_address, minconf=minconf_shard)
+        with tracing.span(job, 'broadcast', tx_kind='final', shard=shard_idx):
+            if prev is not None:
+                txid_fin = self._send_from_outpoint(prev, max(Decimal('0.0'), current_amt), fee_guess, job.target_address, kind='final')['txid']
+            else:
+                txid_fin = self._single_send_from([src_addr], max(Decimal('0.0'), current_amt).quantize(Decimal('0.00000001')), fee_guess, job.target_address, minconf=minconf_shard, kind='final')
         job.shard_txids_final.append(txid_fin)
+        self._track(job, txid_fin)
         job.shard_progress_completed += 1
+        job.shard_outpoints[shard_idx] = None
         self._save_state()
 
     def _execute_sharded_hops(self, job: MixJob, mix_addr: str):
-        fee_guess = Decimal(os.environ.get('TX_FEE_PER_TX', os.environ.get('FIXED_FEE', '0.01')))
+        self._sync_fee_rate()
+        # per-hop deduction: a single-input send with change, priced at the node rate
+        fee_guess = fee_model.tx_fee(1, 2)
         minconf2 = int(os.environ['MINCONF_STEP2'])
         minconf_shard = int(os.environ.get('MINCONF_SHARD', '0'))
 
@@ -729,18 +1301,29 @@ class MixingService:
         if job.shard_txids_final is None: job.shard_txids_final = []
         if job.shard_txids_hops is None: job.shard_txids_hops = []
 
+        if job.shard_outpoints is None: job.shard_outpoints = []
+        chained = self._hop_chaining(minconf_shard)
+
         # 1. Process existing shards (Resume/Continue)
-        src_entries = self._derive_shard_sources(job)
+        src_entries = self._shard_heads(job) if chained else None
+        if src_entries is None:
+            src_entries = self._derive_shard_sources(job) if job.shard_txids_fanout else []
         for entry in src_entries:
             try:
                 self._process_shard_sequence(job, entry, fee_guess, minconf_shard)
+            except LeaseLost:
+                raise
             except Exception:
                 pass # Log error but allow other shards to proceed
 
         # 2. Process remaining funds in mix address (New Fanouts)
-        utxos2 = self.iface.listunspent_for_addresses([mix_addr], minconf=minconf2)
-        if utxos2:
-            available2 = sum(Decimal(str(u.get('amount', 0))) for u in utxos2)
+        mix_op = self._live_outpoint(job.mix_outpoint) if chained else None
+        if mix_op is not None:
+            available2 = Decimal(str(mix_op['value']))
+        else:
+            utxos2 = self.iface.listunspent_for_addresses([mix_addr], minconf=minconf2)
+            available2 = sum(Decimal(str(u.get('amount', 0))) for u in utxos2) if utxos2 else Decimal('0')
+        if available2 > 0:
             done_count = len(job.shard_txids_fanout)
             rem_count = max(1, int(job.shard_count) - done_count)
             
@@ -763,8 +1346,23 @@ class MixingService:
                 except Exception:
                     pass
                 
-                txid_fan = self._single_send_from([mix_addr], amt, fee_guess, shard_addr, minconf=minconf_shard)
+                # fanout change stays with the mix funds so the next fanout can spend it
+                with tracing.span(job, 'broadcast', tx_kind='fanout', shard=done_count + idx):
+                    if mix_op is not None:
+                        fan = self._send_from_outpoint(mix_op, amt, fee_guess, shard_addr, change_addr=mix_addr, kind='fanout')
+                        mix_op = fan['change']
+                        job.mix_outpoint = self._outpoint_state(mix_op)
+                        txid_fan = fan['txid']
+                    else:
+                        fan = None
+                        txid_fan = self._single_send_from([mix_addr], amt, fee_guess, shard_addr, minconf=minconf_shard, change_addr=mix_addr, kind='fanout')
                 job.shard_txids_fanout.append(txid_fan)
+                self._track(job, txid_fan)
+                while len(job.shard_txids_hops) < len(job.shard_txids_fanout):
+                    job.shard_txids_hops.append([])
+                    job.shard_outpoints.append(None)
+                if fan is not None:
+                    job.shard_outpoints[len(job.shard_txids_fanout) - 1] = self._outpoint_state(fan)
                 self._save_state()
                 
                 # Create entry for sequence processing
@@ -773,18 +1371,50 @@ class MixingService:
                     'amount': amt, 
                     'txid': txid_fan
                 }
+                if fan is not None:
+                    entry.update({'vout': fan['vout'], 'value': fan['value'], 'depth': fan['depth']})
                 try:
                     self._process_shard_sequence(job, entry, fee_guess, minconf_shard)
+                except LeaseLost:
+                    raise
                 except Exception:
                     pass # Continue to next shard even if this one fails
+                if mix_op is None and fan is not None:
+                    break # mix funds used up (no change left)
         self._save_state()
 
+    def _live_outpoint(self, op: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not op:
+            return None
+        try:
+            # through query_utxo_set so the outpoint caches answer for spent hops
+            if self.iface.query_utxo_set((bytes.fromhex(op['txid']), int(op['vout'])))[0]:
+                return dict(op)
+        except Exception:
+            pass
+        return None
+
+    def _shard_heads(self, job: MixJob) -> Optional[List[Dict[str, Any]]]:
+        # entries for unfinished shards from recorded outpoints; None means fall back to a wallet scan
+        if len(job.shard_outpoints or []) < len(job.shard_txids_fanout or []):
+            return None
+        entries = []
+        for i, op in enumerate(job.shard_outpoints):
+            if not op:
+                continue
+            if self._live_outpoint(op) is None:
+                return None
+            entries.append({'address': None, 'amount': Decimal(str(op['value'])), 'txid': op['txid'],
+                            'vout': op['vout'], 'value': op['value'], 'depth': op.get('depth', 1)})
+        return entries
+
     def resume_job(self, job_id: str) -> bool:
-        job = self.jobs.get(job_id)
+        job = self.get_job(job_id)
         if not job:
             return False
             
-        if self.monitors.get(job_id):
+        if self.monitors.get(job_id) or not self._is_worker():
+            # running here, or left to the workers' guardians
             return True
 
         has_shards = bool(job.shard_txids_fanout or [])
@@ -792,19 +1422,19 @@ class MixingService:
         # 1. Recover based on progress (txid1 exists)
         if job.txid1:
             if has_shards:
-                threading.Thread(target=self._resume_sharded_hops, args=(job_id,), daemon=True).start()
-                self.monitors[job_id] = 'shard'
+                if self._claim(job_id, 'shard'):
+                    self._spawn(self._resume_sharded_hops, job_id)
                 return True
             else:
                 # Step 1 done, but no shards -> waiting confirmations
-                threading.Thread(target=self._resume_confirmations, args=(job_id,), daemon=True).start()
-                self.monitors[job_id] = 'confirm'
+                if self._claim(job_id, 'confirm'):
+                    self._spawn(self._resume_confirmations, job_id)
                 return True
 
         # 2. Recover based on status (no txid1 yet)
         if job.status in ('waiting_deposit', 'deposit_received', 'error'):
-            threading.Thread(target=self._monitor_deposit, args=(job_id,), daemon=True).start()
-            self.monitors[job_id] = 'deposit'
+            if self._claim(job_id, 'deposit'):
+                self._spawn(self._monitor_deposit, job_id)
             return True
             
         return True
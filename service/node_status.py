@@ -0,0 +1,165 @@
+import os
+import time
+import threading
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+# Cached node-status snapshot for /api/system/status.
+# A background thread polls getblockcount (cheap) and only refreshes peer count
+# and difficulty when the tip moves or the snapshot is older than max_age.
+# Block listeners run on their own threads, so a slow one delays neither the
+# polling nor the other listeners; heights that arrive while a listener is still
+# busy collapse into the latest one.
+
+
+def _interval() -> float:
+    try:
+        return max(0.5, float(os.environ.get('SYSTEM_STATUS_REFRESH_SEC', '5')))
+    except Exception:
+        return 5.0
+
+
+def _max_age() -> float:
+    try:
+        return max(_interval(), float(os.environ.get('SYSTEM_STATUS_MAX_AGE_SEC', '30')))
+    except Exception:
+        return 30.0
+
+
+class _Listener:
+    def __init__(self, cb: Callable[[int], None]):
+        self.cb = cb
+        self.pending: Optional[int] = None
+        self.busy = False
+        self.cond = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+
+    def push(self, height: int) -> None:
+        with self.cond:
+            self.pending = height
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self.cond:
+                while self.pending is None:
+                    self.cond.wait()
+                height, self.pending = self.pending, None
+                self.busy = True
+            try:
+                self.cb(height)
+            except Exception:
+                pass
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
+
+    def wait_idle(self, timeout: Optional[float]) -> bool:
+        with self.cond:
+            return self.cond.wait_for(lambda: self.pending is None and not self.busy, timeout)
+
+
+class NodeStatusCache:
+    def __init__(self, iface, interval: Optional[float] = None, max_age: Optional[float] = None):
+        self.iface = iface
+        self.interval = interval if interval is not None else _interval()
+        self.max_age = max_age if max_age is not None else _max_age()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._full_at = 0.0
+        self._has_connectioncount: Optional[bool] = None
+        self._listeners: List[_Listener] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # the poller and request threads both refresh; one at a time
+        self._flight = threading.Lock()
+        self.last_error: Optional[str] = None
+
+    def add_block_listener(self, cb: Callable[[int], None]) -> None:
+        self._listeners.append(_Listener(cb))
+
+    def wait_listeners(self, timeout: Optional[float] = None) -> bool:
+        """Block until every listener has handled the latest height; False on timeout."""
+        return all(l.wait_idle(timeout) for l in list(self._listeners))
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def _peer_count(self) -> int:
+        if self._has_connectioncount is not False:
+            try:
+                n = self.iface._rpc('getconnectioncount', [])
+            except Exception as e:
+                # only a node without the method falls back for good; timeouts and
+                # warm-up errors fail this refresh and the next one asks again
+                if getattr(e, 'code', None) != -32601:
+                    raise
+                n = None
+            if isinstance(n, (int, Decimal)):
+                self._has_connectioncount = True
+                return int(n)
+            self._has_connectioncount = False
+        peers = self.iface._rpc('getpeerinfo', [])
+        return len(peers) if isinstance(peers, list) else 0
+
+    def _difficulty(self) -> int:
+        diff_val = self.iface._rpc('getdifficulty', [])
+        if not isinstance(diff_val, (int, float, Decimal)):
+            diff_val = 0
+        return int(diff_val)
+
+    def refresh(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        with self._flight:
+            return self._refresh(force)
+
+    def _refresh(self, force: bool) -> Optional[Dict[str, Any]]:
+        try:
+            height = int(self.iface._rpc('getblockcount', []))
+        except Exception as e:
+            self.last_error = str(e)
+            return self._snapshot
+        now = time.time()
+        prev = self._snapshot
+        moved = prev is None or prev['blockHeight'] != height
+        if force or moved or now - self._full_at >= self.max_age:
+            try:
+                snap = {'blockHeight': height, 'peerCount': self._peer_count(),
+                        'difficulty': self._difficulty(), 'updatedAt': now}
+                self._full_at = now
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                if prev is None:
+                    return None
+                snap = dict(prev, blockHeight=height, updatedAt=now)
+        else:
+            snap = dict(prev, updatedAt=now)
+        self._snapshot = snap
+        if moved and prev is not None:
+            for l in list(self._listeners):
+                l.push(height)
+        return snap
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        snap = self._snapshot
+        if snap is None:
+            return None
+        out = dict(snap)
+        out['stale'] = (time.time() - snap['updatedAt']) > self.interval * 3
+        return out
@@ -0,0 +1,220 @@
+import os
+import struct
+import threading
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+# In-process builder for unsigned ABCMint legacy transactions.
+# The output script template, tx version, sequence and locktime are learned from
+# the first transaction the node builds; the builder only switches on once its
+# own serialization of that transaction matches the node's byte for byte.
+
+B58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+_B58_INDEX = {c: i for i, c in enumerate(B58_ALPHABET)}
+DING = 100000000
+
+
+def b58decode(s: str) -> Optional[bytes]:
+    n = 0
+    for c in s:
+        if c not in _B58_INDEX:
+            return None
+        n = n * 58 + _B58_INDEX[c]
+    body = n.to_bytes((n.bit_length() + 7) // 8, 'big') if n else b''
+    pad = len(s) - len(s.lstrip('1'))
+    return b'\x00' * pad + body
+
+
+def varint(n: int) -> bytes:
+    if n < 0xfd:
+        return bytes([n])
+    if n <= 0xffff:
+        return b'\xfd' + struct.pack('<H', n)
+    if n <= 0xffffffff:
+        return b'\xfe' + struct.pack('<I', n)
+    return b'\xff' + struct.pack('<Q', n)
+
+
+def read_varint(b: bytes, pos: int) -> Tuple[int, int]:
+    first = b[pos]
+    if first < 0xfd:
+        return first, pos + 1
+    if first == 0xfd:
+        return struct.unpack_from('<H', b, pos + 1)[0], pos + 3
+    if first == 0xfe:
+        return struct.unpack_from('<I', b, pos + 1)[0], pos + 5
+    return struct.unpack_from('<Q', b, pos + 1)[0], pos + 9
+
+
+def serialize(version: int, vin: List[Tuple[str, int, bytes, int]], vout: List[Tuple[int, bytes]], locktime: int = 0) -> bytes:
+    out = [struct.pack('<i', version), varint(len(vin))]
+    for txid, n, script_sig, seq in vin:
+        out.append(bytes.fromhex(txid)[::-1] + struct.pack('<I', n) + varint(len(script_sig)) + script_sig + struct.pack('<I', seq))
+    out.append(varint(len(vout)))
+    for value, spk in vout:
+        out.append(struct.pack('<q', value) + varint(len(spk)) + spk)
+    out.append(struct.pack('<I', locktime))
+    return b''.join(out)
+
+
+def parse(b: bytes) -> Dict[str, Any]:
+    pos = 4
+    version = struct.unpack_from('<i', b, 0)[0]
+    nin, pos = read_varint(b, pos)
+    vin = []
+    for _ in range(nin):
+        txid = b[pos:pos + 32][::-1].hex()
+        n = struct.unpack_from('<I', b, pos + 32)[0]
+        ln, pos = read_varint(b, pos + 36)
+        script_sig = b[pos:pos + ln]
+        pos += ln
+        vin.append((txid, n, script_sig, struct.unpack_from('<I', b, pos)[0]))
+        pos += 4
+    nout, pos = read_varint(b, pos)
+    vout = []
+    for _ in range(nout):
+        value = struct.unpack_from('<q', b, pos)[0]
+        ln, pos = read_varint(b, pos + 8)
+        vout.append((value, b[pos:pos + ln]))
+        pos += ln
+    locktime = struct.unpack_from('<I', b, pos)[0]
+    if pos + 4 != len(b):
+        raise ValueError('trailing bytes')
+    return {'version': version, 'vin': vin, 'vout': vout, 'locktime': locktime}
+
+
+def to_ding(v: Any) -> int:
+    return int((Decimal(str(v)) * DING).quantize(Decimal('1')))
+
+
+# candidate (start, bytes cut from the tail) of a decoded address that may appear
+# in its output script: without version byte and 4-, 3- or no checksum bytes
+_PAYLOAD_CUTS = ((1, 4), (1, 3), (1, 0), (0, 4), (0, 0))
+
+
+class RawTxBuilder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = 'uncalibrated'  # -> 'ok' | 'disabled'
+        self.version = None
+        self.sequence = 0xffffffff
+        self.locktime = 0
+        self.template: Optional[Tuple[bytes, int, int, bytes, str]] = None
+        self.sig_bytes: Optional[int] = None
+        # (decoded length, version byte) of the addresses the node built scripts for
+        self.addr_shape: Optional[Tuple[int, int]] = None
+
+    def enabled(self) -> bool:
+        return (os.environ.get('ABCMINT_LOCAL_RAWTX') or 'true').lower() in ('1', 'true', 'yes')
+
+    def ready(self) -> bool:
+        return self.state == 'ok' and self.enabled()
+
+    def calibration(self) -> Optional[Dict[str, Any]]:
+        if self.template is None:
+            return None
+        prefix, start, tail, suffix, typ = self.template
+        return {'version': self.version, 'sequence': self.sequence, 'locktime': self.locktime,
+                'prefix': prefix.hex(), 'start': start, 'tail': tail, 'suffix': suffix.hex(), 'type': typ,
+                'sig_bytes': self.sig_bytes, 'addr_shape': list(self.addr_shape) if self.addr_shape else None}
+
+    def load(self, cal: Dict[str, Any]) -> None:
+        """Use a saved calibration (e.g. for offline dry runs) without asking a node."""
+        self.version = int(cal['version'])
+        self.sequence = int(cal.get('sequence', 0xffffffff))
+        self.locktime = int(cal.get('locktime', 0))
+        self.template = (bytes.fromhex(cal['prefix']), int(cal['start']), int(cal['tail']),
+                         bytes.fromhex(cal['suffix']), cal.get('type') or 'pubkeyhash')
+        self.sig_bytes = cal.get('sig_bytes')
+        shape = cal.get('addr_shape')
+        self.addr_shape = (int(shape[0]), int(shape[1])) if shape else None
+        self.state = 'ok'
+
+    def script_for(self, addr: str) -> bytes:
+        prefix, start, tail, suffix, _typ = self.template
+        d = b58decode(addr)
+        if d is None or len(d) <= start + tail:
+            raise ValueError('bad address')
+        if self.addr_shape is not None and (len(d), d[0]) != self.addr_shape:
+            raise ValueError('bad address: length or version differs from node-built outputs')
+        return prefix + d[start:len(d) - tail] + suffix
+
+    def build(self, inputs: List[Dict[str, Any]], outputs: Dict[str, Any]) -> str:
+        vin = [(i['txid'], int(i['vout']), b'', self.sequence) for i in inputs]
+        vout = [(to_ding(v), self.script_for(a)) for a, v in outputs.items()]
+        return serialize(self.version, vin, vout, self.locktime).hex()
+
+    def _learn_template(self, addr: str, spk: bytes, typ: str) -> Optional[Tuple[bytes, int, int, bytes, str]]:
+        d = b58decode(addr)
+        if not d:
+            return None
+        for start, tail in _PAYLOAD_CUTS:
+            payload = d[start:len(d) - tail]
+            i = spk.find(payload) if payload else -1
+            if i >= 0:
+                return spk[:i], start, tail, spk[i + len(payload):], typ
+        return None
+
+    def calibrate(self, inputs: List[Dict[str, Any]], outputs: Dict[str, Any], node_hex: str, decoded: Optional[dict]) -> bool:
+        """Learn the format from a node-built tx; enable only if a local rebuild is identical."""
+        with self.lock:
+            if self.state != 'uncalibrated':
+                return self.state == 'ok'
+            try:
+                tx = parse(bytes.fromhex(node_hex))
+                types = {}
+                for o in (decoded or {}).get('vout', []):
+                    spk_d = o.get('scriptPubKey') or {}
+                    types[int(o.get('n', 0))] = (spk_d.get('type') or '').lower()
+                tmpl = None
+                for n, addr in enumerate(outputs):
+                    t = self._learn_template(addr, tx['vout'][n][1], types.get(n, ''))
+                    if t is None or (tmpl is not None and t[:4] != tmpl[:4]):
+                        tmpl = None
+                        break
+                    tmpl = t
+                shapes = {(len(d), d[0]) for d in (b58decode(a) for a in outputs) if d}
+                if tmpl is None or not tx['vin'] or len(shapes) != 1:
+                    self.state = 'disabled'
+                    return False
+                self.addr_shape = shapes.pop()
+                self.template = tmpl
+                self.version = tx['version']
+                self.sequence = tx['vin'][0][3]
+                self.locktime = tx['locktime']
+                self.state = 'ok' if self.build(inputs, outputs) == node_hex.lower() else 'disabled'
+            except Exception:
+                self.state = 'disabled'
+            return self.state == 'ok'
+
+    def observe_signed(self, unsigned_hex: str, signed_hex: str, n_inputs: int) -> None:
+        # learn the scriptSig size so signed sizes can be estimated before signing
+        if n_inputs > 0:
+            extra = (len(signed_hex) - len(unsigned_hex)) // 2
+            self.sig_bytes = max(0, extra // n_inputs)
+
+    def signed_size(self, unsigned_hex: str, n_inputs: int) -> Optional[int]:
+        if self.sig_bytes is None:
+            return None
+        return len(unsigned_hex) // 2 + n_inputs * self.sig_bytes
+
+    def decode(self, signed_hex: str, outputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """decoderawtransaction-shaped view of a tx built here, so broadcast needs no decode RPC."""
+        if not self.ready():
+            return None
+        try:
+            raw = bytes.fromhex(signed_hex)
+            tx = parse(raw)
+            by_script = {self.script_for(a): a for a in outputs}
+        except Exception:
+            return None
+        typ = self.template[4] or 'pubkeyhash'
+        vout = []
+        for n, (value, spk) in enumerate(tx['vout']):
+            addr = by_script.get(spk)
+            if addr is None:
+                return None
+            vout.append({'value': Decimal(value) / DING, 'n': n,
+                         'scriptPubKey': {'hex': spk.hex(), 'type': typ, 'reqSigs': 1, 'addresses': [addr]}})
+        vin = [{'txid': t, 'vout': n, 'scriptSig': {'hex': s.hex()}, 'sequence': q} for t, n, s, q in tx['vin']]
+        return {'version': tx['version'], 'locktime': tx['locktime'], 'size': len(raw), 'vin': vin, 'vout': vout}
@@ -0,0 +1,196 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Rebroadcast manager.
+# Every signed transaction the service broadcasts is kept (SQLite, so a restart
+# still knows them) until it is REBROADCAST_FORGET_CONF deep. Each check compares
+# the unconfirmed ones against one getrawmempool: a transaction that is neither in
+# the mempool nor mined was evicted or dropped and is sent again, with exponential
+# backoff per transaction. Parents go before children (broadcast order). A node
+# answer that says the inputs are gone is a conflict: after a few of those the
+# transaction is parked and reported instead of retried.
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS txs (
+    txid TEXT PRIMARY KEY,
+    hex TEXT NOT NULL,
+    kind TEXT,
+    owner TEXT,
+    seq INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_try REAL NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    error TEXT
+)'''
+
+_KNOWN = ('already in block chain', 'already have transaction', 'txn-already-known', 'txn-already-in-mempool')
+_CONFLICT = ('missing inputs', 'conflict', 'inputs-spent', 'double spend', 'bad-txns-inputs-missingorspent')
+
+
+def _env(name: str, default: str) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except Exception:
+        return float(default)
+
+
+class RebroadcastManager:
+    def __init__(self, iface, confs, path: Optional[str] = None,
+                 send: Optional[Callable[[str, str], str]] = None):
+        self.iface = iface
+        self.confs = confs
+        # send(kind, hex) -> txid; defaults to a direct broadcast
+        self.send = send or (lambda _kind, hex_tx: self.iface.broadcast_raw_transaction(hex_tx))
+        self.interval = max(1.0, _env('REBROADCAST_INTERVAL_SEC', '30'))
+        self.backoff = max(1.0, _env('REBROADCAST_BACKOFF_SEC', '30'))
+        self.max_backoff = max(self.backoff, _env('REBROADCAST_MAX_BACKOFF_SEC', '1800'))
+        self.forget_conf = max(1, int(_env('REBROADCAST_FORGET_CONF', os.environ.get('REQUIRED_CONF', '6'))))
+        self.max_conflicts = max(1, int(_env('REBROADCAST_MAX_CONFLICTS', '3')))
+        self.on_conflict: Optional[Callable[[Optional[str], str, str], None]] = None
+        # on_buried(txid, hex) once a tx reaches forget_conf, just before it is dropped
+        self.on_buried: Optional[Callable[[str, str], None]] = None
+        # optional MempoolMonitor: its snapshot replaces our own getrawmempool
+        self.mempool = None
+        self.rebroadcasts = 0
+        self.checks = 0
+        self.last_error: Optional[str] = None
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path or ':memory:', check_same_thread=False, isolation_level=None)
+        self.db.executescript(_SCHEMA)
+        self._seq = self.db.execute('SELECT COALESCE(MAX(seq), 0) FROM txs').fetchone()[0]
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # a restart only knows these from disk: ask the node once where they stand
+        for (txid,) in self.db.execute("SELECT txid FROM txs WHERE state = 'pending'").fetchall():
+            self.confs.watch(txid, 'rebroadcast', seed=True)
+
+    def use_mempool(self, monitor) -> None:
+        self.mempool = monitor
+        with self.lock:
+            pending = self.db.execute("SELECT txid FROM txs WHERE state = 'pending'").fetchall()
+        for (txid,) in pending:
+            monitor.watch(txid)
+        monitor.subscribe(self.on_mempool)
+
+    def on_mempool(self, event: str, txid: str) -> None:
+        if event != 'evicted':
+            return
+        # first resend right away; later ones keep their backoff
+        with self.lock:
+            self.db.execute("UPDATE txs SET next_try = 0 WHERE txid = ? AND attempts = 0 AND state = 'pending'", (txid,))
+        self._wake.set()
+
+    def track(self, txid: str, hex_tx: str, kind: str = '', owner: Optional[str] = None) -> None:
+        with self.lock:
+            self._seq += 1
+            self.db.execute('INSERT OR IGNORE INTO txs (txid, hex, kind, owner, seq, next_try) VALUES (?, ?, ?, ?, ?, ?)',
+                            (txid, hex_tx, kind, owner, self._seq, time.time() + self.backoff))
+        self.confs.watch(txid, 'rebroadcast')
+        if self.mempool is not None:
+            self.mempool.watch(txid)
+
+    def _retry_at(self, attempts: int) -> float:
+        return time.time() + min(self.max_backoff, self.backoff * (2 ** max(0, attempts - 1)))
+
+    def check(self, mempool: Optional[set] = None) -> Dict[str, List[str]]:
+        """One pass: drop deep txs, resend evicted ones that are due. Returns what happened."""
+        self.checks += 1
+        with self.lock:
+            rows = self.db.execute("SELECT txid, hex, kind, owner, attempts, next_try FROM txs "
+                                   "WHERE state = 'pending' ORDER BY seq").fetchall()
+        out: Dict[str, List[str]] = {'resent': [], 'conflicts': [], 'dropped': []}
+        if not rows:
+            return out
+        if mempool is None and self.mempool is not None:
+            mempool = self.mempool.snapshot(self.mempool.interval)
+        if mempool is None:
+            mempool = set(self.iface._rpc('getrawmempool', []) or [])
+        now = time.time()
+        for txid, hex_tx, kind, owner, attempts, next_try in rows:
+            if txid not in self.confs.heights:
+                self.confs.watch(txid, 'rebroadcast', seed=True)
+            conf = self.confs.confirmations(txid)
+            if conf >= self.forget_conf:
+                if self.on_buried is not None:
+                    try:
+                        self.on_buried(txid, hex_tx)
+                    except Exception:
+                        pass
+                self._forget(txid)
+                out['dropped'].append(txid)
+                continue
+            if conf > 0 or txid in mempool or next_try > now:
+                continue
+            try:
+                self.send(kind, hex_tx)
+                err = None
+            except Exception as e:
+                err = getattr(e, 'message', None) or str(e)
+            low = (err or '').lower()
+            if err is None or any(k in low for k in _KNOWN):
+                if err is None:
+                    self.rebroadcasts += 1
+                out['resent'].append(txid)
+                self._update(txid, attempts + 1, 'pending', err)
+            elif any(k in low for k in _CONFLICT) and attempts + 1 >= self.max_conflicts:
+                self._update(txid, attempts + 1, 'conflict', err)
+                out['conflicts'].append(txid)
+                if self.on_conflict is not None:
+                    try:
+                        self.on_conflict(owner, txid, err)
+                    except Exception:
+                        pass
+            else:
+                self._update(txid, attempts + 1, 'pending', err)
+        return out
+
+    def _update(self, txid: str, attempts: int, state: str, error: Optional[str]) -> None:
+        with self.lock:
+            self.db.execute('UPDATE txs SET attempts = ?, next_try = ?, state = ?, error = ? WHERE txid = ?',
+                            (attempts, self._retry_at(attempts), state, error, txid))
+
+    def _forget(self, txid: str) -> None:
+        with self.lock:
+            self.db.execute('DELETE FROM txs WHERE txid = ?', (txid,))
+        if self.confs.owners.get(txid) == 'rebroadcast':
+            self.confs.forget(txid)
+        if self.mempool is not None:
+            self.mempool.unwatch(txid)
+
+    def conflicts(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.db.execute("SELECT txid, kind, owner, attempts, error FROM txs WHERE state = 'conflict' ORDER BY seq").fetchall()
+        return [{'txid': r[0], 'kind': r[1], 'jobId': r[2], 'attempts': r[3], 'error': r[4]} for r in rows]
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            # woken early by an eviction event
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.check()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            counts = dict(self.db.execute('SELECT state, COUNT(*) FROM txs GROUP BY state').fetchall())
+        return {'pending': counts.get('pending', 0), 'conflicts': counts.get('conflict', 0),
+                'rebroadcasts': self.rebroadcasts, 'checks': self.checks, 'last_error': self.last_error}
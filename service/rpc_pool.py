@@ -0,0 +1,262 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# Routes node RPCs across several endpoints by role:
+#   wallet    - wallet RPCs (addresses, signing, listunspent, gettransaction, ...)
+#   read      - chain queries (blocks, decode/create raw tx)
+#   broadcast - extra nodes that also receive every sendrawtransaction
+# Wallet-scoped methods never go to replicas, which do not have our wallet.
+# gettxout, getrawmempool and getrawtransaction stay on the wallet node too: a
+# replica a block or a relay behind would report outputs we just spent as unspent
+# and miss our own broadcasts in its mempool (getrawtransaction answers -5 there).
+# Every thread gets its own connection per endpoint (JsonRpc is not thread-safe).
+
+READ_METHODS = frozenset((
+    'getblockcount', 'getblockhash', 'getbestblockhash', 'getblock', 'getblockheader',
+    'getmempoolinfo', 'decoderawtransaction',
+    'createrawtransaction', 'getdifficulty', 'getpeerinfo', 'getconnectioncount',
+    'getrainbowproinfo', 'getmininginfo', 'getblockchaininfo', 'getnetworkinfo',
+))
+# wallet methods without side effects: safe to send again after a timeout
+WALLET_READ_METHODS = frozenset((
+    'gettxout', 'getrawmempool', 'getrawtransaction', 'getinfo', 'getbalance', 'getreceivedbyaddress', 'gettransaction',
+    'listunspent', 'listtransactions', 'listsinceblock', 'listaddressgroupings', 'validateaddress',
+    'signrawtransaction',
+))
+BROADCAST_METHODS = frozenset(('sendrawtransaction',))
+ROLES = ('wallet', 'read', 'broadcast')
+
+
+def _f(key: str, default: str) -> float:
+    try:
+        return float(os.environ.get(key, default))
+    except Exception:
+        return float(default)
+
+
+def parse_nodes(spec: str, user: str = '', password: str = '') -> List[Dict[str, Any]]:
+    """`[user:password@]host:port[#role+role]`, comma separated; no roles means all roles."""
+    out = []
+    for part in (p.strip() for p in spec.split(',')):
+        if not part:
+            continue
+        part, _, roles = part.partition('#')
+        u, pw = user, password
+        if '@' in part:
+            cred, part = part.rsplit('@', 1)
+            u, _, pw = cred.partition(':')
+        host, _, port = part.rpartition(':')
+        if not host or not port.isdigit():
+            raise ValueError('bad node spec: ' + part)
+        rs = tuple(r for r in roles.split('+') if r) if roles else ROLES
+        for r in rs:
+            if r not in ROLES:
+                raise ValueError('unknown node role: ' + r)
+        out.append({'name': '%s:%s' % (host, port), 'host': host, 'port': int(port), 'user': u,
+                    'password': pw, 'roles': rs})
+    return out
+
+
+def refused(ex: BaseException) -> bool:
+    """The request never reached the node (connection refused), so sending it again cannot repeat it."""
+    return isinstance(ex, ConnectionRefusedError) or 'connection refused' in str(ex).lower()
+
+
+def retryable(method: str, ex: BaseException) -> bool:
+    """Whether a failed call may be sent again (here or to another endpoint).
+
+    Node answers (RPC errors) are final. A timeout or reset on a method with side
+    effects (sendrawtransaction, sendtoaddress, ...) may already have taken effect,
+    so only a refused connection is retried for those."""
+    if getattr(ex, 'code', None) is not None:
+        return False
+    return method in READ_METHODS or method in WALLET_READ_METHODS or refused(ex)
+
+
+class Endpoint:
+    def __init__(self, name: str, roles, connect: Callable[[], Any]):
+        self.name = name
+        self.roles = frozenset(roles)
+        self.connect = connect
+        self.local = threading.local()
+        self.ewma = 0.0
+        self.fails = 0
+        self.down_until = 0.0
+        self.height: Optional[int] = None
+        self.calls = 0
+        self.errors = 0
+
+    def client(self):
+        c = getattr(self.local, 'client', None)
+        if c is None:
+            c = self.connect()
+            self.local.client = c
+        return c
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.down_until
+
+
+class RpcPool:
+    def __init__(self, nodes: List[Dict[str, Any]], factory: Callable[..., Any]):
+        if not nodes:
+            raise ValueError('no RPC endpoints')
+        self.endpoints: List[Endpoint] = []
+        for n in nodes:
+            self.endpoints.append(Endpoint(n['name'], n['roles'], self._connector(factory, n)))
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fanout: Optional[ThreadPoolExecutor] = None
+        self.rng = random.Random()
+
+    @staticmethod
+    def _connector(factory, n):
+        return lambda: factory(n['host'], n['port'], n['user'], n['password'])
+
+    @classmethod
+    def from_env(cls, factory: Callable[..., Any]) -> 'RpcPool':
+        user = os.environ.get('ABCMINT_RPC_USER', '')
+        password = os.environ.get('ABCMINT_RPC_PASSWORD', '')
+        spec = os.environ.get('ABCMINT_RPC_NODES', '').strip()
+        if not spec:
+            spec = '%s:%s' % (os.environ.get('ABCMINT_RPC_HOST', '127.0.0.1'), os.environ.get('ABCMINT_RPC_PORT', '8332'))
+        return cls(parse_nodes(spec, user, password), factory)
+
+    # -- selection ----------------------------------------------------------
+
+    def _role_for(self, method: str) -> str:
+        if method in READ_METHODS:
+            return 'read'
+        return 'wallet'
+
+    def _candidates(self, role: str) -> List[Endpoint]:
+        now = time.time()
+        eps = [e for e in self.endpoints if role in e.roles and e.healthy(now)]
+        if role == 'read':
+            eps = [e for e in eps if not self._lagging(e)]
+            if not eps:
+                eps = [e for e in self.endpoints if 'wallet' in e.roles and e.healthy(now)]
+        if not eps:
+            # everything for this role is backing off: try the one that recovers first
+            eps = sorted((e for e in self.endpoints if role in e.roles or role == 'read'), key=lambda e: e.down_until)[:1]
+        return eps
+
+    def _lagging(self, e: Endpoint) -> bool:
+        heights = [x.height for x in self.endpoints if x.height is not None]
+        if e.height is None or not heights:
+            return False
+        return e.height < max(heights) - int(_f('RPC_MAX_LAG_BLOCKS', '2'))
+
+    def _order(self, eps: List[Endpoint]) -> List[Endpoint]:
+        # power of two choices on latency; the rest follow as failover order
+        if len(eps) < 2:
+            return list(eps)
+        a, b = self.rng.sample(eps, 2)
+        first = a if a.ewma <= b.ewma else b
+        return [first] + sorted((e for e in eps if e is not first), key=lambda e: e.ewma)
+
+    # -- calls --------------------------------------------------------------
+
+    def _call_on(self, e: Endpoint, method: str, params) -> Any:
+        t0 = time.perf_counter()
+        try:
+            res = e.client().call(method, params)
+        except Exception as ex:
+            if getattr(ex, 'code', None) is not None:
+                # the node answered with an RPC error: it is healthy
+                self._record(e, time.perf_counter() - t0, ok=True)
+                raise
+            e.local.client = None
+            self._record(e, time.perf_counter() - t0, ok=False)
+            raise
+        self._record(e, time.perf_counter() - t0, ok=True)
+        return res
+
+    def _record(self, e: Endpoint, dt: float, ok: bool) -> None:
+        with self.lock:
+            e.calls += 1
+            if ok:
+                e.ewma = dt if e.ewma == 0.0 else 0.8 * e.ewma + 0.2 * dt
+                e.fails = 0
+                e.down_until = 0.0
+            else:
+                e.errors += 1
+                e.fails += 1
+                backoff = min(_f('RPC_NODE_MAX_BACKOFF_SEC', '300'), _f('RPC_NODE_BACKOFF_SEC', '5') * 2 ** (e.fails - 1))
+                e.down_until = time.time() + backoff
+
+    def call(self, method: str, params=None) -> Any:
+        params = params if params is not None else []
+        if method in BROADCAST_METHODS:
+            return self._broadcast(method, params)
+        last = None
+        for e in self._order(self._candidates(self._role_for(method))):
+            try:
+                return self._call_on(e, method, params)
+            except Exception as ex:
+                if not retryable(method, ex):
+                    raise
+                last = ex
+        raise last if last is not None else RuntimeError('no RPC endpoint available for ' + method)
+
+    def _broadcast(self, method: str, params) -> Any:
+        # the wallet node's answer is authoritative; broadcast-role nodes get a copy
+        extra = [e for e in self.endpoints if 'broadcast' in e.roles and 'wallet' not in e.roles
+                 and e.healthy(time.time())]
+        if extra:
+            if self._fanout is None:
+                with self.lock:
+                    if self._fanout is None:
+                        self._fanout = ThreadPoolExecutor(max_workers=max(2, len(extra)))
+            for e in extra:
+                self._fanout.submit(self._quiet_call, e, method, params)
+        last = None
+        for e in self._order(self._candidates('wallet')):
+            try:
+                return self._call_on(e, method, params)
+            except Exception as ex:
+                if not retryable(method, ex):
+                    raise
+                last = ex
+        raise last if last is not None else RuntimeError('no RPC endpoint available for ' + method)
+
+    def _quiet_call(self, e: Endpoint, method: str, params) -> None:
+        try:
+            self._call_on(e, method, params)
+        except Exception:
+            pass
+
+    # -- health -------------------------------------------------------------
+
+    def check(self) -> None:
+        """Probe every endpoint with getblockcount (recovers backed-off nodes, tracks lag)."""
+        for e in self.endpoints:
+            try:
+                e.height = int(self._call_on(e, 'getblockcount', []))
+            except Exception:
+                pass
+
+    def start(self) -> None:
+        if self._thread is not None or len(self.endpoints) < 2:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(_f('RPC_HEALTH_INTERVAL_SEC', '10'))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        return [{'name': e.name, 'roles': sorted(e.roles), 'healthy': e.healthy(now), 'lagging': self._lagging(e),
+                 'height': e.height, 'ewma_ms': round(e.ewma * 1000, 3), 'calls': e.calls, 'errors': e.errors}
+                for e in self.endpoints]
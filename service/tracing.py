@@ -0,0 +1,296 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+# Lightweight span tracing for mixing jobs.
+# Spans are plain dicts stored on job.spans (up to TRACE_MAX_SPANS in memory); the
+# saved job state keeps every phase span but only the newest TRACE_PERSIST_SPANS
+# nested ones, so a save does not re-serialize the whole trace of every job.
+# Phase spans follow job.status; nested spans (hops, broadcasts) are scoped with `span()`.
+
+TERMINAL_PHASES = ('completed', 'error')
+
+_local = threading.local()
+# Guards span mutation; MixingService._save_state holds it while serializing jobs.
+lock = threading.RLock()
+
+
+def _now() -> float:
+    return time.time()
+
+
+def _new_span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def _max_spans() -> int:
+    try:
+        return max(16, int(os.environ.get('TRACE_MAX_SPANS', '2000')))
+    except Exception:
+        return 2000
+
+
+def _persist_spans() -> int:
+    try:
+        return max(0, int(os.environ.get('TRACE_PERSIST_SPANS', '200')))
+    except Exception:
+        return 200
+
+
+def persisted(spans: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """The spans saved with a job: all phase spans and the newest nested ones. Caller holds `lock`."""
+    spans = spans or []
+    keep = _persist_spans()
+    nested = [i for i, s in enumerate(spans) if s.get('kind') != 'phase']
+    if len(nested) <= keep:
+        return list(spans)
+    drop = set(nested[:len(nested) - keep])
+    return [s for i, s in enumerate(spans) if i not in drop]
+
+
+def _stack() -> List[Dict[str, Any]]:
+    st = getattr(_local, 'stack', None)
+    if st is None:
+        st = []
+        _local.stack = st
+    return st
+
+
+def _append(job, span: Dict[str, Any]) -> None:
+    with lock:
+        _append_locked(job, span)
+
+
+def _append_locked(job, span: Dict[str, Any]) -> None:
+    spans = getattr(job, 'spans', None)
+    if spans is None:
+        spans = []
+        job.spans = spans
+    spans.append(span)
+    cap = _max_spans()
+    if len(spans) > cap:
+        # keep phase spans, drop the oldest nested spans first
+        nested = [i for i, s in enumerate(spans) if s.get('kind') != 'phase']
+        drop = set(nested[:len(spans) - cap])
+        job.spans = [s for i, s in enumerate(spans) if i not in drop]
+
+
+def _open_phase(job) -> Optional[Dict[str, Any]]:
+    for s in reversed(getattr(job, 'spans', None) or []):
+        if s.get('kind') == 'phase':
+            return s if s.get('end') is None else None
+    return None
+
+
+def _close(span: Dict[str, Any], status: str = 'ok', error: Optional[str] = None) -> None:
+    if span.get('end') is not None:
+        return
+    span['end'] = _now()
+    span['duration'] = round(span['end'] - span['start'], 6)
+    span['status'] = status
+    if error:
+        span['error'] = error
+
+
+def phase(job, name: str) -> None:
+    """Close the job's open phase span and start one for `name`."""
+    if not job:
+        return
+    with lock:
+        _phase_locked(job, name)
+
+
+def _phase_locked(job, name: str) -> None:
+    cur = _open_phase(job)
+    if cur is not None and cur.get('name') == name:
+        return
+    if cur is not None:
+        _close(cur, 'error' if name == 'error' else 'ok', getattr(job, 'error', None) if name == 'error' else None)
+    if name in TERMINAL_PHASES:
+        _append(job, {'span_id': _new_span_id(), 'parent_id': None, 'kind': 'phase', 'name': name,
+                      'start': _now(), 'end': _now(), 'duration': 0.0, 'rpc_calls': 0, 'status': 'ok', 'attrs': {}})
+        return
+    _append(job, {'span_id': _new_span_id(), 'parent_id': None, 'kind': 'phase', 'name': name,
+                  'start': _now(), 'end': None, 'duration': None, 'rpc_calls': 0, 'status': None, 'attrs': {}})
+
+
+@contextmanager
+def bind(job):
+    """Attribute RPC calls made by the current thread to `job`."""
+    prev = getattr(_local, 'job', None)
+    _local.job = job
+    try:
+        yield
+    finally:
+        _local.job = prev
+
+
+def carry():
+    """This thread's job and open spans, for work handed to another thread."""
+    return getattr(_local, 'job', None), list(_stack())
+
+
+@contextmanager
+def adopt(ctx):
+    """Run under a carry() context: RPCs and annotations count toward the submitter's spans."""
+    prev = getattr(_local, 'job', None), getattr(_local, 'stack', None)
+    _local.job, _local.stack = ctx[0], list(ctx[1])
+    try:
+        yield
+    finally:
+        _local.job, _local.stack = prev
+
+
+@contextmanager
+def span(job, name: str, **attrs):
+    st = _stack()
+    parent = st[-1] if st else _open_phase(job)
+    s = {'span_id': _new_span_id(), 'parent_id': parent.get('span_id') if parent else None,
+         'kind': 'span', 'name': name, 'start': _now(), 'end': None, 'duration': None,
+         'rpc_calls': 0, 'status': None, 'attrs': dict(attrs)}
+    st.append(s)
+    try:
+        yield s
+    except Exception as e:
+        _close(s, 'error', str(e))
+        raise
+    else:
+        _close(s)
+    finally:
+        if st and st[-1] is s:
+            st.pop()
+        if job is not None:
+            _append(job, s)
+
+
+def annotate(**attrs) -> None:
+    # add attributes to the innermost open span of this thread
+    st = _stack()
+    if st:
+        st[-1]['attrs'].update(attrs)
+
+
+def count_rpc(method: str) -> None:
+    for s in _stack():
+        s['rpc_calls'] = s.get('rpc_calls', 0) + 1
+    job = getattr(_local, 'job', None)
+    if job is None:
+        return
+    with lock:
+        cur = _open_phase(job)
+        if cur is not None:
+            cur['rpc_calls'] = cur.get('rpc_calls', 0) + 1
+            methods = cur['attrs'].setdefault('rpc_methods', {})
+            methods[method] = methods.get(method, 0) + 1
+
+
+def timeline(job) -> Dict[str, Any]:
+    with lock:
+        spans = [dict(s) for s in getattr(job, 'spans', None) or []]
+    now = _now()
+    phases = []
+    for s in spans:
+        if s.get('kind') != 'phase':
+            continue
+        end = s.get('end')
+        phases.append({
+            'name': s['name'],
+            'start': s['start'],
+            'end': end,
+            'duration': s.get('duration') if end is not None else round(now - s['start'], 6),
+            'open': end is None,
+            'rpcCalls': s.get('rpc_calls', 0),
+            'rpcMethods': (s.get('attrs') or {}).get('rpc_methods', {}),
+        })
+    totals: Dict[str, Dict[str, Any]] = {}
+    for p in phases:
+        t = totals.setdefault(p['name'], {'duration': 0.0, 'rpcCalls': 0, 'count': 0})
+        t['duration'] = round(t['duration'] + (p['duration'] or 0.0), 6)
+        t['rpcCalls'] += p['rpcCalls']
+        t['count'] += 1
+    broadcasts = [{
+        'name': s['name'],
+        'duration': s.get('duration'),
+        'rpcCalls': s.get('rpc_calls', 0),
+        'status': s.get('status'),
+        **(s.get('attrs') or {}),
+    } for s in spans if s.get('kind') == 'span' and s.get('name') == 'broadcast']
+    hops = [s for s in spans if s.get('kind') == 'span' and s.get('name') == 'hop']
+    return {
+        'jobId': job.job_id,
+        'status': job.status,
+        'tier': {'shards': job.shard_count, 'hops': job.hop_count},
+        'phases': phases,
+        'phaseTotals': totals,
+        'hopCount': len(hops),
+        'hopDurationTotal': round(sum(h.get('duration') or 0.0 for h in hops), 6),
+        'broadcasts': broadcasts,
+        'rpcCallsTotal': sum(p['rpcCalls'] for p in phases),
+        'spanCount': len(spans),
+    }
+
+
+def to_jsonl(job) -> str:
+    lines = []
+    with lock:
+        spans = list(getattr(job, 'spans', None) or [])
+    for s in spans:
+        rec = dict(s)
+        rec['job_id'] = job.job_id
+        lines.append(json.dumps(rec, ensure_ascii=False, default=str))
+    return '\n'.join(lines) + ('\n' if lines else '')
+
+
+def _otlp_value(v: Any) -> Dict[str, Any]:
+    if isinstance(v, bool):
+        return {'boolValue': v}
+    if isinstance(v, int):
+        return {'intValue': str(v)}
+    if isinstance(v, float):
+        return {'doubleValue': v}
+    if isinstance(v, (dict, list)):
+        return {'stringValue': json.dumps(v, default=str)}
+    return {'stringValue': str(v)}
+
+
+def _otlp_attrs(d: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'key': k, 'value': _otlp_value(v)} for k, v in d.items() if v is not None]
+
+
+def to_otlp(jobs: Iterable[Any], service_name: str = 'abcmint-mixing') -> Dict[str, Any]:
+    """OTLP/JSON (ExportTraceServiceRequest) with one trace per job."""
+    out_spans = []
+    for job in jobs:
+        try:
+            trace_id = uuid.UUID(job.job_id).hex
+        except Exception:
+            trace_id = uuid.uuid5(uuid.NAMESPACE_OID, str(job.job_id)).hex
+        with lock:
+            spans = list(getattr(job, 'spans', None) or [])
+        for s in spans:
+            end = s.get('end') if s.get('end') is not None else _now()
+            attrs = {'job.id': job.job_id, 'job.shards': job.shard_count, 'job.hops': job.hop_count,
+                     'span.kind': s.get('kind'), 'rpc.calls': int(s.get('rpc_calls', 0))}
+            attrs.update(s.get('attrs') or {})
+            item = {
+                'traceId': trace_id,
+                'spanId': s['span_id'],
+                'name': s['name'],
+                'kind': 1,
+                'startTimeUnixNano': str(int(s['start'] * 1e9)),
+                'endTimeUnixNano': str(int(end * 1e9)),
+                'attributes': _otlp_attrs(attrs),
+                'status': {'code': 2, 'message': s.get('error', '')} if s.get('status') == 'error' else {'code': 1 if s.get('status') == 'ok' else 0},
+            }
+            if s.get('parent_id'):
+                item['parentSpanId'] = s['parent_id']
+            out_spans.append(item)
+    return {'resourceSpans': [{
+        'resource': {'attributes': _otlp_attrs({'service.name': service_name})},
+        'scopeSpans': [{'scope': {'name': 'service.tracing'}, 'spans': out_spans}],
+    }]}
+
@@ -0,0 +1,192 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+# Confirmed-transaction cache (attached as iface.tx_cache).
+# gettransaction / getrawtransaction answers for transactions at least
+# TX_CACHE_MIN_CONF deep no longer change, apart from the confirmation count,
+# which is derived from the inclusion height and the current tip. Two tiers: an
+# in-memory LRU of TX_CACHE_SIZE records, and one JSON file per txid on disk
+# (content-addressed: the txid is the hash of what it stores), so restarts and
+# other workers sharing the data directory start warm. Files are checked against
+# their txid and block hash when read back; anything that does not match is a miss.
+# The tip comes from the node-status poller (attached as .status) while it is fresh,
+# so a cold miss costs only the transaction RPC.
+
+_KINDS = ('wallet', 'raw')
+_HEX = frozenset('0123456789abcdef')
+
+
+def _is_hash(v: Any) -> bool:
+    return isinstance(v, str) and len(v) == 64 and all(c in _HEX for c in v)
+
+
+def _env_int(name: str, default: str) -> int:
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except Exception:
+        return int(default)
+
+
+def _to_json(v: Any) -> Any:
+    # amounts come back from the node as Decimal; keep them exact on disk
+    if isinstance(v, Decimal):
+        return {'$d': str(v)}
+    if isinstance(v, dict):
+        return {k: _to_json(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_to_json(x) for x in v]
+    return v
+
+
+def _from_json(d: Dict[str, Any]) -> Any:
+    return Decimal(d['$d']) if len(d) == 1 and '$d' in d else d
+
+
+class TxCache:
+    def __init__(self, root: Optional[str] = None, min_conf: Optional[int] = None, size: Optional[int] = None):
+        self.root = root
+        self.min_conf = min_conf or _env_int('TX_CACHE_MIN_CONF', os.environ.get('REQUIRED_CONF', '6'))
+        self.size = size or _env_int('TX_CACHE_SIZE', '2048')
+        self.mem: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.tip: Optional[int] = None
+        # NodeStatusCache; its snapshot seeds and refreshes the tip between blocks
+        self.status = None
+        self.lock = threading.Lock()
+        self.hits_mem = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.stored = 0
+        if root and not os.path.exists(root):
+            os.makedirs(root)
+
+    def on_block(self, height: int) -> None:
+        self.tip = int(height)
+
+    def known_tip(self) -> Optional[int]:
+        """The node height as polled by node_status, None when that snapshot is stale or missing."""
+        snap = self.status.snapshot() if self.status is not None else None
+        if not snap or snap.get('stale') or snap.get('blockHeight') is None:
+            return None
+        self.tip = int(snap['blockHeight'])
+        return self.tip
+
+    def _path(self, txid: str) -> Optional[str]:
+        if not self.root or not _is_hash(txid):
+            return None
+        return os.path.join(self.root, txid[:2], txid + '.json')
+
+    @staticmethod
+    def _intact(txid: str, rec: Any) -> bool:
+        # a file read back must describe this txid, in one block, with a raw body that hashes to it
+        if not isinstance(rec, dict) or rec.get('txid') != txid or not isinstance(rec.get('height'), int):
+            return False
+        blocks = set()
+        for kind in _KINDS:
+            body = rec.get(kind)
+            if body is None:
+                continue
+            if not isinstance(body, dict) or body.get('txid', txid) != txid or not _is_hash(body.get('blockhash')):
+                return False
+            blocks.add(body['blockhash'])
+        if len(blocks) != 1:
+            return False
+        if rec.get('hex'):
+            try:
+                raw = bytes.fromhex(rec['hex'])
+            except Exception:
+                return False
+            if hashlib.sha256(hashlib.sha256(raw).digest()).digest()[::-1].hex() != txid:
+                return False
+        return True
+
+    def _record(self, txid: str) -> Optional[Dict[str, Any]]:
+        # caller holds the lock; a disk hit is promoted to memory
+        rec = self.mem.get(txid)
+        if rec is not None:
+            self.mem.move_to_end(txid)
+            return rec
+        path = self._path(txid)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                rec = json.load(f, object_hook=_from_json)
+        except Exception:
+            return None
+        if not self._intact(txid, rec):
+            return None
+        self._keep(txid, rec)
+        return rec
+
+    def _keep(self, txid: str, rec: Dict[str, Any]) -> None:
+        self.mem[txid] = rec
+        self.mem.move_to_end(txid)
+        while len(self.mem) > self.size:
+            self.mem.popitem(last=False)
+
+    def get(self, kind: str, txid: str) -> Optional[Dict[str, Any]]:
+        """Cached answer for `kind` ('wallet' = gettransaction, 'raw' = verbose getrawtransaction)."""
+        tip = self.tip if self.tip is not None else self.known_tip()
+        with self.lock:
+            in_mem = txid in self.mem
+            rec = self._record(txid) if tip is not None else None
+            if rec is None or rec.get(kind) is None:
+                self.misses += 1
+                return None
+            if in_mem:
+                self.hits_mem += 1
+            else:
+                self.hits_disk += 1
+            out = dict(rec[kind])
+        out['confirmations'] = max(0, tip - rec['height'] + 1)
+        return out
+
+    def deep_enough(self, result: Dict[str, Any]) -> bool:
+        try:
+            return int(result.get('confirmations', 0)) >= self.min_conf
+        except Exception:
+            return False
+
+    def put(self, kind: str, txid: str, result: Dict[str, Any], tip: Optional[int] = None) -> bool:
+        """Keep `result` if it is buried deep enough; `tip` is the node height read after it."""
+        if tip is not None:
+            self.tip = max(self.tip or 0, int(tip))
+        tip = self.tip if tip is None else int(tip)
+        if kind not in _KINDS or tip is None or not self.deep_enough(result) or not _is_hash(result.get('blockhash')):
+            return False
+        conf = int(result['confirmations'])
+        body = {k: v for k, v in result.items() if k != 'confirmations'}
+        with self.lock:
+            rec = self._record(txid) or {'txid': txid}
+            rec['height'] = tip - conf + 1
+            rec[kind] = body
+            if body.get('hex'):
+                rec['hex'] = body['hex']
+            self._keep(txid, rec)
+            self.stored += 1
+            path = self._path(txid)
+            text = json.dumps(_to_json(rec))
+        if path is not None:
+            try:
+                d = os.path.dirname(path)
+                if not os.path.exists(d):
+                    os.makedirs(d)
+                tmp = path + '.%d.tmp' % threading.get_ident()
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(tmp, path)
+            except Exception:
+                pass
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits_mem + self.hits_disk + self.misses
+            return {'memory': len(self.mem), 'size': self.size, 'stored': self.stored, 'min_conf': self.min_conf,
+                    'hits_memory': self.hits_mem, 'hits_disk': self.hits_disk, 'misses': self.misses,
+                    'hit_ratio': round((self.hits_mem + self.hits_disk) / lookups, 4) if lookups else 0.0}
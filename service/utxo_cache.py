@@ -0,0 +1,133 @@
+import os
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+# Outpoint caches behind query_utxo_set (attached as iface.utxo_cache).
+# Spent: outpoints whose spending transaction is buried (REBROADCAST_FORGET_CONF
+# deep) never come back, so they are kept for good in SQLite. An in-memory Bloom
+# filter sits in front: a miss (the usual case) costs no database lookup, a hit is
+# confirmed against the table, so a false positive only costs that lookup.
+# Unspent: gettxout answers with at least one confirmation, kept until the next
+# block or until we spend the outpoint ourselves, and only served to lookups made
+# with the same include_mempool mode (a chain-only answer says nothing about
+# mempool spends). Spends by other wallets that are still in the mempool are not
+# seen before the next block.
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS spent (
+    outpoint TEXT PRIMARY KEY
+)'''
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, str(default))))
+    except Exception:
+        return default
+
+
+class BloomFilter:
+    def __init__(self, bits: int, hashes: int = 7):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray((bits + 7) // 8)
+
+    def _positions(self, key: str):
+        d = hashlib.sha256(key.encode()).digest()
+        # double hashing: h1 + i*h2 covers k positions from one digest
+        h1 = int.from_bytes(d[:8], 'little')
+        h2 = int.from_bytes(d[8:16], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for p in self._positions(key):
+            self.data[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.data[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class UtxoCache:
+    def __init__(self, path: Optional[str] = None, bloom_bits: Optional[int] = None,
+                 unspent_size: Optional[int] = None):
+        self.bloom = BloomFilter(bloom_bits or _env_int('UTXO_SPENT_BLOOM_BITS', 1 << 21))
+        self.unspent_size = unspent_size or _env_int('UTXO_UNSPENT_CACHE_SIZE', 10000)
+        # outpoint -> (include_mempool, item)
+        self.unspent: 'OrderedDict[str, Tuple[bool, Dict[str, Any]]]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path or ':memory:', check_same_thread=False, isolation_level=None)
+        self.db.executescript(_SCHEMA)
+        self.spent_count = 0
+        for (key,) in self.db.execute('SELECT outpoint FROM spent'):
+            self.bloom.add(key)
+            self.spent_count += 1
+        self.hits_spent = 0
+        self.hits_unspent = 0
+        self.misses = 0
+        self.bloom_false_positives = 0
+
+    @staticmethod
+    def _key(txid: str, n: int) -> str:
+        return '%s:%d' % (txid, n)
+
+    def lookup(self, txid: str, n: int, include_mempool: bool = True) -> Union[None, bool, Dict[str, Any]]:
+        """False if known spent, the cached gettxout item if known unspent, None if unknown."""
+        key = self._key(txid, n)
+        with self.lock:
+            if key in self.bloom:
+                if self.db.execute('SELECT 1 FROM spent WHERE outpoint = ?', (key,)).fetchone():
+                    self.hits_spent += 1
+                    return False
+                self.bloom_false_positives += 1
+            entry = self.unspent.get(key)
+            if entry is not None and entry[0] == bool(include_mempool):
+                self.unspent.move_to_end(key)
+                self.hits_unspent += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def remember(self, txid: str, n: int, item: Dict[str, Any], include_mempool: bool = True) -> None:
+        """Keep a gettxout answer, with the mode it was asked in; only confirmed outputs are worth keeping."""
+        if int(item.get('confirms', 0)) <= 0:
+            return
+        key = self._key(txid, n)
+        with self.lock:
+            self.unspent[key] = (bool(include_mempool), item)
+            self.unspent.move_to_end(key)
+            while len(self.unspent) > self.unspent_size:
+                self.unspent.popitem(last=False)
+
+    def spending(self, outpoints: Iterable[Tuple[str, int]]) -> None:
+        """We just broadcast a spend of these: they are no longer unspent."""
+        with self.lock:
+            for txid, n in outpoints:
+                self.unspent.pop(self._key(txid, n), None)
+
+    def add_spent(self, outpoints: Iterable[Tuple[str, int]]) -> None:
+        """Their spend is buried: remember them as spent for good."""
+        keys = [self._key(txid, n) for txid, n in outpoints]
+        with self.lock:
+            for key in keys:
+                self.unspent.pop(key, None)
+                if key in self.bloom and self.db.execute('SELECT 1 FROM spent WHERE outpoint = ?', (key,)).fetchone():
+                    continue
+                self.db.execute('INSERT OR IGNORE INTO spent (outpoint) VALUES (?)', (key,))
+                self.bloom.add(key)
+                self.spent_count += 1
+
+    def on_block(self, _height: int) -> None:
+        # anything may have been spent in the new block
+        with self.lock:
+            self.unspent.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits_spent + self.hits_unspent + self.misses
+            return {'spent': self.spent_count, 'unspent': len(self.unspent), 'hits_spent': self.hits_spent,
+                    'hits_unspent': self.hits_unspent, 'misses': self.misses,
+                    'bloom_false_positives': self.bloom_false_positives,
+                    'hit_ratio': round((self.hits_spent + self.hits_unspent) / lookups, 4) if lookups else 0.0}
@@ -0,0 +1,315 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+# Wallet change feed.
+# Follows the wallet with listsinceblock from a persisted cursor and keeps a local
+# index of wallet transactions (txid -> entries, address -> txids) in SQLite; each
+# refresh writes only the records that changed. Records keep the block height, so
+# confirmations are derived from the tip at the last refresh. Transactions within
+# target_confirmations of the tip are reported again on every call, which is what
+# catches confirmations and reorgs; only those stay in memory, older ones are read
+# back from the table. Subscribers get ('new' | 'updated', txid, record) when a
+# transaction appears or its block changes.
+
+_ENTRY_KEYS = ('address', 'category', 'amount', 'vout')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS txs (
+    txid TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    height INTEGER,
+    blockhash TEXT,
+    time INTEGER,
+    entries TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS txs_seq ON txs (seq);
+CREATE TABLE IF NOT EXISTS addresses (
+    address TEXT NOT NULL,
+    txid TEXT NOT NULL,
+    PRIMARY KEY (address, txid)
+)'''
+
+
+def _interval() -> float:
+    try:
+        return max(0.5, float(os.environ.get('WALLET_FEED_INTERVAL_SEC', '10')))
+    except Exception:
+        return 10.0
+
+
+def _depth() -> int:
+    try:
+        return max(1, int(os.environ.get('WALLET_FEED_DEPTH', os.environ.get('REQUIRED_CONF', '6'))))
+    except Exception:
+        return 6
+
+
+class WalletFeed:
+    def __init__(self, iface, path: Optional[str] = None, interval: Optional[float] = None, depth: Optional[int] = None):
+        self.iface = iface
+        self.path = path
+        self.interval = interval if interval is not None else _interval()
+        self.depth = depth if depth is not None else _depth()
+        self.cursor = ''
+        self.seq = 0
+        self.height = 0
+        # records still inside the confirmation window; the rest live in the table
+        self.txs: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.RLock()
+        # one listsinceblock at a time: concurrent sync() callers wait for it
+        self._flight = threading.Lock()
+        self.synced_at = 0.0
+        # None until the first call: old nodes may lack listsinceblock
+        self.supported: Optional[bool] = None
+        self.last_error: Optional[str] = None
+        self._subscribers: List[Callable[[str, str, Dict[str, Any]], None]] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.db = sqlite3.connect(path or ':memory:', check_same_thread=False, isolation_level=None)
+        self.db.executescript(_SCHEMA)
+        self._load()
+
+    # -- checkpoint ----------------------------------------------------------
+
+    def _load(self) -> None:
+        with self.lock:
+            meta = dict(self.db.execute('SELECT key, value FROM meta'))
+            self.cursor = meta.get('cursor') or ''
+            self.seq = int(meta.get('seq', 0))
+            self.height = int(meta.get('height', 0))
+            rows = self.db.execute('SELECT txid, seq, height, blockhash, time, entries FROM txs '
+                                   'WHERE height IS NULL OR height > ?', (self.height - self.depth,))
+            for row in rows:
+                self.txs[row[0]] = self._rec(row)
+
+    @staticmethod
+    def _rec(row: tuple) -> Dict[str, Any]:
+        return {'seq': row[1], 'height': row[2], 'blockhash': row[3], 'time': row[4], 'entries': json.loads(row[5])}
+
+    def _stored(self, txid: str) -> Optional[Dict[str, Any]]:
+        # caller holds the lock
+        row = self.db.execute('SELECT txid, seq, height, blockhash, time, entries FROM txs WHERE txid = ?',
+                              (txid,)).fetchone()
+        return self._rec(row) if row else None
+
+    def _save(self, changed: Dict[str, Dict[str, Any]]) -> None:
+        # caller holds the lock; writes the changed records and the cursor in one transaction
+        self.db.execute('BEGIN')
+        try:
+            for txid, rec in changed.items():
+                self.db.execute('INSERT OR REPLACE INTO txs (txid, seq, height, blockhash, time, entries) '
+                                'VALUES (?, ?, ?, ?, ?, ?)',
+                                (txid, rec['seq'], rec['height'], rec['blockhash'], rec['time'],
+                                 json.dumps(rec['entries'], ensure_ascii=False)))
+                # entries may have changed: drop the old address mappings with them
+                self.db.execute('DELETE FROM addresses WHERE txid = ?', (txid,))
+                self.db.executemany('INSERT OR IGNORE INTO addresses (address, txid) VALUES (?, ?)',
+                                    [(e.get('address') or '', txid) for e in rec['entries']])
+            self.db.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                                [('cursor', self.cursor), ('seq', str(self.seq)), ('height', str(self.height))])
+            self.db.execute('COMMIT')
+        except Exception:
+            self.db.execute('ROLLBACK')
+            raise
+
+    def _prune(self) -> None:
+        # caller holds the lock; buried records are no longer reported by listsinceblock
+        floor = self.height - self.depth
+        for txid in [t for t, rec in self.txs.items() if rec['height'] is not None and rec['height'] <= floor]:
+            del self.txs[txid]
+
+    # -- index ---------------------------------------------------------------
+
+    def _apply(self, rows: List[dict], height: int) -> tuple:
+        grouped: Dict[str, List[dict]] = {}
+        for r in rows:
+            if r.get('txid'):
+                grouped.setdefault(r['txid'], []).append(r)
+        events = []
+        changed: Dict[str, Dict[str, Any]] = {}
+        with self.lock:
+            for txid, group in grouped.items():
+                head = group[0]
+                entries = []
+                for r in group:
+                    e = {k: r.get(k) for k in _ENTRY_KEYS}
+                    e['amount'] = str(Decimal(str(r.get('amount', 0))))
+                    if e not in entries:
+                        entries.append(e)
+                old = self.txs.get(txid) or self._stored(txid)
+                confs = int(head.get('confirmations', 0) or 0)
+                rec = {'seq': old['seq'] if old else self.seq + 1,
+                       'height': height - confs + 1 if confs > 0 else None,
+                       'blockhash': head.get('blockhash'), 'time': head.get('time'), 'entries': entries}
+                self.txs[txid] = rec
+                if old is None:
+                    self.seq += 1
+                    changed[txid] = rec
+                    events.append(('new', txid, rec))
+                elif old != rec:
+                    changed[txid] = rec
+                    events.append(('updated', txid, rec))
+        return events, changed
+
+    # -- polling -------------------------------------------------------------
+
+    def subscribe(self, cb: Callable[[str, str, Dict[str, Any]], None]) -> None:
+        self._subscribers.append(cb)
+
+    def refresh(self) -> bool:
+        """One listsinceblock from the cursor; publishes changes. False if the node cannot serve it."""
+        with self._flight:
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        if self.supported is False:
+            return False
+        with self.lock:
+            cursor = self.cursor
+        try:
+            res = self.iface._rpc('listsinceblock', [cursor, self.depth])
+        except Exception as e:
+            code = getattr(e, 'code', None)
+            if code == -32601:
+                self.supported = False
+                return False
+            if code is not None and cursor:
+                # cursor block unknown (reorged away or a different chain): rebuild from scratch
+                with self.lock:
+                    self.cursor = ''
+                return self._refresh()
+            self.last_error = str(e)
+            raise
+        if not isinstance(res, dict):
+            return False
+        # read after listsinceblock: a block in between can only understate confirmations
+        height = int(self.iface._rpc('getblockcount', []))
+        events, changed = self._apply(res.get('transactions') or [], height)
+        with self.lock:
+            grew = height > self.height
+            self.height = max(self.height, height)
+            moved = res.get('lastblock') and res.get('lastblock') != self.cursor
+            if moved:
+                self.cursor = res['lastblock']
+            if changed or moved or grew:
+                self._save(changed)
+            self._prune()
+            self.synced_at = time.time()
+        self.supported = True
+        self.last_error = None
+        for ev in events:
+            for cb in list(self._subscribers):
+                try:
+                    cb(*ev)
+                except Exception:
+                    pass
+        return True
+
+    def sync(self, max_age: Optional[float] = None) -> bool:
+        """Refresh unless the index is younger than max_age; True when the index can be used."""
+        age = max_age if max_age is not None else float(os.environ.get('WALLET_FEED_MAX_AGE_SEC', '5'))
+        if self.supported and time.time() - self.synced_at <= age:
+            return True
+        with self._flight:
+            # a refresh that finished while we waited serves this caller too
+            if self.supported and time.time() - self.synced_at <= age:
+                return True
+            try:
+                return self._refresh()
+            except Exception:
+                # a stale index is still better than nothing once it has synced
+                return bool(self.supported)
+
+    def notify(self, *_args) -> None:
+        """Wake the polling thread (new block, walletnotify)."""
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.refresh()
+            except Exception:
+                pass
+            if self.supported is False:
+                return
+            self._wake.wait(self.interval)
+
+    # -- queries -------------------------------------------------------------
+
+    def get(self, txid: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.txs.get(txid) or self._stored(txid)
+
+    def confirmations(self, txid: str) -> int:
+        return self._confs(self.get(txid))
+
+    def _confs(self, rec: Optional[Dict[str, Any]]) -> int:
+        if not rec or rec.get('height') is None:
+            return 0
+        return max(0, self.height - rec['height'] + 1)
+
+    def txids_for(self, address: str, categories: Optional[tuple] = None) -> List[str]:
+        """Wallet txids touching `address`, oldest first."""
+        with self.lock:
+            rows = self.db.execute('SELECT t.txid, t.entries FROM addresses a JOIN txs t ON t.txid = a.txid '
+                                   'WHERE a.address = ? ORDER BY t.seq', (address,)).fetchall()
+        if categories is None:
+            return [txid for txid, _ in rows]
+        return [txid for txid, entries in rows
+                if any(e.get('address') == address and e.get('category') in categories for e in json.loads(entries))]
+
+    def entries(self, count: Optional[int] = None, skip: int = 0, address: Optional[str] = None) -> List[dict]:
+        """listtransactions-shaped rows, oldest first: the last `count` after skipping `skip` newest."""
+        want = None if count is None else max(0, int(count)) + max(0, int(skip))
+        rows: List[dict] = []
+        with self.lock:
+            if address is None:
+                cur = self.db.execute('SELECT txid, seq, height, blockhash, time, entries FROM txs ORDER BY seq DESC')
+            else:
+                cur = self.db.execute('SELECT t.txid, t.seq, t.height, t.blockhash, t.time, t.entries FROM addresses a '
+                                      'JOIN txs t ON t.txid = a.txid WHERE a.address = ? ORDER BY t.seq DESC', (address,))
+            # newest first, reading only as far back as the page needs
+            for row in cur:
+                txid, rec = row[0], self._rec(row)
+                for e in reversed(rec['entries']):
+                    if address is not None and e.get('address') != address:
+                        continue
+                    out = dict(e)
+                    out.update({'txid': txid, 'confirmations': self._confs(rec), 'time': rec['time'],
+                                'amount': Decimal(e['amount'])})
+                    if rec.get('blockhash'):
+                        out['blockhash'] = rec['blockhash']
+                    rows.append(out)
+                if want is not None and len(rows) >= want:
+                    break
+        rows.reverse()
+        end = len(rows) - max(0, int(skip))
+        start = 0 if count is None else max(0, end - int(count))
+        return rows[start:max(0, end)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stored = self.db.execute('SELECT COUNT(*) FROM txs').fetchone()[0]
+        return {'supported': self.supported, 'cursor': self.cursor, 'txs': stored, 'in_memory': len(self.txs),
+                'synced_at': self.synced_at, 'last_error': self.last_error}
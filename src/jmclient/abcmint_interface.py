@@ -1,6 +1,13 @@
 from decimal import Decimal
 from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Set, Tuple, Union
 import os
+import sys
+import time
+import hashlib
+import importlib.util
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
 
 import binascii
 import re
@@ -17,21 +24,307 @@ log = get_log()
 DEFAULT_ADDR_CFG = 274
 RAINBOWFORKHEIGHT = 267120
 
+
+def _load_rawtx():
+    # one codec for the wire format and base58: the service's raw-transaction module
+    # (reused when the service loaded it; CPU pool workers load it by path)
+    mod = sys.modules.get('service.rawtx')
+    if mod is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'service', 'rawtx.py')
+        spec = importlib.util.spec_from_file_location('service.rawtx', os.path.abspath(path))
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules['service.rawtx'] = mod
+        spec.loader.exec_module(mod)
+    return mod
+
+
+rawtx = _load_rawtx()
+
+
+# CPU-bound transaction work. These functions take and return plain data so they
+# can run in a process pool (ABCMINT_CPU_WORKERS) and keep hex conversion and
+# parsing of large Rainbow-signature transactions off the request and monitor
+# threads; with the pool off they run inline.
+
+def _script_type(spk: bytes) -> Tuple[Optional[str], int]:
+    n = len(spk)
+    if n > 5 and spk[0] == 0x76 and spk[1] == 0xa9 and spk[-2] == 0x88 and spk[-1] == 0xac:
+        return 'pubkeyhash', 1
+    if n == 23 and spk[0] == 0xa9 and spk[1] == 0x14 and spk[-1] == 0x87:
+        return 'scripthash', 1
+    if n == 22 and spk[0] == 0x00 and spk[1] == 0x14:
+        return 'witness_v0_keyhash', 1
+    if n == 34 and spk[0] == 0x00 and spk[1] == 0x20:
+        return 'witness_v0_scripthash', 1
+    if n > 3 and spk[-1] == 0xae and 0x51 <= spk[0] <= 0x60:
+        return 'multisig', spk[0] - 0x50
+    if n and spk[0] == 0x6a:
+        return 'nulldata', 0
+    # unknown to us, not necessarily nonstandard for the node
+    return None, 0
+
+
+def decode_tx_local(hex_tx: str) -> Optional[dict]:
+    """decoderawtransaction-shaped view (no addresses or scriptSigs) of a legacy tx."""
+    try:
+        b = bytes.fromhex(hex_tx)
+        tx = rawtx.parse(b)
+    except Exception:
+        return None
+    vin = [{'txid': txid, 'vout': n, 'sequence': seq} for txid, n, _sig, seq in tx['vin']]
+    vout = []
+    for i, (value, spk) in enumerate(tx['vout']):
+        typ, req = _script_type(spk)
+        vout.append({'value': Decimal(value) / Decimal('1e8'), 'n': i, 'scriptPubKey': {'type': typ, 'reqSigs': req}})
+    txid = hashlib.sha256(hashlib.sha256(b).digest()).digest()[::-1].hex()
+    return {'txid': txid, 'version': tx['version'], 'locktime': tx['locktime'], 'size': len(b), 'vin': vin, 'vout': vout}
+
+
+def address_versions() -> Set[int]:
+    out = set()
+    for v in (os.environ.get('ABCMINT_ADDRESS_VERSIONS') or '0x10').split(','):
+        try:
+            out.add(int(v.strip(), 0))
+        except Exception:
+            pass
+    return out
+
+
+def address_wellformed(addr: str, versions: Optional[Set[int]] = None) -> bool:
+    """Base58 structure only: alphabet, decoded length and version byte.
+
+    A pre-filter that can only reject: ABCMint's checksum is not plain
+    double-SHA256, so acceptance is always the node's (validateaddress).
+    """
+    if not isinstance(addr, str) or not 26 <= len(addr) <= 64:
+        return False
+    raw = rawtx.b58decode(addr)
+    if raw is None or len(raw) != int(os.environ.get('ABCMINT_ADDRESS_BYTES', '36')):
+        return False
+    return raw[0] in (versions if versions is not None else address_versions())
+
+
+class LRUCache:
+    """Bounded most-recently-used map, safe across threads; entries may expire."""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self.data: 'OrderedDict[Any, Tuple[Any, Optional[float]]]' = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires <= time.time():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        with self.lock:
+            self.data[key] = (value, time.time() + ttl if ttl is not None else None)
+            self.data.move_to_end(key)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+def tx_policy_error(decoded: dict, ctx: Tuple[int, Optional[int], Optional[int]], policy: Dict[str, Any]) -> Optional[str]:
+    """Broadcast policy (version, finality, script types) for a decoded tx; None if it passes."""
+    cur_h, hint_ver, hint_fork = ctx
+    ver = int(decoded.get('version', 0))
+    mode = policy['mode']
+    allowed = set(policy['allowed'])
+    fork_h = hint_fork if isinstance(hint_fork, int) and hint_fork > 0 else RAINBOWFORKHEIGHT
+    postfork = cur_h > fork_h + 20
+    if mode == 'strict':
+        if postfork:
+            if ver != 101:
+                return 'version enforcement failed'
+        else:
+            if ver not in (1, 101):
+                return 'version enforcement failed'
+    elif mode == 'allow':
+        if postfork:
+            if allowed and ver in allowed:
+                pass
+            elif hint_ver is not None and ver == int(hint_ver):
+                pass
+            else:
+                return 'version enforcement failed'
+        else:
+            if ver not in (1, 101) and (not allowed or ver not in allowed):
+                return 'version enforcement failed'
+    else:
+        if postfork:
+            target = int(hint_ver) if hint_ver is not None else 101
+            if ver != target and ver not in allowed:
+                return 'version enforcement failed'
+        else:
+            if ver not in (1, 101):
+                return 'version enforcement failed'
+    lt = int(decoded.get('locktime', 0))
+    req_final = policy['req_final']
+    if req_final:
+        if lt != 0:
+            return 'finality enforcement failed'
+    vin = decoded.get('vin') or []
+    for i in vin:
+        seq = int(i.get('sequence', 0))
+        if req_final and seq != 0xffffffff:
+            return 'finality enforcement failed'
+    vout = decoded.get('vout') or []
+    for o in vout:
+        spk = o.get('scriptPubKey') or {}
+        typ = (spk.get('type') or '').lower()
+        if typ in ('nonstandard', 'witness_v0_keyhash', 'witness_v0_scripthash'):
+            return 'nonstandard script rejected'
+        if typ == 'multisig':
+            rs = int(spk.get('reqSigs', 0))
+            if rs < 1 or rs > 3:
+                return 'multisig reqSigs out of range'
+    return None
+
+
+def check_tx_local(hex_tx: str, ctx: Tuple[int, Optional[int], Optional[int]], policy: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """('ok', None), ('reject', reason) or ('unknown', None) when the node must decode it."""
+    decoded = decode_tx_local(hex_tx)
+    if decoded is None or any(o['scriptPubKey']['type'] is None for o in decoded['vout']):
+        return 'unknown', None
+    err = tx_policy_error(decoded, ctx, policy)
+    return ('reject', err) if err else ('ok', None)
+
+
+def tx_sizes_fees(hex_txs: List[str], ding_per_kb: Optional[int], flat_ding: int) -> List[Tuple[int, int]]:
+    out = []
+    for h in hex_txs:
+        size = len(bytes.fromhex(h))
+        out.append((size, ding_per_kb * ((size + 999) // 1000) if ding_per_kb else flat_ding))
+    return out
+
+
+_cpu = {'pool': None, 'workers': 0}
+_cpu_lock = threading.Lock()
+
+
+def cpu_workers() -> int:
+    v = (os.environ.get('ABCMINT_CPU_WORKERS') or '0').strip().lower()
+    if v == 'auto':
+        return os.cpu_count() or 1
+    try:
+        return max(0, int(v))
+    except Exception:
+        return 0
+
+
+def _cpu_pool() -> Optional[ProcessPoolExecutor]:
+    n = cpu_workers()
+    if n <= 0:
+        return None
+    with _cpu_lock:
+        if _cpu['pool'] is None or _cpu['workers'] != n:
+            # workers import this module by name; without that, stay inline
+            d, f = os.path.split(os.path.abspath(__file__))
+            if __name__ != os.path.splitext(f)[0] or getattr(sys.modules.get(__name__), 'check_tx_local', None) is not check_tx_local:
+                return None
+            if d not in sys.path:
+                sys.path.append(d)
+            if _cpu['pool'] is not None:
+                _cpu['pool'].shutdown(wait=False)
+            _cpu['pool'] = ProcessPoolExecutor(max_workers=n)
+            _cpu['workers'] = n
+        return _cpu['pool']
+
+
+def submit_cpu(fn: Callable[..., Any], *args: Any) -> Future:
+    """Run a module-level function in the CPU pool, or inline; always returns a Future."""
+    pool = _cpu_pool()
+    if pool is not None:
+        try:
+            return pool.submit(fn, *args)
+        except Exception as e:
+            log.warn('CPU pool unavailable, running inline: ' + repr(e))
+            with _cpu_lock:
+                _cpu['pool'] = None
+    fut: Future = Future()
+    try:
+        fut.set_result(fn(*args))
+    except Exception as e:
+        fut.set_exception(e)
+    return fut
+
+
+def shutdown_cpu_pool() -> None:
+    with _cpu_lock:
+        if _cpu['pool'] is not None:
+            _cpu['pool'].shutdown()
+        _cpu['pool'] = None
+        _cpu['workers'] = 0
+
+
 class ABCmintBlockchainInterface(BlockchainInterface):
     def __init__(self, jsonRpc, wallet_name: str) -> None:
         super().__init__()
         self.jsonRpc = jsonRpc
+        # optional wallet change feed (service/wallet_feed.py) serving list_transactions locally
+        self.tx_feed = None
+        # optional spent/unspent outpoint cache (service/utxo_cache.py) in front of gettxout
+        self.utxo_cache = None
+        # optional confirmed-transaction cache (service/tx_cache.py)
+        self.tx_cache = None
+        # decodes of recently built transactions, by hex (see remember_decoded)
+        self._decoded_memo: Dict[str, dict] = {}
+        # validateaddress answers; ownership answers expire (see validate_address)
+        self._validated = LRUCache(int(os.environ.get('ABCMINT_VALIDATE_CACHE_SIZE', '1024')))
 
     def _rpc(self, method: str, args: Union[dict, list] = []) -> Any:
         ret = self.jsonRpc.call(method, args)
         return ret
 
+    def validate_address(self, addr: str) -> dict:
+        """Node validateaddress (isvalid, ismine, ...) through an LRU cache."""
+        res = self._validated.get(addr)
+        if res is not None:
+            return res
+        res = self._rpc('validateaddress', [addr])
+        if not isinstance(res, dict) or 'isvalid' not in res:
+            # nothing to learn from an empty answer: ask again next time
+            return res if isinstance(res, dict) else {}
+        # validity never changes, and a key never leaves the wallet; "not mine" can
+        # (an import), so that answer is only kept for a while
+        ttl = None
+        if res.get('isvalid') and not res.get('ismine'):
+            ttl = float(os.environ.get('ABCMINT_VALIDATE_TTL_SEC', '300'))
+        self._validated.put(addr, res, ttl)
+        return res
+
+    def is_valid_address(self, addr: str) -> Optional[bool]:
+        """True/False from the node; None when it cannot be asked. Malformed input is
+        rejected locally without an RPC."""
+        if not address_wellformed(addr):
+            return False
+        try:
+            res = self.validate_address(addr)
+        except Exception:
+            return None
+        if 'isvalid' not in res:
+            return None
+        return bool(res['isvalid'])
+
+    def known_wallet_address(self, addr: str) -> bool:
+        """Whether `addr` is already known (without an RPC) to belong to the wallet."""
+        res = self._validated.get(addr)
+        return bool(res and res.get('ismine'))
+
     def is_address_imported(self, addr: str) -> bool:
         try:
-            res = self._rpc('validateaddress', [addr])
-            if not res:
-                return False
-            return bool(res.get('isvalid', False))
+            return bool(self.validate_address(addr).get('isvalid', False))
         except Exception:
             return False
 
@@ -49,6 +342,7 @@ class ABCmintBlockchainInterface(BlockchainInterface):
                        include_mempool: bool = True) -> List[Optional[dict]]:
         if not isinstance(txouts, list):
             txouts = [txouts]
+        cache = self.utxo_cache
         result: List[Optional[dict]] = []
         for txo in txouts:
             txo_hex = bintohex(txo[0])
@@ -57,6 +351,17 @@ class ABCmintBlockchainInterface(BlockchainInterface):
             except Exception:
                 result.append(None)
                 continue
+            if cache is not None:
+                hit = cache.lookup(txo_hex, txo_idx, include_mempool)
+                if hit is False:
+                    result.append(None)
+                    continue
+                if hit is not None:
+                    item = {'value': hit['value'], 'script': hit['script']}
+                    if includeconfs:
+                        item['confirms'] = hit['confirms']
+                    result.append(item)
+                    continue
             ret = self._rpc('gettxout', [txo_hex, txo_idx, include_mempool])
             if not ret:
                 result.append(None)
@@ -68,8 +373,11 @@ class ABCmintBlockchainInterface(BlockchainInterface):
                 value_ding = int(val * Decimal('1e8'))
                 script_hex = ret['scriptPubKey']['hex']
                 item: Dict[str, Any] = {'value': value_ding, 'script': hextobin(script_hex)}
+                confirms = int(ret.get('confirmations', 0))
+                if cache is not None:
+                    cache.remember(txo_hex, txo_idx, dict(item, confirms=confirms), include_mempool)
                 if includeconfs:
-                    item['confirms'] = int(ret.get('confirmations', 0))
+                    item['confirms'] = confirms
                 result.append(item)
             except Exception:
                 result.append(None)
@@ -89,6 +397,8 @@ class ABCmintBlockchainInterface(BlockchainInterface):
         return None
 
     def list_transactions(self, num: int, skip: int = 0) -> List[dict]:
+        if self.tx_feed is not None and self.tx_feed.sync():
+            return self.tx_feed.entries(num, skip)
         res = self._rpc('listtransactions', ["*", num, skip])
         return res if res else []
 
@@ -101,10 +411,37 @@ class ABCmintBlockchainInterface(BlockchainInterface):
         except Exception:
             return None
 
+    def _cached_tx(self, kind: str, txid: str, method: str, args: list) -> Optional[dict]:
+        cache = self.tx_cache
+        if cache is not None:
+            hit = cache.get(kind, txid)
+            if hit is not None:
+                return hit
+        res = self._rpc(method, args)
+        if not isinstance(res, dict):
+            return None
+        if cache is not None and cache.deep_enough(res):
+            # the height is derived from the tip: the one node_status keeps polling
+            # (as the confirmation tracker does), read from the node only without it
+            try:
+                tip = cache.known_tip()
+                cache.put(kind, txid, res, tip if tip is not None else int(self._rpc('getblockcount', [])))
+            except Exception:
+                pass
+        return res
+
+    def get_wallet_transaction(self, txid: str) -> Optional[dict]:
+        """gettransaction by hex txid; raises on RPC errors."""
+        return self._cached_tx('wallet', txid, 'gettransaction', [txid])
+
+    def get_raw_transaction(self, txid: str) -> Optional[dict]:
+        """Verbose getrawtransaction by hex txid; raises on RPC errors."""
+        return self._cached_tx('raw', txid, 'getrawtransaction', [txid, 1])
+
     def get_transaction(self, txid: bytes) -> Optional[dict]:
         htxid = bintohex(txid)
         try:
-            res = self._rpc('gettransaction', [htxid])
+            res = self.get_wallet_transaction(htxid)
             return res if res else None
         except Exception:
             return None
@@ -161,6 +498,8 @@ class ABCmintBlockchainInterface(BlockchainInterface):
         ret = self._rpc('getnewaddress', args)
         if not isinstance(ret, str):
             raise RuntimeError('RPC getnewaddress failed')
+        # the node just made it: valid and ours, no validateaddress needed
+        self._validated.put(ret, {'isvalid': True, 'ismine': True, 'address': ret})
         return ret
 
     def create_raw_transaction(self, inputs: List[dict], outputs: Dict[str, Decimal]) -> str:
@@ -252,8 +591,7 @@ class ABCmintBlockchainInterface(BlockchainInterface):
             return outputs
         if not address or percent <= Decimal('0') or percent >= Decimal('1'):
             return outputs
-        v = self._rpc('validateaddress', [address])
-        if not v or not v.get('isvalid', False):
+        if self.is_valid_address(address) is not True:
             return outputs
         mode = os.environ.get('ABCMINT_DEDUCTION_MODE', '').lower()
         if not mode:
@@ -353,23 +691,36 @@ class ABCmintBlockchainInterface(BlockchainInterface):
         except Exception:
             return None
 
+    def remember_decoded(self, hex_tx: str, decoded: dict) -> None:
+        # a caller that built hex_tx itself can supply the decode broadcast needs
+        memo = self._decoded_memo
+        memo[hex_tx] = decoded
+        # several jobs sign before a queued broadcast sends: keep a few, not just the last
+        while len(memo) > 64:
+            try:
+                del memo[next(iter(memo))]
+            except (KeyError, RuntimeError, StopIteration):
+                break
+
+    def _recall_decoded(self, hex_tx: str) -> Optional[dict]:
+        return self._decoded_memo.get(hex_tx)
+
     def _decode_raw(self, hex_tx: str) -> Optional[dict]:
+        # broadcast decodes the tx it sends; keep recent results so callers
+        # looking up output indexes right after a broadcast do not decode again
+        known = self._recall_decoded(hex_tx)
+        if known is not None:
+            return known
         try:
             decoded = self._rpc('decoderawtransaction', [hex_tx])
-            return decoded if isinstance(decoded, dict) else None
+            if not isinstance(decoded, dict):
+                return None
+            self.remember_decoded(hex_tx, decoded)
+            return decoded
         except Exception:
             return None
 
-    def _enforce_tx_protections(self, hex_tx: str) -> None:
-        decoded = self._decode_raw(hex_tx)
-        if not decoded:
-            raise RuntimeError('TX decode failed')
-        try:
-            cur_h = self.get_current_block_height()
-        except Exception:
-            cur_h = RAINBOWFORKHEIGHT + 100000
-        ver = int(decoded.get('version', 0))
-        mode = (os.environ.get('ABCMINT_TX_VERSION_MODE') or 'postfork').lower()
+    def _tx_policy(self) -> Dict[str, Any]:
         allowed_env = os.environ.get('ABCMINT_TX_ALLOWED_VERSIONS') or ''
         allowed: Set[int] = set()
         for p in allowed_env.split(','):
@@ -379,55 +730,72 @@ class ABCmintBlockchainInterface(BlockchainInterface):
                     allowed.add(v)
             except Exception:
                 pass
+        return {'mode': (os.environ.get('ABCMINT_TX_VERSION_MODE') or 'postfork').lower(),
+                'allowed': sorted(allowed),
+                'req_final': (os.environ.get('ABCMINT_TX_REQUIRE_FINALITY') or 'true').lower() in ('1', 'true', 'yes')}
+
+    def _enforce_tx_protections(self, hex_tx: str) -> None:
+        if cpu_workers() > 0 and self._recall_decoded(hex_tx) is None:
+            # decode and check locally instead of parsing the node's decode in this thread
+            state, err = self.submit_tx_check(hex_tx).result()
+            if state == 'reject':
+                raise RuntimeError(err)
+            if state == 'ok':
+                return
+        decoded = self._decode_raw(hex_tx)
+        if not decoded:
+            raise RuntimeError('TX decode failed')
+        err = tx_policy_error(decoded, self._fork_context(), self._tx_policy())
+        if err:
+            raise RuntimeError(err)
+
+    def submit_tx_check(self, hex_tx: str) -> Future:
+        """Start a local decode and policy check; the Future yields a check_tx_local result."""
+        return submit_cpu(check_tx_local, hex_tx, self._fork_context(), self._tx_policy())
+
+    def check_transactions(self, hex_txs: List[str]) -> List[Optional[str]]:
+        """Policy-check many transactions at once; None or the rejection reason for each."""
+        ctx, policy = self._fork_context(), self._tx_policy()
+        futs = [submit_cpu(check_tx_local, h, ctx, policy) for h in hex_txs]
+        out: List[Optional[str]] = []
+        for h, fut in zip(hex_txs, futs):
+            state, err = fut.result()
+            if state == 'unknown':
+                decoded = self._decode_raw(h)
+                err = tx_policy_error(decoded, ctx, policy) if decoded else 'TX decode failed'
+            out.append(err)
+        return out
+
+    def tx_sizes_and_fees(self, hex_txs: List[str], conf_target: int = 1) -> List[Tuple[int, Decimal]]:
+        """Byte size and miner fee (node rate per started kB, else TX_FEE_PER_TX) of each tx."""
+        est = self._estimate_fee_basic(conf_target)
+        rate = est[0] if est else None
+        flat = int(Decimal(os.environ.get('TX_FEE_PER_TX', '0.01')) * Decimal('1e8'))
+        n = max(1, cpu_workers())
+        step = max(1, -(-len(hex_txs) // n))
+        futs = [submit_cpu(tx_sizes_fees, hex_txs[i:i + step], rate, flat) for i in range(0, len(hex_txs), step)]
+        floor = self._get_relay_fee_floor() if rate else None
+        out: List[Tuple[int, Decimal]] = []
+        for fut in futs:
+            for size, ding in fut.result():
+                coins = Decimal(ding) / Decimal('1e8')
+                out.append((size, max(coins, floor) if floor is not None else coins))
+        return out
+
+    def _fork_context(self) -> Tuple[int, Optional[int], Optional[int]]:
+        # height and fork hint only decide pre/post-fork rules, so reuse them briefly
+        ttl = float(os.environ.get('ABCMINT_FORK_HINT_TTL_SEC', '60'))
+        cached = getattr(self, '_fork_ctx', None)
+        if cached is not None and time.time() - cached[0] < ttl:
+            return cached[1]
+        try:
+            cur_h = self.get_current_block_height()
+        except Exception:
+            cur_h = RAINBOWFORKHEIGHT + 100000
         hint_ver, hint_fork = self._get_node_tx_version_hint()
-        fork_h = hint_fork if isinstance(hint_fork, int) and hint_fork > 0 else RAINBOWFORKHEIGHT
-        postfork = cur_h > fork_h + 20
-        if mode == 'strict':
-            if postfork:
-                if ver != 101:
-                    raise RuntimeError('version enforcement failed')
-            else:
-                if ver not in (1, 101):
-                    raise RuntimeError('version enforcement failed')
-        elif mode == 'allow':
-            if postfork:
-                if allowed and ver in allowed:
-                    pass
-                elif hint_ver is not None and ver == int(hint_ver):
-                    pass
-                else:
-                    raise RuntimeError('version enforcement failed')
-            else:
-                if ver not in (1, 101) and (not allowed or ver not in allowed):
-                    raise RuntimeError('version enforcement failed')
-        else:
-            if postfork:
-                target = int(hint_ver) if hint_ver is not None else 101
-                if ver != target and ver not in allowed:
-                    raise RuntimeError('version enforcement failed')
-            else:
-                if ver not in (1, 101):
-                    raise RuntimeError('version enforcement failed')
-        lt = int(decoded.get('locktime', 0))
-        req_final = (os.environ.get('ABCMINT_TX_REQUIRE_FINALITY') or 'true').lower() in ('1', 'true', 'yes')
-        if req_final:
-            if lt != 0:
-                raise RuntimeError('finality enforcement failed')
-        vin = decoded.get('vin') or []
-        for i in vin:
-            seq = int(i.get('sequence', 0))
-            if req_final and seq != 0xffffffff:
-                raise RuntimeError('finality enforcement failed')
-        vout = decoded.get('vout') or []
-        for o in vout:
-            spk = o.get('scriptPubKey') or {}
-            typ = (spk.get('type') or '').lower()
-            if typ in ('nonstandard', 'witness_v0_keyhash', 'witness_v0_scripthash'):
-                raise RuntimeError('nonstandard script rejected')
-            if typ == 'multisig':
-                rs = int(spk.get('reqSigs', 0))
-                if rs < 1 or rs > 3:
-                    raise RuntimeError('multisig reqSigs out of range')
+        ctx = (cur_h, hint_ver, hint_fork)
+        self._fork_ctx = (time.time(), ctx)
+        return ctx
 
     def _get_node_tx_version_hint(self) -> Tuple[Optional[int], Optional[int]]:
         try:
@@ -0,0 +1,125 @@
+"""
+CPU offload benchmark for ABCmintBlockchainInterface.
+
+Builds large signed transactions (filler scriptSigs of --sig-size bytes standing
+in for Rainbow signatures) and has --threads concurrent callers run the broadcast
+policy check on all of them, as many jobs broadcasting at once would. Each
+ABCMINT_CPU_WORKERS setting is timed and reported as JSON (tx/s and speedup
+over the inline run).
+
+    python test/bench_cpu_offload.py --txs 400 --sig-size 32768 --workers 0,1,2,4,auto
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import threading
+from typing import Any, Dict, List
+
+here = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(here)
+if base_dir not in sys.path:
+    sys.path.insert(0, base_dir)
+if here not in sys.path:
+    sys.path.insert(0, here)
+
+import fake_abcmint_node as fake
+
+
+def make_txs(node, count: int, inputs: int, outputs: int, sig_size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    with node.lock:
+        addrs = [node._new_address() for _ in range(outputs)]
+    txs = []
+    for _ in range(count):
+        vin = [('%064x' % rng.getrandbits(256), rng.randrange(4), fake._push(rng.getrandbits(sig_size * 8).to_bytes(sig_size, 'little')), 0xffffffff)
+               for _ in range(inputs)]
+        vout = [(rng.randrange(1, 10 ** 9), node._script_for(a)) for a in addrs]
+        txs.append(fake.serialize_tx(101, vin, vout).hex())
+    return txs
+
+
+def run_once(iface, txs: List[str], threads: int, mode: str) -> float:
+    chunks = [txs[i::threads] for i in range(threads)]
+    errors: List[Any] = []
+
+    def worker(chunk):
+        try:
+            if mode == 'batch':
+                errors.extend(e for e in iface.check_transactions(chunk) if e)
+            else:
+                for h in chunk:
+                    iface._enforce_tx_protections(h)
+        except Exception as e:
+            errors.append(e)
+
+    t0 = time.perf_counter()
+    ts = [threading.Thread(target=worker, args=(c,)) for c in chunks]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    wall = time.perf_counter() - t0
+    if errors:
+        raise RuntimeError('policy check failed: %r' % errors[:3])
+    return wall
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    from service.mixing_service import abcmint_iface
+    node = fake.FakeAbcmintNode(seed=args.seed)
+    iface = abcmint_iface.ABCmintBlockchainInterface(node, '')
+    txs = make_txs(node, args.txs, args.inputs, args.outputs, args.sig_size, args.seed)
+    rows = []
+    base = None
+    for w in [x.strip() for x in args.workers.split(',') if x.strip()]:
+        os.environ['ABCMINT_CPU_WORKERS'] = w
+        abcmint_iface.shutdown_cpu_pool()
+        # warm the pool (process start-up) and the fork-hint cache outside the timing
+        run_once(iface, txs[:max(1, abcmint_iface.cpu_workers()) * 2], args.threads, args.mode)
+        best = min(run_once(iface, txs, args.threads, args.mode) for _ in range(args.repeat))
+        base = base or best
+        rows.append({'workers': abcmint_iface.cpu_workers(), 'setting': w, 'wall_sec': round(best, 4),
+                     'tx_per_sec': round(len(txs) / best, 1), 'speedup': round(base / best, 2)})
+    abcmint_iface.shutdown_cpu_pool()
+    os.environ.pop('ABCMINT_CPU_WORKERS', None)
+    return {
+        'meta': {'txs': args.txs, 'inputs': args.inputs, 'outputs': args.outputs, 'sig_size': args.sig_size,
+                 'tx_bytes': len(txs[0]) // 2, 'threads': args.threads, 'mode': args.mode,
+                 'cpu_count': os.cpu_count(), 'python': platform.python_version()},
+        'results': rows,
+    }
+
+
+def _parse_args(argv):
+    import argparse
+    p = argparse.ArgumentParser(description='CPU offload benchmark (policy checks of large transactions)')
+    p.add_argument('--txs', type=int, default=400)
+    p.add_argument('--inputs', type=int, default=3)
+    p.add_argument('--outputs', type=int, default=2)
+    p.add_argument('--sig-size', type=int, default=32768)
+    p.add_argument('--threads', type=int, default=16, help='concurrent callers (jobs broadcasting at once)')
+    p.add_argument('--mode', choices=('batch', 'single'), default='single',
+                   help='check_transactions per caller, or one _enforce_tx_protections per tx')
+    p.add_argument('--workers', default='0,1,2,4,auto', help='ABCMINT_CPU_WORKERS settings to compare')
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--seed', type=int, default=1)
+    p.add_argument('--out', default=None, help='write JSON results here')
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv if argv is not None else sys.argv[1:])
+    res = run_benchmark(args)
+    text = json.dumps(res, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
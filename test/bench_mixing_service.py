@@ -0,0 +1,297 @@
+"""
+End-to-end throughput benchmark for MixingService against the fake node.
+
+Drives N concurrent jobs through deposit, step 1, confirmations and sharded hops
+across the configured tiers and reports jobs/hour, p50/p99 phase latency, RPCs
+per job, CPU time, thread count and peak RSS as JSON. A previous result file can
+be passed with --compare to flag regressions (non-zero exit code).
+
+    python test/bench_mixing_service.py --jobs 30 --tiers SL1,SL3,SL5 --out bench.json
+    python test/bench_mixing_service.py --jobs 30 --compare bench.json
+
+Wall-clock numbers are dominated by --block-interval and --poll; keep them fixed
+between runs that are compared. `--transport http` serves the fake node over
+JSON-RPC and exercises the real client; `inproc` (default) calls it directly.
+"""
+import os
+import sys
+import json
+import math
+import time
+import platform
+import tempfile
+import threading
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+here = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(here)
+if base_dir not in sys.path:
+    sys.path.insert(0, base_dir)
+if here not in sys.path:
+    sys.path.insert(0, here)
+
+import fake_abcmint_node as fake
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PHASES = ('waiting_deposit', 'deposit_received', 'mixing_step1', 'waiting_confirmations', 'mixing_step2')
+
+# metric -> True when higher is better
+COMPARED_METRICS = {
+    'jobs_per_hour': True,
+    'rpc_per_job': False,
+    'cpu_sec_per_job': False,
+    'peak_rss_mb': False,
+    'peak_threads': False,
+    'completion_rate': True,
+}
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    vals = sorted(values)
+    k = max(0, min(len(vals) - 1, int(math.ceil(p / 100.0 * len(vals))) - 1))
+    return round(vals[k], 6)
+
+
+def _rss_mb() -> Optional[float]:
+    if psutil is not None:
+        try:
+            return psutil.Process().memory_info().rss / (1024.0 * 1024.0)
+        except Exception:
+            pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024.0 if sys.platform != 'darwin' else peak / (1024.0 * 1024.0)
+    return None
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stop_evt = threading.Event()
+        self.peak_threads = 0
+        self.peak_rss_mb = 0.0
+
+    def run(self) -> None:
+        while not self.stop_evt.is_set():
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            rss = _rss_mb()
+            if rss is not None:
+                self.peak_rss_mb = max(self.peak_rss_mb, rss)
+            self.stop_evt.wait(self.interval)
+
+
+class _InprocRpc:
+    def __init__(self, node, tracing):
+        self.node = node
+        self.tracing = tracing
+
+    def call(self, method, params=None):
+        self.tracing.count_rpc(method)
+        return self.node.call(method, params)
+
+
+def _configure_env(args, state_dir: str, host: str = '127.0.0.1', port: int = 0) -> None:
+    os.environ.update({
+        'ABCMINT_RPC_HOST': host,
+        'ABCMINT_RPC_PORT': str(port),
+        'ABCMINT_RPC_USER': 'bench',
+        'ABCMINT_RPC_PASSWORD': 'bench',
+        'LOCALAPPDATA': state_dir,
+        'CONF_POLL_INTERVAL_SEC': str(args.poll),
+        'DEPOSIT_POLL_INTERVAL_SEC': str(args.poll),
+        'GUARDIAN_INTERVAL_SEC': str(max(args.poll, 0.5)),
+        'REQUIRED_CONF': str(args.required_conf),
+        'MINCONF_STEP2': str(args.required_conf),
+        'BROADCAST_TX_PER_SEC': str(args.broadcast_rate),
+    })
+
+
+def _tier_table() -> Dict[str, Dict[str, int]]:
+    from service import fee_model
+    return {t['name']: {'shards': t['shards'], 'hops': t['hops']} for t in fee_model.default_tiers()}
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    state_dir = tempfile.mkdtemp(prefix='abcmint-bench-')
+    node = fake.FakeAbcmintNode(seed=args.seed, default_latency=args.rpc_latency, sig_size=args.sig_size)
+    if args.transport == 'http':
+        host, port = node.serve(user='bench', password='bench')
+        _configure_env(args, state_dir, host, port)
+    else:
+        _configure_env(args, state_dir)
+
+    from service.mixing_service import MixingService, tracing
+    svc = MixingService()
+    if args.transport != 'http':
+        svc.rpc = _InprocRpc(node, tracing)
+        svc.iface.jsonRpc = svc.rpc
+    tiers = _tier_table()
+    names = [t.strip() for t in args.tiers.split(',') if t.strip()]
+
+    sampler = _Sampler()
+    sampler.start()
+    node.start_mining(args.block_interval)
+    node.reset_stats()
+    cpu0 = time.process_time()
+    t0 = time.time()
+
+    jobs = []
+    for i in range(args.jobs):
+        tier = names[i % len(names)]
+        cfg = tiers[tier]
+        with node.lock:
+            target = node._new_address()
+        job = svc.create_job(target, Decimal(str(args.amount)), cfg['shards'], cfg['hops'])
+        node.fund(job.deposit_address, job.deposit_required)
+        jobs.append((tier, job))
+
+    deadline = t0 + args.timeout
+    while time.time() < deadline:
+        if all(j.status == 'completed' for _t, j in jobs):
+            break
+        time.sleep(0.2)
+    wall = time.time() - t0
+    cpu = time.process_time() - cpu0
+    node.stop()
+    sampler.stop_evt.set()
+    sampler.join(1.0)
+
+    return summarize(args, jobs, wall, cpu, dict(node.calls), sampler)
+
+
+def summarize(args, jobs, wall: float, cpu: float, node_calls: Dict[str, int], sampler) -> Dict[str, Any]:
+    completed = [j for _t, j in jobs if j.status == 'completed']
+    total_rpc = sum(node_calls.values())
+    per_tier: Dict[str, Dict[str, Any]] = {}
+    phase_all: Dict[str, List[float]] = {p: [] for p in PHASES}
+    for tier, job in jobs:
+        t = per_tier.setdefault(tier, {'jobs': 0, 'completed': 0, 'rpc_attributed': [], 'phases': {p: [] for p in PHASES},
+                                       'shards_planned': 0, 'shards_final': 0})
+        t['jobs'] += 1
+        t['completed'] += 1 if job.status == 'completed' else 0
+        t['shards_planned'] += int(job.shard_count)
+        t['shards_final'] += len(job.shard_txids_final or [])
+        rpc = 0
+        for s in job.spans or []:
+            if s.get('kind') != 'phase':
+                continue
+            rpc += int(s.get('rpc_calls', 0))
+            if s['name'] in PHASES and s.get('duration') is not None:
+                t['phases'][s['name']].append(s['duration'])
+                phase_all[s['name']].append(s['duration'])
+        t['rpc_attributed'].append(rpc)
+    tiers_out = {}
+    for tier, t in per_tier.items():
+        tiers_out[tier] = {
+            'jobs': t['jobs'],
+            'completed': t['completed'],
+            'shards_planned': t['shards_planned'],
+            'shards_final': t['shards_final'],
+            'rpc_per_job_attributed': round(sum(t['rpc_attributed']) / max(1, len(t['rpc_attributed'])), 2),
+            'phase_latency': {p: {'p50': percentile(v, 50), 'p99': percentile(v, 99), 'n': len(v)}
+                              for p, v in t['phases'].items() if v},
+        }
+    summary = {
+        'jobs': len(jobs),
+        'completed': len(completed),
+        'completion_rate': round(len(completed) / max(1, len(jobs)), 4),
+        'wall_sec': round(wall, 3),
+        'jobs_per_hour': round(len(completed) / wall * 3600.0, 2) if wall > 0 else 0.0,
+        'cpu_sec': round(cpu, 3),
+        'cpu_sec_per_job': round(cpu / max(1, len(jobs)), 4),
+        'rpc_total': total_rpc,
+        'rpc_per_job': round(total_rpc / max(1, len(jobs)), 2),
+        'rpc_by_method': dict(sorted(node_calls.items(), key=lambda kv: -kv[1])),
+        'peak_threads': sampler.peak_threads,
+        'peak_rss_mb': round(sampler.peak_rss_mb, 2),
+        'phase_latency': {p: {'p50': percentile(v, 50), 'p99': percentile(v, 99), 'n': len(v)}
+                          for p, v in phase_all.items() if v},
+    }
+    for p, v in summary['phase_latency'].items():
+        summary['p99_' + p] = v['p99']
+    return {
+        'meta': {
+            'jobs': args.jobs, 'tiers': args.tiers, 'amount': args.amount, 'transport': args.transport,
+            'block_interval': args.block_interval, 'poll': args.poll, 'required_conf': args.required_conf,
+            'rpc_latency': args.rpc_latency, 'sig_size': args.sig_size, 'seed': args.seed,
+            'broadcast_rate': args.broadcast_rate,
+            'python': platform.python_version(), 'platform': platform.platform(), 'timestamp': int(time.time()),
+        },
+        'summary': summary,
+        'tiers': tiers_out,
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1) -> List[Dict[str, Any]]:
+    """Return one row per compared metric; rows with `regression` True exceed `tolerance`."""
+    rows = []
+    cur, base = current.get('summary', {}), baseline.get('summary', {})
+    metrics = dict(COMPARED_METRICS)
+    metrics.update({k: False for k in cur if k.startswith('p99_')})
+    for key, higher_better in metrics.items():
+        a, b = cur.get(key), base.get(key)
+        if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+            continue
+        change = (a - b) / b if b else 0.0
+        worse = -change if higher_better else change
+        rows.append({'metric': key, 'baseline': b, 'current': a, 'change': round(change, 4),
+                     'regression': worse > tolerance})
+    return rows
+
+
+def _parse_args(argv):
+    import argparse
+    p = argparse.ArgumentParser(description='MixingService throughput benchmark (fake node)')
+    p.add_argument('--jobs', type=int, default=12)
+    p.add_argument('--tiers', default='SL1,SL3,SL5')
+    p.add_argument('--amount', type=float, default=10.0)
+    p.add_argument('--transport', choices=('inproc', 'http'), default='inproc')
+    p.add_argument('--block-interval', type=float, default=0.5)
+    p.add_argument('--poll', type=float, default=0.2, help='deposit/confirmation poll interval (s)')
+    p.add_argument('--required-conf', type=int, default=2)
+    p.add_argument('--rpc-latency', type=float, default=0.0, help='simulated per-RPC latency (s)')
+    p.add_argument('--sig-size', type=int, default=1024)
+    p.add_argument('--broadcast-rate', type=float, default=0.0, help='BROADCAST_TX_PER_SEC (0: no ceiling)')
+    p.add_argument('--seed', type=int, default=1)
+    p.add_argument('--timeout', type=float, default=300.0)
+    p.add_argument('--out', default=None, help='write JSON results here')
+    p.add_argument('--compare', default=None, help='baseline JSON to compare against')
+    p.add_argument('--tolerance', type=float, default=0.1)
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv if argv is not None else sys.argv[1:])
+    res = run_benchmark(args)
+    text = json.dumps(res, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare_results(res, baseline, args.tolerance)
+        for r in rows:
+            flag = 'REGRESSION' if r['regression'] else 'ok'
+            print('%-32s %12s -> %12s  %+7.1f%%  %s' % (r['metric'], r['baseline'], r['current'], r['change'] * 100, flag))
+        if any(r['regression'] for r in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,723 @@
+"""
+Deterministic in-process fake ABCMint node.
+
+Implements the wallet/chain RPC subset used by the interface and MixingService
+on top of a simulated UTXO set, mempool and chain. It can be used directly as the
+`jsonRpc` object of ABCmintBlockchainInterface (it exposes `call(method, params)`)
+or served over HTTP JSON-RPC so a real MixingService can be pointed at it:
+
+    python test/fake_abcmint_node.py --port 18332 --block-interval 5
+
+Transactions use the legacy (non-segwit) serialization so decoderawtransaction,
+txids and sizes behave like the real node. Signatures are deterministic filler
+bytes of `sig_size` length, standing in for the large Rainbow signatures.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import random
+import hashlib
+import struct
+import threading
+from collections import Counter, OrderedDict
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+COIN = 100000000
+RAINBOWFORKHEIGHT = 267120
+ADDR_VERSION = 0x10
+B58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+class FakeRpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _dsha256(b: bytes) -> bytes:
+    return hashlib.sha256(hashlib.sha256(b).digest()).digest()
+
+
+def b58encode(b: bytes) -> str:
+    n = int.from_bytes(b, 'big')
+    out = ''
+    while n > 0:
+        n, r = divmod(n, 58)
+        out = B58_ALPHABET[r] + out
+    pad = len(b) - len(b.lstrip(b'\0'))
+    return '1' * pad + out
+
+
+def b58decode(s: str) -> Optional[bytes]:
+    n = 0
+    for c in s:
+        i = B58_ALPHABET.find(c)
+        if i < 0:
+            return None
+        n = n * 58 + i
+    body = n.to_bytes((n.bit_length() + 7) // 8, 'big') if n else b''
+    pad = len(s) - len(s.lstrip('1'))
+    return b'\0' * pad + body
+
+
+def address_script(addr: str) -> bytes:
+    raw = b58decode(addr) or addr.encode('utf-8')
+    payload = raw[1:-4] if len(raw) > 5 else raw
+    return b'\x76\xa9' + _push(payload) + b'\x88\xac'
+
+
+def _push(data: bytes) -> bytes:
+    n = len(data)
+    if n < 0x4c:
+        return bytes([n]) + data
+    if n <= 0xff:
+        return b'\x4c' + bytes([n]) + data
+    return b'\x4d' + struct.pack('<H', n) + data
+
+
+def _varint(n: int) -> bytes:
+    if n < 0xfd:
+        return bytes([n])
+    if n <= 0xffff:
+        return b'\xfd' + struct.pack('<H', n)
+    if n <= 0xffffffff:
+        return b'\xfe' + struct.pack('<I', n)
+    return b'\xff' + struct.pack('<Q', n)
+
+
+def _read_varint(b: bytes, pos: int) -> Tuple[int, int]:
+    first = b[pos]
+    if first < 0xfd:
+        return first, pos + 1
+    if first == 0xfd:
+        return struct.unpack_from('<H', b, pos + 1)[0], pos + 3
+    if first == 0xfe:
+        return struct.unpack_from('<I', b, pos + 1)[0], pos + 5
+    return struct.unpack_from('<Q', b, pos + 1)[0], pos + 9
+
+
+def serialize_tx(version: int, vin: List[Tuple[str, int, bytes, int]], vout: List[Tuple[int, bytes]], locktime: int = 0) -> bytes:
+    out = struct.pack('<i', version) + _varint(len(vin))
+    for txid, n, script_sig, seq in vin:
+        out += bytes.fromhex(txid)[::-1] + struct.pack('<I', n) + _varint(len(script_sig)) + script_sig + struct.pack('<I', seq)
+    out += _varint(len(vout))
+    for value, spk in vout:
+        out += struct.pack('<q', value) + _varint(len(spk)) + spk
+    return out + struct.pack('<I', locktime)
+
+
+def parse_tx(b: bytes) -> Dict[str, Any]:
+    pos = 0
+    version = struct.unpack_from('<i', b, pos)[0]
+    pos += 4
+    nin, pos = _read_varint(b, pos)
+    vin = []
+    for _ in range(nin):
+        txid = b[pos:pos + 32][::-1].hex()
+        n = struct.unpack_from('<I', b, pos + 32)[0]
+        pos += 36
+        ln, pos = _read_varint(b, pos)
+        script_sig = b[pos:pos + ln]
+        pos += ln
+        seq = struct.unpack_from('<I', b, pos)[0]
+        pos += 4
+        vin.append((txid, n, script_sig, seq))
+    nout, pos = _read_varint(b, pos)
+    vout = []
+    for _ in range(nout):
+        value = struct.unpack_from('<q', b, pos)[0]
+        pos += 8
+        ln, pos = _read_varint(b, pos)
+        vout.append((value, b[pos:pos + ln]))
+        pos += ln
+    locktime = struct.unpack_from('<I', b, pos)[0]
+    if pos + 4 != len(b):
+        raise ValueError('trailing bytes')
+    return {'version': version, 'vin': vin, 'vout': vout, 'locktime': locktime}
+
+
+def _coins(ding: int) -> Decimal:
+    return (Decimal(ding) / Decimal(COIN)).quantize(Decimal('0.00000001'))
+
+
+def _ding(v: Any) -> int:
+    return int((Decimal(str(v)) * COIN).to_integral_value())
+
+
+class FakeAbcmintNode:
+    def __init__(self, seed: int = 1, start_height: int = RAINBOWFORKHEIGHT + 1000,
+                 start_time: int = 1700000000, block_interval: int = 60,
+                 tx_version: int = 101, paytxfee: str = '0.01', sig_size: int = 1024,
+                 ancestor_limit: int = 25, dust_ding: int = 5500, peers: int = 8,
+                 latency: Optional[Dict[str, float]] = None, default_latency: float = 0.0,
+                 failure_rate: float = 0.0, wallet_funds: Optional[List[str]] = None):
+        self.rng = random.Random(seed)
+        self.lock = threading.RLock()
+        self.start_height = int(start_height)
+        self.start_time = int(start_time)
+        self.block_interval = int(block_interval)
+        self.tx_version = int(tx_version)
+        self.paytxfee = Decimal(paytxfee)
+        self.sig_size = int(sig_size)
+        self.ancestor_limit = int(ancestor_limit)
+        self.dust_ding = int(dust_ding)
+        self.peer_count = int(peers)
+        self.latency: Dict[str, float] = dict(latency or {})
+        self.default_latency = float(default_latency)
+        self.failure_rate = float(failure_rate)
+        self.failures: Dict[str, List[FakeRpcError]] = {}
+        self.calls: Counter = Counter()
+        self.blocks: List[Dict[str, Any]] = []
+        self.txs: Dict[str, Dict[str, Any]] = {}
+        self.utxos: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self.mempool: 'OrderedDict[str, None]' = OrderedDict()
+        self.spent: Dict[Tuple[str, int], str] = {}
+        self.wallet: Dict[str, str] = {}
+        self.scripts: Dict[bytes, str] = {}
+        self._addr_counter = 0
+        self._ext_counter = 0
+        self._miner: Optional[threading.Thread] = None
+        self._miner_stop = threading.Event()
+        self._http = None
+        self._append_block([])
+        for amt in (wallet_funds or []):
+            self.fund(self.rpc_getnewaddress(), amt, confirmations=0)
+        if wallet_funds:
+            self.generate(1)
+
+    # -- control surface ----------------------------------------------------
+
+    def fail_next(self, method: str, message: str = 'injected failure', code: int = -1, count: int = 1) -> None:
+        with self.lock:
+            self.failures.setdefault(method, []).extend(FakeRpcError(code, message) for _ in range(count))
+
+    def evict(self, txid: str) -> None:
+        """Drop an unconfirmed tx and its mempool descendants, as a node trimming its mempool would."""
+        with self.lock:
+            for child in [t for t in self.mempool if any(p == txid for p, _n, _s, _q in self.txs[t]['vin'])]:
+                self.evict(child)
+            tx = self.txs.pop(txid)
+            self.mempool.pop(txid, None)
+            for n in range(len(tx['vout'])):
+                self.utxos.pop((txid, n), None)
+            for p, n, _s, _q in tx['vin']:
+                if self.spent.get((p, n)) == txid:
+                    del self.spent[(p, n)]
+                    value, spk = self.txs[p]['vout'][n]
+                    self.utxos[(p, n)] = {'value': value, 'script': spk, 'address': self._addr_of(spk),
+                                          'height': self.txs[p]['block_height']}
+
+    def set_latency(self, method: Optional[str], seconds: float) -> None:
+        if method is None:
+            self.default_latency = float(seconds)
+        else:
+            self.latency[method] = float(seconds)
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.calls = Counter()
+
+    def fund(self, address: str, amount: Any, confirmations: int = 0) -> str:
+        """Pay `amount` to `address` from an outside wallet (simulated user deposit)."""
+        with self.lock:
+            self._ext_counter += 1
+            src = hashlib.sha256(b'ext' + struct.pack('<I', self._ext_counter)).hexdigest()
+            raw = serialize_tx(self.tx_version, [(src, 0, b'\x51' * 8, 0xffffffff)],
+                               [(_ding(amount), self._script_for(address))])
+            txid = self._accept(raw, external=True)
+        if confirmations > 0:
+            self.generate(confirmations)
+        return txid
+
+    def generate(self, n: int = 1) -> List[str]:
+        hashes = []
+        with self.lock:
+            for _ in range(max(0, int(n))):
+                included = list(self.mempool.keys())
+                self.mempool.clear()
+                blk = self._append_block(included)
+                hashes.append(blk['hash'])
+        return hashes
+
+    def start_mining(self, interval_sec: float) -> None:
+        if self._miner is not None:
+            return
+        self._miner_stop.clear()
+
+        def run():
+            while not self._miner_stop.wait(interval_sec):
+                self.generate(1)
+        self._miner = threading.Thread(target=run, daemon=True)
+        self._miner.start()
+
+    def stop(self) -> None:
+        self._miner_stop.set()
+        self._miner = None
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http = None
+
+    def serve(self, host: str = '127.0.0.1', port: int = 0, user: str = '', password: str = '') -> Tuple[str, int]:
+        """Serve JSON-RPC over HTTP in a background thread; returns (host, port)."""
+        node = self
+        expected = None
+        if user or password:
+            expected = 'Basic ' + base64.b64encode(('%s:%s' % (user, password)).encode('utf-8')).decode('ascii')
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                if expected is not None and self.headers.get('Authorization') != expected:
+                    self.send_response(401)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                n = int(self.headers.get('Content-Length') or 0)
+                req = json.loads(self.rfile.read(n).decode('utf-8'), parse_float=Decimal)
+                batch = isinstance(req, list)
+                resps = [node._handle(r) for r in (req if batch else [req])]
+                body = json.dumps(resps if batch else resps[0], default=_json_default).encode('utf-8')
+                status = 200 if batch or resps[0]['error'] is None else 500
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._http = ThreadingHTTPServer((host, int(port)), Handler)
+        self._http.daemon_threads = True
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+        return self._http.server_address[0], self._http.server_address[1]
+
+    def _handle(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return {'result': self.call(req.get('method'), req.get('params') or []), 'error': None, 'id': req.get('id')}
+        except FakeRpcError as e:
+            return {'result': None, 'error': {'code': e.code, 'message': e.message}, 'id': req.get('id')}
+        except Exception as e:
+            return {'result': None, 'error': {'code': -1, 'message': str(e)}, 'id': req.get('id')}
+
+    # -- JsonRpc-compatible entry point -------------------------------------
+
+    def call(self, method: str, params: Any = None) -> Any:
+        params = list(params or [])
+        delay = self.latency.get(method, self.default_latency)
+        if delay > 0:
+            time.sleep(delay)
+        with self.lock:
+            self.calls[method] += 1
+            pending = self.failures.get(method)
+            if pending:
+                raise pending.pop(0)
+            if self.failure_rate > 0 and self.rng.random() < self.failure_rate:
+                raise FakeRpcError(-1, 'injected random failure')
+            fn = getattr(self, 'rpc_' + str(method), None)
+            if fn is None:
+                raise FakeRpcError(-32601, 'Method not found')
+            return fn(*params)
+
+    # -- chain internals ----------------------------------------------------
+
+    def _tip(self) -> Dict[str, Any]:
+        return self.blocks[-1]
+
+    def _height(self) -> int:
+        return self._tip()['height']
+
+    def _append_block(self, txids: List[str]) -> Dict[str, Any]:
+        height = self.start_height + len(self.blocks)
+        prev = self.blocks[-1]['hash'] if self.blocks else '00' * 32
+        h = _dsha256(bytes.fromhex(prev) + struct.pack('<I', height) + ''.join(txids).encode('ascii'))[::-1].hex()
+        blk = {'hash': h, 'height': height, 'time': self.start_time + len(self.blocks) * self.block_interval,
+               'tx': list(txids), 'previousblockhash': prev}
+        self.blocks.append(blk)
+        for t in txids:
+            tx = self.txs[t]
+            tx['block_height'] = height
+            for n in range(len(tx['vout'])):
+                u = self.utxos.get((t, n))
+                if u is not None:
+                    u['height'] = height
+        return blk
+
+    def _confs(self, height: Optional[int]) -> int:
+        return 0 if height is None else self._height() - height + 1
+
+    def _script_for(self, addr: str) -> bytes:
+        spk = address_script(addr)
+        self.scripts.setdefault(spk, addr)
+        return spk
+
+    def _addr_of(self, spk: bytes) -> Optional[str]:
+        addr = self.scripts.get(spk)
+        if addr is None and len(spk) > 5 and spk[:2] == b'\x76\xa9' and spk[-2:] == b'\x88\xac' and spk[2] == len(spk) - 5:
+            # script built outside the node (local serializer): rebuild the address
+            body = bytes([ADDR_VERSION]) + spk[3:-2]
+            addr = b58encode(body + _dsha256(body)[:4])
+            self.scripts[spk] = addr
+        return addr
+
+    def _new_address(self) -> str:
+        self._addr_counter += 1
+        body = bytes([ADDR_VERSION]) + bytes(self.rng.getrandbits(8) for _ in range(31))
+        return b58encode(body + _dsha256(body)[:4])
+
+    def _ancestors(self, txid: str) -> int:
+        tx = self.txs.get(txid)
+        if not tx or tx['block_height'] is not None:
+            return 0
+        return tx['ancestors']
+
+    def _accept(self, raw: bytes, external: bool = False) -> str:
+        try:
+            tx = parse_tx(raw)
+        except Exception:
+            raise FakeRpcError(-22, 'TX decode failed')
+        txid = _dsha256(raw)[::-1].hex()
+        if txid in self.txs:
+            raise FakeRpcError(-27, 'transaction already in block chain')
+        in_ding = 0
+        ancestors = 1
+        if not external:
+            seen = set()
+            for ptxid, n, script_sig, _seq in tx['vin']:
+                if (ptxid, n) in seen:
+                    raise FakeRpcError(-26, 'bad-txns-inputs-duplicate')
+                seen.add((ptxid, n))
+                u = self.utxos.get((ptxid, n))
+                if u is None:
+                    if (ptxid, n) in self.spent:
+                        raise FakeRpcError(-26, 'txn-mempool-conflict')
+                    raise FakeRpcError(-25, 'Missing inputs')
+                if not script_sig:
+                    raise FakeRpcError(-26, 'mandatory-script-verify-flag-failed')
+                in_ding += u['value']
+                ancestors = max(ancestors, self._ancestors(ptxid) + 1)
+            out_ding = sum(v for v, _ in tx['vout'])
+            if out_ding > in_ding:
+                raise FakeRpcError(-26, 'bad-txns-in-belowout')
+            if any(v < self.dust_ding for v, _ in tx['vout']):
+                raise FakeRpcError(-26, 'dust')
+            if ancestors > self.ancestor_limit:
+                raise FakeRpcError(-26, 'too-long-mempool-chain')
+            for ptxid, n, _s, _q in tx['vin']:
+                self.spent[(ptxid, n)] = txid
+                del self.utxos[(ptxid, n)]
+        else:
+            ancestors = 0
+        self.txs[txid] = {'raw': raw, 'vin': tx['vin'], 'vout': tx['vout'], 'block_height': None,
+                          'time': self.start_time + len(self.blocks) * self.block_interval,
+                          'fee': max(0, in_ding - sum(v for v, _ in tx['vout'])) if not external else 0,
+                          'ancestors': ancestors, 'seq': len(self.txs)}
+        for n, (value, spk) in enumerate(tx['vout']):
+            self.utxos[(txid, n)] = {'value': value, 'script': spk, 'address': self._addr_of(spk), 'height': None}
+        self.mempool[txid] = None
+        return txid
+
+    def _is_mine_tx(self, txid: str) -> bool:
+        tx = self.txs.get(txid)
+        if not tx:
+            return False
+        if any(self._addr_of(spk) in self.wallet for _v, spk in tx['vout']):
+            return True
+        return any(self._addr_of(self._prev_spk(p, n) or b'') in self.wallet for p, n, _s, _q in tx['vin'])
+
+    def _prev_spk(self, ptxid: str, n: int) -> Optional[bytes]:
+        prev = self.txs.get(ptxid)
+        if not prev or n >= len(prev['vout']):
+            return None
+        return prev['vout'][n][1]
+
+    def _decode(self, raw: bytes) -> Dict[str, Any]:
+        tx = parse_tx(raw)
+        vin = [{'txid': t, 'vout': n, 'scriptSig': {'hex': s.hex()}, 'sequence': q} for t, n, s, q in tx['vin']]
+        vout = []
+        for n, (value, spk) in enumerate(tx['vout']):
+            addr = self._addr_of(spk)
+            spk_d: Dict[str, Any] = {'hex': spk.hex(), 'type': 'pubkeyhash' if addr else 'nonstandard'}
+            if addr:
+                spk_d['reqSigs'] = 1
+                spk_d['addresses'] = [addr]
+            vout.append({'value': _coins(value), 'n': n, 'scriptPubKey': spk_d})
+        return {'txid': _dsha256(raw)[::-1].hex(), 'version': tx['version'], 'locktime': tx['locktime'],
+                'size': len(raw), 'vin': vin, 'vout': vout}
+
+    def _unspent_entry(self, key: Tuple[str, int], u: Dict[str, Any]) -> Dict[str, Any]:
+        return {'txid': key[0], 'vout': key[1], 'address': u['address'], 'account': self.wallet.get(u['address'], ''),
+                'scriptPubKey': u['script'].hex(), 'amount': _coins(u['value']), 'confirmations': self._confs(u['height'])}
+
+    # -- RPC methods --------------------------------------------------------
+
+    def rpc_getblockcount(self) -> int:
+        return self._height()
+
+    def rpc_getblockhash(self, height: int) -> str:
+        idx = int(height) - self.start_height
+        if idx < 0 or idx >= len(self.blocks):
+            raise FakeRpcError(-8, 'Block height out of range')
+        return self.blocks[idx]['hash']
+
+    def rpc_getbestblockhash(self) -> str:
+        return self._tip()['hash']
+
+    def rpc_getblock(self, blockhash: str, verbose: bool = True) -> Dict[str, Any]:
+        for blk in reversed(self.blocks):
+            if blk['hash'] == blockhash:
+                out = dict(blk)
+                out['tx'] = list(blk['tx'])
+                out['confirmations'] = self._confs(blk['height'])
+                return out
+        raise FakeRpcError(-5, 'Block not found')
+
+    def rpc_getinfo(self) -> Dict[str, Any]:
+        return {'version': 80000, 'blocks': self._height(), 'connections': self.peer_count,
+                'difficulty': Decimal('1234.5'), 'paytxfee': self.paytxfee, 'testnet': False}
+
+    def rpc_getrainbowproinfo(self) -> str:
+        return 'Rainbowpro fork height: %d, Transaction version after fork: %d' % (RAINBOWFORKHEIGHT, self.tx_version)
+
+    def rpc_getpeerinfo(self) -> List[Dict[str, Any]]:
+        return [{'addr': '10.0.0.%d:8888' % (i + 1), 'version': 80000, 'startingheight': self._height()}
+                for i in range(self.peer_count)]
+
+    def rpc_getconnectioncount(self) -> int:
+        return self.peer_count
+
+    def rpc_getdifficulty(self) -> Decimal:
+        return Decimal('1234.5')
+
+    def rpc_getrawmempool(self, verbose: bool = False) -> Any:
+        if verbose:
+            return {t: {'size': len(self.txs[t]['raw']), 'fee': _coins(self.txs[t]['fee']),
+                        'depends': [p for p, _n, _s, _q in self.txs[t]['vin'] if p in self.mempool]}
+                    for t in self.mempool}
+        return list(self.mempool.keys())
+
+    def rpc_getnewaddress(self, config_value: int = 274, account: str = '') -> str:
+        addr = self._new_address()
+        self.wallet[addr] = account or ''
+        self._script_for(addr)
+        return addr
+
+    def rpc_setaccount(self, address: str, account: str) -> None:
+        if address in self.wallet:
+            self.wallet[address] = account
+        return None
+
+    def rpc_validateaddress(self, address: str) -> Dict[str, Any]:
+        raw = b58decode(address) if isinstance(address, str) else None
+        if not raw or len(raw) != 36 or raw[0] != ADDR_VERSION:
+            return {'isvalid': False}
+        out = {'isvalid': True, 'address': address, 'ismine': address in self.wallet}
+        if address in self.wallet:
+            out['account'] = self.wallet[address]
+        return out
+
+    def rpc_walletpassphrase(self, passphrase: str, timeout: int) -> None:
+        return None
+
+    def rpc_listunspent(self, minconf: int = 1, maxconf: int = 9999999, addresses: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        want = set(addresses) if addresses else None
+        out = []
+        for key, u in self.utxos.items():
+            addr = u['address']
+            if addr not in self.wallet:
+                continue
+            if want is not None and addr not in want:
+                continue
+            c = self._confs(u['height'])
+            if minconf <= c <= maxconf:
+                out.append(self._unspent_entry(key, u))
+        return out
+
+    def rpc_gettxout(self, txid: str, n: int, include_mempool: bool = True) -> Optional[Dict[str, Any]]:
+        u = self.utxos.get((txid, int(n)))
+        if u is None or (u['height'] is None and not include_mempool):
+            return None
+        spk: Dict[str, Any] = {'hex': u['script'].hex(), 'type': 'pubkeyhash' if u['address'] else 'nonstandard'}
+        if u['address']:
+            spk['addresses'] = [u['address']]
+        return {'bestblock': self._tip()['hash'], 'confirmations': self._confs(u['height']),
+                'value': _coins(u['value']), 'scriptPubKey': spk, 'coinbase': False}
+
+    def rpc_createrawtransaction(self, inputs: List[Dict[str, Any]], outputs: Dict[str, Any]) -> str:
+        vin = [(i['txid'], int(i['vout']), b'', 0xffffffff) for i in inputs]
+        vout = [(_ding(v), self._script_for(a)) for a, v in outputs.items()]
+        return serialize_tx(self.tx_version, vin, vout).hex()
+
+    def rpc_decoderawtransaction(self, hex_tx: str) -> Dict[str, Any]:
+        try:
+            return self._decode(bytes.fromhex(hex_tx))
+        except Exception:
+            raise FakeRpcError(-22, 'TX decode failed')
+
+    def rpc_signrawtransaction(self, hex_tx: str, *args) -> Dict[str, Any]:
+        try:
+            tx = parse_tx(bytes.fromhex(hex_tx))
+        except Exception:
+            raise FakeRpcError(-22, 'TX decode failed')
+        vin = []
+        complete = True
+        for ptxid, n, script_sig, seq in tx['vin']:
+            u = self.utxos.get((ptxid, n))
+            if u is not None and u['address'] in self.wallet:
+                sig = hashlib.sha256(bytes.fromhex(ptxid) + struct.pack('<I', n)).digest()
+                script_sig = _push((sig * (self.sig_size // 32 + 1))[:self.sig_size])
+            else:
+                complete = complete and bool(script_sig)
+            vin.append((ptxid, n, script_sig, seq))
+        raw = serialize_tx(tx['version'], vin, tx['vout'], tx['locktime'])
+        return {'hex': raw.hex(), 'complete': complete}
+
+    def rpc_sendrawtransaction(self, hex_tx: str, *args) -> str:
+        try:
+            raw = bytes.fromhex(hex_tx)
+        except Exception:
+            raise FakeRpcError(-22, 'TX decode failed')
+        return self._accept(raw)
+
+    def rpc_gettransaction(self, txid: str) -> Dict[str, Any]:
+        if not self._is_mine_tx(txid):
+            raise FakeRpcError(-5, 'Invalid or non-wallet transaction id')
+        tx = self.txs[txid]
+        out: Dict[str, Any] = {'txid': txid, 'confirmations': self._confs(tx['block_height']),
+                               'time': tx['time'], 'hex': tx['raw'].hex(), 'fee': -_coins(tx['fee']),
+                               'details': self._details(txid)}
+        out['amount'] = sum((d['amount'] for d in out['details']), Decimal('0'))
+        if tx['block_height'] is not None:
+            out['blockhash'] = self.blocks[tx['block_height'] - self.start_height]['hash']
+            out['blocktime'] = self.blocks[tx['block_height'] - self.start_height]['time']
+        return out
+
+    def rpc_getrawtransaction(self, txid: str, verbose: int = 0) -> Any:
+        tx = self.txs.get(txid)
+        if tx is None:
+            raise FakeRpcError(-5, 'No information available about transaction')
+        if not verbose:
+            return tx['raw'].hex()
+        out = self._decode(tx['raw'])
+        out['hex'] = tx['raw'].hex()
+        out['confirmations'] = self._confs(tx['block_height'])
+        if tx['block_height'] is not None:
+            out['blockhash'] = self.blocks[tx['block_height'] - self.start_height]['hash']
+        return out
+
+    def _details(self, txid: str) -> List[Dict[str, Any]]:
+        tx = self.txs[txid]
+        from_me = any(self._addr_of(self._prev_spk(p, n) or b'') in self.wallet for p, n, _s, _q in tx['vin'])
+        details = []
+        for n, (value, spk) in enumerate(tx['vout']):
+            addr = self._addr_of(spk)
+            mine = addr in self.wallet
+            if from_me and not mine:
+                details.append({'account': '', 'address': addr, 'category': 'send', 'amount': -_coins(value), 'vout': n})
+            elif mine:
+                details.append({'account': self.wallet.get(addr, ''), 'address': addr, 'category': 'receive',
+                                'amount': _coins(value), 'vout': n})
+        return details
+
+    def _wallet_entries(self, after_height: Optional[int] = None) -> List[Dict[str, Any]]:
+        entries = []
+        for txid in sorted((t for t in self.txs if self._is_mine_tx(t)), key=lambda t: self.txs[t]['seq']):
+            tx = self.txs[txid]
+            if after_height is not None and tx['block_height'] is not None and tx['block_height'] <= after_height:
+                continue
+            for d in self._details(txid):
+                e = dict(d)
+                e.update({'txid': txid, 'confirmations': self._confs(tx['block_height']), 'time': tx['time']})
+                if tx['block_height'] is not None:
+                    e['blockhash'] = self.blocks[tx['block_height'] - self.start_height]['hash']
+                entries.append(e)
+        return entries
+
+    def rpc_listtransactions(self, account: str = '*', count: int = 10, skip: int = 0) -> List[Dict[str, Any]]:
+        entries = self._wallet_entries()
+        end = len(entries) - int(skip)
+        start = max(0, end - int(count))
+        return entries[start:max(0, end)]
+
+    def rpc_listsinceblock(self, blockhash: str = '', target_confirmations: int = 1) -> Dict[str, Any]:
+        after = None
+        if blockhash:
+            heights = [b['height'] for b in self.blocks if b['hash'] == blockhash]
+            if not heights:
+                raise FakeRpcError(-5, 'Block not found')
+            after = heights[0]
+        last = self.blocks[max(0, len(self.blocks) - max(1, int(target_confirmations)))]['hash']
+        return {'transactions': self._wallet_entries(after), 'lastblock': last}
+
+    def rpc_getreceivedbyaddress(self, address: str, minconf: int = 1) -> Decimal:
+        total = 0
+        spk = address_script(address)
+        for tx in self.txs.values():
+            if self._confs(tx['block_height']) < minconf:
+                continue
+            total += sum(v for v, s in tx['vout'] if s == spk)
+        return _coins(total)
+
+    def rpc_sendtoaddress(self, address: str, amount: Any) -> str:
+        want = _ding(amount)
+        fee = _ding(self.paytxfee)
+        selected, total = [], 0
+        for key, u in list(self.utxos.items()):
+            if u['address'] in self.wallet and u['height'] is not None:
+                selected.append(key)
+                total += u['value']
+                if total >= want + fee:
+                    break
+        if total < want + fee:
+            raise FakeRpcError(-6, 'Insufficient funds')
+        vout = [(want, self._script_for(address))]
+        if total - want - fee >= self.dust_ding:
+            vout.append((total - want - fee, self._script_for(self.rpc_getnewaddress())))
+        vin = [(t, n, b'', 0xffffffff) for t, n in selected]
+        signed = self.rpc_signrawtransaction(serialize_tx(self.tx_version, vin, vout).hex())
+        return self._accept(bytes.fromhex(signed['hex']))
+
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, Decimal):
+        return float(o)
+    raise TypeError(repr(o))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    p = argparse.ArgumentParser(description='Deterministic fake ABCMint JSON-RPC node')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=int(os.environ.get('ABCMINT_RPC_PORT', '18332')))
+    p.add_argument('--user', default=os.environ.get('ABCMINT_RPC_USER', ''))
+    p.add_argument('--password', default=os.environ.get('ABCMINT_RPC_PASSWORD', ''))
+    p.add_argument('--seed', type=int, default=1)
+    p.add_argument('--block-interval', type=float, default=0.0, help='mine a block every N seconds (0 = on demand only)')
+    p.add_argument('--latency', type=float, default=0.0, help='per-call latency in seconds')
+    p.add_argument('--failure-rate', type=float, default=0.0)
+    p.add_argument('--fund', action='append', default=[], help='ADDRESS:AMOUNT paid and confirmed at startup')
+    args = p.parse_args(argv)
+    node = FakeAbcmintNode(seed=args.seed, default_latency=args.latency, failure_rate=args.failure_rate)
+    for spec in args.fund:
+        addr, amt = spec.rsplit(':', 1)
+        node.fund(addr, amt, confirmations=1)
+    host, port = node.serve(args.host, args.port, args.user, args.password)
+    if args.block_interval > 0:
+        node.start_mining(args.block_interval)
+    print('fake ABCMint node listening on %s:%d' % (host, port))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        node.stop()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
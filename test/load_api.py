@@ -0,0 +1,251 @@
+"""
+HTTP load generator for the Flask API backed by the fake node.
+
+Simulates browser sessions that each create a job and then poll
+/api/mix/status, /api/system/status and /api/mix/quote at the UI's rates
+(5 s, 10 s and slider bursts), against `service.app` served by waitress.
+Reports requests/sec, p50/p95/p99 latency and RPCs triggered per HTTP request
+for each endpoint, once per waitress thread count in --threads:
+
+    python test/load_api.py --sessions 50 --duration 30 --threads 2,4,8 --speedup 5
+
+--speedup divides the UI intervals so fewer sessions generate the same load.
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+import http.client
+from collections import Counter, defaultdict
+from decimal import Decimal
+from typing import Any, Dict, List
+
+here = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(here)
+if base_dir not in sys.path:
+    sys.path.insert(0, base_dir)
+if here not in sys.path:
+    sys.path.insert(0, here)
+
+import fake_abcmint_node as fake
+from bench_mixing_service import percentile, _configure_env
+
+UI_INTERVALS = {
+    'status': 5.0,
+    'system': 10.0,
+    'quote': 20.0,
+}
+
+
+class _CountingRpc:
+    """In-process transport that attributes node calls to the HTTP endpoint being served."""
+
+    def __init__(self, node, tracing):
+        self.node = node
+        self.tracing = tracing
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.by_endpoint: Counter = Counter()
+
+    def call(self, method, params=None):
+        self.tracing.count_rpc(method)
+        ep = getattr(self.local, 'endpoint', None)
+        if ep is not None:
+            with self.lock:
+                self.by_endpoint[ep] += 1
+        return self.node.call(method, params)
+
+
+class _Session(threading.Thread):
+    def __init__(self, idx: int, port: int, args, stop_at: float, record, node):
+        super().__init__(daemon=True)
+        self.idx = idx
+        self.port = port
+        self.args = args
+        self.stop_at = stop_at
+        self.record = record
+        self.node = node
+        self.rng = random.Random(args.seed * 1000 + idx)
+
+    def _req(self, conn, name: str, method: str, path: str, body: Any = None):
+        data = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if data else {}
+        t0 = time.perf_counter()
+        try:
+            conn.request(method, path, body=data, headers=headers)
+            resp = conn.getresponse()
+            payload = resp.read()
+            status = resp.status
+        except Exception:
+            conn.close()
+            payload, status = b'', 0
+        self.record(name, time.perf_counter() - t0, status)
+        try:
+            return json.loads(payload.decode('utf-8')) if payload else None
+        except Exception:
+            return None
+
+    def run(self) -> None:
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        with self.node.lock:
+            target = self.node._new_address()
+        job = self._req(conn, 'request', 'POST', '/api/mix/request',
+                        {'amount': 10.0, 'targetAddress': target, 'shards': 3, 'hops': 1}) or {}
+        job_id = job.get('jobId')
+        if job_id and self.args.fund:
+            self.node.fund(job['depositAddress'], job['depositRequired'])
+        scale = max(1e-3, self.args.speedup)
+        now = time.time()
+        due = {k: now + self.rng.uniform(0, v / scale) for k, v in UI_INTERVALS.items()}
+        while True:
+            k = min(due, key=due.get)
+            wait = due[k] - time.time()
+            if due[k] >= self.stop_at:
+                break
+            if wait > 0:
+                time.sleep(wait)
+            if k == 'status' and job_id:
+                self._req(conn, 'status', 'GET', '/api/mix/status?jobId=' + job_id)
+            elif k == 'system':
+                self._req(conn, 'system', 'GET', '/api/system/status')
+            elif k == 'quote':
+                # slider drag: a short burst of quotes for neighbouring amounts
+                for _ in range(self.rng.randint(1, 4)):
+                    amt = round(self.rng.uniform(1, 200), 2)
+                    self._req(conn, 'quote', 'POST', '/api/mix/quote',
+                              {'amount': amt, 'shards': self.rng.choice((3, 5, 8)), 'hops': self.rng.choice((1, 2, 3))})
+            due[k] += UI_INTERVALS[k] / scale * self.rng.uniform(0.9, 1.1)
+        conn.close()
+
+
+def _serve(app, threads: int):
+    from waitress import create_server
+    server = create_server(app, host='127.0.0.1', port=0, threads=threads)
+    threading.Thread(target=server.run, daemon=True).start()
+    return server, server.effective_port
+
+
+def run_load(args, threads: int, app, rpc: _CountingRpc, node) -> Dict[str, Any]:
+    lat: Dict[str, List[float]] = defaultdict(list)
+    codes: Dict[str, Counter] = defaultdict(Counter)
+    lock = threading.Lock()
+
+    def record(name, dt, status):
+        with lock:
+            lat[name].append(dt)
+            codes[name][status] += 1
+
+    server, port = _serve(app, threads)
+    with rpc.lock:
+        rpc.by_endpoint.clear()
+    node_calls0 = sum(node.calls.values())
+    t0 = time.time()
+    stop_at = t0 + args.duration
+    sessions = [_Session(i, port, args, stop_at, record, node) for i in range(args.sessions)]
+    for s in sessions:
+        s.start()
+        if args.ramp > 0:
+            time.sleep(args.ramp / max(1, args.sessions))
+    for s in sessions:
+        s.join(args.duration + 60)
+    wall = time.time() - t0
+    server.close()
+
+    endpoints = {}
+    total = 0
+    for name, vals in lat.items():
+        total += len(vals)
+        ep_rpc = rpc.by_endpoint.get(name, 0)
+        endpoints[name] = {
+            'requests': len(vals),
+            'rps': round(len(vals) / wall, 2),
+            'p50_ms': round(percentile(vals, 50) * 1000, 2),
+            'p95_ms': round(percentile(vals, 95) * 1000, 2),
+            'p99_ms': round(percentile(vals, 99) * 1000, 2),
+            'errors': sum(c for st, c in codes[name].items() if st == 0 or st >= 500),
+            'rpc_per_request': round(ep_rpc / max(1, len(vals)), 2),
+        }
+    return {
+        'threads': threads,
+        'sessions': args.sessions,
+        'wall_sec': round(wall, 3),
+        'requests': total,
+        'rps': round(total / wall, 2),
+        'node_rpc_total': sum(node.calls.values()) - node_calls0,
+        'endpoints': endpoints,
+    }
+
+
+def recommend_threads(runs: List[Dict[str, Any]], slo_ms: float) -> Any:
+    """Smallest thread count whose status/system p99 meet the SLO and rps is within 5% of the best."""
+    if not runs:
+        return None
+    best_rps = max(r['rps'] for r in runs)
+    for r in sorted(runs, key=lambda r: r['threads']):
+        p99 = max([e['p99_ms'] for n, e in r['endpoints'].items() if n in ('status', 'system')] or [0])
+        if p99 <= slo_ms and r['rps'] >= best_rps * 0.95:
+            return r['threads']
+    return None
+
+
+def _parse_args(argv):
+    import argparse
+    p = argparse.ArgumentParser(description='Flask API load test against the fake node')
+    p.add_argument('--sessions', type=int, default=25)
+    p.add_argument('--duration', type=float, default=20.0)
+    p.add_argument('--threads', default='4', help='comma separated waitress thread counts to sweep')
+    p.add_argument('--speedup', type=float, default=1.0, help='divide UI poll intervals by this factor')
+    p.add_argument('--ramp', type=float, default=1.0, help='seconds over which sessions start')
+    p.add_argument('--fund', action='store_true', help='fund deposits so jobs progress during the run')
+    p.add_argument('--block-interval', type=float, default=1.0)
+    p.add_argument('--poll', type=float, default=0.5)
+    p.add_argument('--required-conf', type=int, default=2)
+    p.add_argument('--rpc-latency', type=float, default=0.002, help='simulated per-RPC latency (s)')
+    p.add_argument('--slo-ms', type=float, default=250.0)
+    p.add_argument('--seed', type=int, default=1)
+    p.add_argument('--out', default=None)
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv if argv is not None else sys.argv[1:])
+    node = fake.FakeAbcmintNode(seed=args.seed, default_latency=args.rpc_latency)
+    _configure_env(args, tempfile.mkdtemp(prefix='abcmint-load-'))
+    from service.app import app, service
+    from service.mixing_service import tracing
+    rpc = _CountingRpc(node, tracing)
+    service.rpc = rpc
+    service.iface.jsonRpc = rpc
+
+    @app.before_request
+    def _tag_endpoint():
+        from flask import request
+        path = request.path
+        name = {'/api/mix/status': 'status', '/api/system/status': 'system',
+                '/api/mix/quote': 'quote', '/api/mix/request': 'request'}.get(path, path)
+        rpc.local.endpoint = name
+
+    @app.teardown_request
+    def _untag_endpoint(exc):
+        rpc.local.endpoint = None
+
+    node.start_mining(args.block_interval)
+    runs = []
+    for t in [int(x) for x in args.threads.split(',') if x.strip()]:
+        runs.append(run_load(args, t, app, rpc, node))
+    node.stop()
+    res = {'meta': {k: v for k, v in vars(args).items() if k != 'out'}, 'runs': runs,
+           'recommended_threads': recommend_threads(runs, args.slo_ms)}
+    text = json.dumps(res, indent=2, sort_keys=True, default=lambda o: float(o) if isinstance(o, Decimal) else str(o))
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -56,4 +56,46 @@ def test_query_utxo_set():
     txidbin = bytes.fromhex('00'*32)
     res = iface.query_utxo_set((txidbin, 0), includeconfs=True)
     assert isinstance(res, list)
-    assert res[0]['value'] == int(0.0001 * 1e8)
\ No newline at end of file
+    assert res[0]['value'] == int(0.0001 * 1e8)
+
+# addresses from the ABCMint chain (service defaults and scripts in this repo)
+REAL_ADDRESSES = ['8P3aFLXr9F6BPvzC6yR4fTiD4RzFT3wJbjhyMn5uJ1ZFARTRb',
+                  '84LEUEGGvnZwnSSTpAfu7gS8b9Sey3yqTVyk69ppafLJkoqgA',
+                  '8CdFhjZBNLH714wjLFipebQvBVUxio4eCh5XaLQHpheJUyG9R']
+
+
+class CountingRpc(DummyRpc):
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    def call(self, method, params):
+        if method == 'validateaddress':
+            self.calls += 1
+            if self.fail:
+                raise ConnectionRefusedError('node down')
+            return {'isvalid': True, 'ismine': params[0] == REAL_ADDRESSES[0]}
+        return DummyRpc.call(self, method, params)
+
+
+def test_real_chain_addresses_pass_the_structural_filter():
+    assert all(abcmint_interface.address_wellformed(a) for a in REAL_ADDRESSES)
+    good = REAL_ADDRESSES[1]
+    for bad in (good[:-1], good + '1', '0' + good[1:], good.replace('L', 'l'), '', 42):
+        assert not abcmint_interface.address_wellformed(bad)
+
+
+def test_node_decides_and_answers_are_cached():
+    rpc = CountingRpc()
+    iface = ABCmintBlockchainInterface(rpc, '')
+    assert all(iface.is_valid_address(a) for a in REAL_ADDRESSES * 3)
+    assert rpc.calls == 3
+    # malformed input never reaches the node
+    assert iface.is_valid_address('x' * 40) is False and rpc.calls == 3
+    assert iface.validate_address(REAL_ADDRESSES[0])['ismine'] and rpc.calls == 3
+
+
+def test_unreachable_node_is_unknown_not_valid():
+    iface = ABCmintBlockchainInterface(CountingRpc(fail=True), '')
+    assert iface.is_valid_address(REAL_ADDRESSES[0]) is None
+    assert iface.is_valid_address('not-an-abcmint-address') is False
@@ -0,0 +1,23 @@
+import os
+import importlib.util
+
+_mod_path = os.path.join(os.path.dirname(__file__), 'bench_mixing_service.py')
+spec = importlib.util.spec_from_file_location('bench_mixing_service', os.path.abspath(_mod_path))
+bench = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench)
+
+
+def test_percentile_nearest_rank():
+    vals = [float(i) for i in range(1, 101)]
+    assert bench.percentile(vals, 50) == 50.0
+    assert bench.percentile(vals, 99) == 99.0
+    assert bench.percentile([], 50) is None
+
+
+def test_compare_flags_regressions_by_direction():
+    base = {'summary': {'jobs_per_hour': 1000.0, 'rpc_per_job': 100.0, 'p99_mixing_step2': 2.0}}
+    cur = {'summary': {'jobs_per_hour': 850.0, 'rpc_per_job': 60.0, 'p99_mixing_step2': 2.1}}
+    rows = {r['metric']: r for r in bench.compare_results(cur, base, tolerance=0.1)}
+    assert rows['jobs_per_hour']['regression']
+    assert not rows['rpc_per_job']['regression']
+    assert not rows['p99_mixing_step2']['regression']
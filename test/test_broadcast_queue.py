@@ -0,0 +1,49 @@
+import os
+import time
+import threading
+import importlib.util
+
+import pytest
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+bq = _load(os.path.join(here, '..', 'service', 'broadcast_queue.py'), 'broadcast_queue')
+
+
+def test_finals_go_out_before_hops_and_fanouts():
+    q = bq.BroadcastQueue(rate=0, workers=1)
+    gate = threading.Event()
+    order = []
+    first = q.submit('step1', gate.wait, 5)
+    time.sleep(0.05)
+    futs = [q.submit(kind, order.append, kind) for kind in ('step1', 'fanout', 'hop', 'final', 'hop')]
+    assert q.stats()['depth'] == 5 and q.stats()['depth_by_kind'] == {'step1': 1, 'fanout': 1, 'hop': 2, 'final': 1}
+    gate.set()
+    for f in [first] + futs:
+        f.result(5)
+    assert order == ['final', 'hop', 'hop', 'fanout', 'step1']
+
+
+def test_rate_ceiling_errors_and_backpressure():
+    q = bq.BroadcastQueue(rate=20, burst=1, workers=2, max_depth=3)
+
+    def send(n):
+        if n == 3:
+            raise RuntimeError('rejected')
+        return 'tx%d' % n
+    t0 = time.monotonic()
+    futs = [q.submit('hop', send, n) for n in range(8)]
+    with pytest.raises(RuntimeError):
+        futs[3].result(5)
+    assert [f.result(5) for i, f in enumerate(futs) if i != 3] == ['tx%d' % n for n in range(8) if n != 3]
+    # 8 sends at 20/s with no burst: at least 7 intervals
+    assert time.monotonic() - t0 >= 0.3
+    st = q.stats()
+    assert st['sent'] == 7 and st['failed'] == 1 and st['depth'] == 0 and st['peak_depth'] <= 3
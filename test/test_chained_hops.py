@@ -0,0 +1,145 @@
+import os
+import sys
+from decimal import Decimal
+from datetime import datetime
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+fake = _load(os.path.join(here, 'fake_abcmint_node.py'), 'fake_abcmint_node')
+
+
+def _service(node):
+    svc = mixing_service.MixingService.__new__(mixing_service.MixingService)
+    svc.iface = mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, '')
+    svc.addr_pool = []
+    svc.rawtx = mixing_service.rawtx.RawTxBuilder()
+    return svc
+
+
+def _chain(svc, node, sends):
+    src = svc._get_address()
+    txid = node.fund(src, '5', confirmations=1)
+    prev = svc._entry_outpoint({'address': src, 'txid': txid, 'amount': Decimal('5')})
+    out = [prev]
+    for _ in range(sends):
+        prev = svc._send_from_outpoint(prev, prev['value'] - Decimal('0.01'), Decimal('0.01'), svc._get_address())
+        out.append(prev)
+    return out
+
+
+def test_chained_hops_respect_ancestor_limit():
+    os.environ.update({'MEMPOOL_ANCESTOR_LIMIT': '3', 'CONF_POLL_INTERVAL_SEC': '0.01', 'TX_FEE_PER_TX': '0.01'})
+    node = fake.FakeAbcmintNode(seed=3, ancestor_limit=3)
+    svc = _service(node)
+    node.start_mining(0.05)
+    try:
+        node.reset_stats()
+        chain = _chain(svc, node, 6)
+    finally:
+        node.stop()
+        for k in ('MEMPOOL_ANCESTOR_LIMIT', 'CONF_POLL_INTERVAL_SEC', 'TX_FEE_PER_TX'):
+            os.environ.pop(k, None)
+    assert node.calls['listunspent'] == 1
+    assert max(p['depth'] for p in chain) <= 3
+    assert node.calls['gettransaction'] >= 1
+    assert chain[-1]['value'] == Decimal('4.94')
+    assert node.utxos[(chain[-1]['txid'], chain[-1]['vout'])]['value'] == 494000000
+
+
+def test_chain_limit_rejection_waits_for_parent():
+    os.environ.update({'MEMPOOL_ANCESTOR_LIMIT': '0', 'CONF_POLL_INTERVAL_SEC': '0.01', 'TX_FEE_PER_TX': '0.01'})
+    node = fake.FakeAbcmintNode(seed=4, ancestor_limit=2)
+    svc = _service(node)
+    node.start_mining(0.05)
+    try:
+        chain = _chain(svc, node, 4)
+        node.fail_next('sendrawtransaction', 'bad-txns-inputs-spent', code=-26)
+        try:
+            svc._send_from_outpoint(chain[-1], Decimal('1'), Decimal('0.01'), svc._get_address())
+            raised = False
+        except Exception:
+            raised = True
+    finally:
+        node.stop()
+        for k in ('MEMPOOL_ANCESTOR_LIMIT', 'CONF_POLL_INTERVAL_SEC', 'TX_FEE_PER_TX'):
+            os.environ.pop(k, None)
+    assert len(chain) == 5 and raised
+
+
+def test_fanouts_chain_from_mix_change():
+    os.environ.update({'MINCONF_STEP2': '1', 'MINCONF_SHARD': '0', 'TX_FEE_PER_TX': '0.01'})
+    node = fake.FakeAbcmintNode(seed=5)
+    svc = _service(node)
+    svc._save_state = lambda: None
+    mix_addr = svc._get_address()
+    txid = node.fund(mix_addr, '10', confirmations=1)
+    with node.lock:
+        target = node._new_address()
+    job = mixing_service.MixJob(job_id='j', target_address=target, amount=Decimal('10'), deposit_address='8D',
+                                shard_count=4, hop_count=2,
+                                mix_outpoint={'txid': txid, 'vout': 0, 'value': '10', 'depth': 0})
+    node.reset_stats()
+    try:
+        svc._execute_sharded_hops(job, mix_addr)
+    finally:
+        for k in ('MINCONF_STEP2', 'MINCONF_SHARD', 'TX_FEE_PER_TX'):
+            os.environ.pop(k, None)
+    assert len(job.shard_txids_fanout) == 4 and len(job.shard_txids_final) == 4
+    assert all(len(h) == 2 for h in job.shard_txids_hops)
+    assert job.shard_outpoints == [None] * 4 and job.mix_outpoint is None
+    assert node.calls['listunspent'] == 0
+    delivered = sum(u['value'] for u in node.utxos.values() if u['address'] == target)
+    assert delivered == 1000000000 - 16 * 1000000
+
+
+def test_lost_lease_stops_hop_broadcasts():
+    node = fake.FakeAbcmintNode(seed=5)
+    svc = _service(node)
+    job = mixing_service.MixJob(job_id='j1', target_address='8T', amount=Decimal('1'), deposit_address='8D')
+    src = svc._get_address()
+    prev = svc._entry_outpoint({'address': src, 'txid': node.fund(src, '5', confirmations=1), 'amount': Decimal('5')})
+    with mixing_service.tracing.bind(job):
+        prev = svc._send_from_outpoint(prev, Decimal('4.9'), Decimal('0.01'), svc._get_address())
+        # the guardian noticed the lease expired while this thread was busy
+        svc._lost = {'j1'}
+        node.reset_stats()
+        try:
+            svc._send_from_outpoint(prev, Decimal('4.8'), Decimal('0.01'), svc._get_address())
+            assert False, 'broadcast after the lease was lost'
+        except mixing_service.LeaseLost:
+            pass
+    assert node.calls['sendrawtransaction'] == 0
+
+
+def test_reused_target_finals_belong_to_their_job():
+    node = fake.FakeAbcmintNode(seed=9, start_time=1700000000)
+    svc = _service(node)
+    svc.jobs = {}
+    target = node._new_address()
+    node.fund(svc._get_address(), '10', confirmations=1)
+    old = node.rpc_sendtoaddress(target, '1')
+    node.generate(1)
+    first = mixing_service.MixJob(job_id='a', target_address=target, amount=Decimal('1'), deposit_address='d1',
+                                  shard_count=1, shard_txids_fanout=['fa'], shard_txids_final=[old],
+                                  created_at=datetime.fromtimestamp(1700000000 - 600))
+    second = mixing_service.MixJob(job_id='b', target_address=target, amount=Decimal('1'), deposit_address='d2',
+                                   shard_count=1, created_at=datetime.fromtimestamp(1700000000 + 30))
+    svc.jobs = {'a': first, 'b': second}
+    # not fanned out yet: nothing at the target is this job's
+    assert svc.final_txids_seen(second) == []
+    second.shard_txids_fanout = ['fb']
+    # the earlier send predates the job and belongs to the first one
+    assert svc.final_txids_seen(second) == []
+    assert svc.final_txids_seen(first) == [old]
+    new = node.rpc_sendtoaddress(target, '1')
+    assert svc.final_txids_seen(second) == [new]
+    assert svc.final_txids_seen(first) == [old]
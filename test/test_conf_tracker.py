@@ -0,0 +1,69 @@
+import os
+from decimal import Decimal
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+fake = _load(os.path.join(here, 'fake_abcmint_node.py'), 'fake_abcmint_node')
+ct = mixing_service.conf_tracker
+
+
+def _setup(seed):
+    node = fake.FakeAbcmintNode(seed=seed)
+    tracker = ct.ConfirmationTracker(mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, ''))
+    tracker.on_block(node.call('getblockcount', []))
+    return node, tracker
+
+
+def test_one_block_fetch_confirms_every_watched_txid():
+    node, tracker = _setup(44)
+    addrs = [node.call('getnewaddress', []) for _ in range(30)]
+    txids = [node.fund(a, Decimal('1')) for a in addrs]
+    for i, t in enumerate(txids):
+        tracker.watch(t, 'job%d' % (i % 10))
+    node.reset_stats()
+    node.generate(3)
+    tracker.on_block(node.call('getblockcount', []))
+    assert node.calls['getblock'] == 3 and node.calls['gettransaction'] == 0
+    assert [tracker.confirmations(t) for t in txids] == [3] * 30
+    node.generate(2)
+    tracker.on_block(node.call('getblockcount', []))
+    assert tracker.wait(txids[0], 5, 0) == 5 and node.calls['getblock'] == 5
+    # registered after its block was seen, or mined before we looked
+    late = node.fund(addrs[0], Decimal('2'), confirmations=1)
+    tracker.on_block(node.call('getblockcount', []))
+    tracker.watch(late, 'job0')
+    assert tracker.confirmations(late) == 1 and node.calls['gettransaction'] == 0
+    tracker.watch(txids[0], seed=True)
+    assert node.calls['gettransaction'] == 0
+    tracker.forget_owner('job0')
+    assert late not in tracker.heights and txids[0] not in tracker.heights and len(tracker.heights) == 27
+
+
+def test_reorg_rewinds_confirmations():
+    node, tracker = _setup(45)
+    t = node.fund(node.call('getnewaddress', []), Decimal('1'))
+    tracker.watch(t)
+    node.generate(1)
+    tracker.on_block(node.call('getblockcount', []))
+    assert tracker.confirmations(t) == 1
+    # replace the tip with a block without the transaction
+    with node.lock:
+        node.blocks.pop()
+        node.txs[t]['block_height'] = None
+        node.mempool[t] = None
+        node._append_block([])
+        node._append_block([])
+    tracker.on_block(node.call('getblockcount', []))
+    assert tracker.confirmations(t) == 0 and tracker.heights[t] is None
+    node.generate(1)
+    tracker.on_block(node.call('getblockcount', []))
+    assert tracker.confirmations(t) == 1
@@ -0,0 +1,79 @@
+import os
+import sys
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+fake = _load(os.path.join(here, 'fake_abcmint_node.py'), 'fake_abcmint_node')
+abci = mixing_service.abcmint_iface
+
+
+def _txs(node):
+    with node.lock:
+        a, b = node._new_address(), node._new_address()
+    vin = [('%064x' % 7, 1, fake._push(b'\x01' * 3000), 0xffffffff)]
+    vout = [(150000000, node._script_for(a)), (2500, node._script_for(b))]
+    ok = fake.serialize_tx(101, vin, vout).hex()
+    locked = fake.serialize_tx(101, vin, vout, 5).hex()
+    odd = fake.serialize_tx(101, vin, [(1000, b'\x51\x52\x93')]).hex()
+    return ok, locked, odd
+
+
+def test_local_decode_matches_node():
+    node = fake.FakeAbcmintNode(seed=31)
+    for h in _txs(node):
+        local = abci.decode_tx_local(h)
+        ref = node.call('decoderawtransaction', [h])
+        assert local['txid'] == ref['txid'] and local['version'] == ref['version']
+        assert local['locktime'] == ref['locktime'] and local['size'] == len(h) // 2
+        assert [i['sequence'] for i in local['vin']] == [i['sequence'] for i in ref['vin']]
+        assert [o['value'] for o in local['vout']] == [o['value'] for o in ref['vout']]
+    assert abci.decode_tx_local('00ff') is None
+
+
+def test_pool_checks_match_inline_and_fall_back_to_node(monkeypatch):
+    # pin the local policy: other tests change these process-wide
+    monkeypatch.setenv('ABCMINT_TX_VERSION_MODE', 'postfork')
+    monkeypatch.setenv('ABCMINT_TX_REQUIRE_FINALITY', 'true')
+    monkeypatch.delenv('ABCMINT_TX_ALLOWED_VERSIONS', raising=False)
+    monkeypatch.delenv('TX_FEE_PER_TX', raising=False)
+    monkeypatch.delenv('ABCMINT_CPU_WORKERS', raising=False)
+    # workers import the interface by module name: use the copy registered last
+    abci = sys.modules['abcmint_interface']
+    node = fake.FakeAbcmintNode(seed=32)
+    iface = abci.ABCmintBlockchainInterface(node, '')
+    txs = list(_txs(node)) * 3
+    inline = iface.check_transactions(txs)
+    node.reset_stats()
+    monkeypatch.setenv('ABCMINT_CPU_WORKERS', '2')
+    try:
+        pooled = iface.check_transactions(txs)
+        assert abci._cpu['pool'] is not None
+        iface._enforce_tx_protections(txs[0])
+        sizes = iface.tx_sizes_and_fees(txs[:2])
+    finally:
+        monkeypatch.delenv('ABCMINT_CPU_WORKERS', raising=False)
+        abci.shutdown_cpu_pool()
+    assert pooled == inline == [None, 'finality enforcement failed', 'nonstandard script rejected'] * 3
+    # only the script the local decoder cannot classify went to the node
+    assert node.calls['decoderawtransaction'] <= 1
+    assert sizes[0][0] == len(txs[0]) // 2 and sizes[0][1] > 0
+
+
+def test_service_modules_are_registered_under_the_package():
+    ms = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+    for name in ('rawtx', 'tracing', 'fee_model', 'tx_cache'):
+        assert sys.modules['service.' + name] is getattr(ms, name)
+        assert sys.modules.get(name) is not getattr(ms, name)
+    if os.path.abspath(os.path.join(here, '..')) not in map(os.path.abspath, sys.path):
+        sys.path.insert(0, os.path.abspath(os.path.join(here, '..')))
+    from service import fee_model
+    assert fee_model is ms.fee_model
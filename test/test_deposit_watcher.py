@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from decimal import Decimal
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+fake = _load(os.path.join(here, 'fake_abcmint_node.py'), 'fake_abcmint_node')
+dw = mixing_service.deposit_watcher
+
+
+def _iface(node):
+    return mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, '')
+
+
+def test_one_tick_covers_a_thousand_deposits_in_a_few_rpcs():
+    node = fake.FakeAbcmintNode(seed=41)
+    watcher = dw.DepositWatcher(_iface(node), interval=60, chunk=400)
+    addrs = [node.call('getnewaddress', []) for _ in range(1000)]
+    for i, a in enumerate(addrs):
+        watcher.index[a] = dw._Watch('j%d' % i)
+    node.fund(addrs[999], Decimal('7'), confirmations=2)
+    node.fund(addrs[3], Decimal('0.5'), confirmations=1)
+    node.fund(addrs[3], Decimal('2'))
+    node.reset_stats()
+    credits = watcher.poll()
+    assert node.calls['listunspent'] == 3 and sum(node.calls.values()) == 3
+    assert credits[addrs[3]] == {'total': Decimal('2.5'), 'ready': 1, 'utxos': 2}
+    assert credits[addrs[999]]['total'] == Decimal('7') and credits[addrs[0]]['total'] == 0
+    assert watcher.wait(addrs[999], 0) == credits[addrs[999]] and watcher.wait(addrs[999], 0) is None
+    # a node without the address filter gets one unfiltered listunspent per tick
+    node.fail_next('listunspent', 'Expected type array', -3)
+    plain = dw.DepositWatcher(_iface(node), chunk=400)
+    plain.index = dict(watcher.index)
+    node.reset_stats()
+    assert plain.poll() == credits and plain.poll() == credits
+    assert plain.stats()['filtered'] is False and node.calls['listunspent'] == 3
+
+
+def test_monitors_wait_on_the_shared_watcher(tmp_path):
+    os.environ.update(LOCALAPPDATA=str(tmp_path), DEPOSIT_POLL_INTERVAL_SEC='0.1')
+    try:
+        node = fake.FakeAbcmintNode(seed=42)
+        svc = mixing_service.MixingService.__new__(mixing_service.MixingService)
+        svc.jobs, svc.monitors, svc.lock = {}, {}, threading.Lock()
+        svc._init_store()
+        svc.iface = _iface(node)
+        started = []
+        svc._execute_mixing = started.append
+        for i in range(20):
+            addr = node.call('getnewaddress', [])
+            svc.jobs['j%d' % i] = mixing_service.MixJob(job_id='j%d' % i, target_address='8T', amount=Decimal(1),
+                                                       deposit_address=addr, deposit_required=Decimal('1.1'))
+            svc._spawn(svc._monitor_deposit, 'j%d' % i)
+        for job in svc.jobs.values():
+            node.fund(job.deposit_address, Decimal('1.1'))
+        deadline = time.time() + 10
+        while time.time() < deadline and any(j.status != 'deposit_received' for j in svc.jobs.values()):
+            time.sleep(0.05)
+        assert started == []
+        node.generate(1)
+        while time.time() < deadline and len(started) < 20:
+            time.sleep(0.05)
+        assert sorted(started) == sorted(svc.jobs) and svc.deposits.index == {}
+        ticks = svc.deposits.ticks
+        # one listunspent per tick for all twenty jobs, plus one spent-deposit check each at start
+        # (re-polled only when the deposit shows up between the two)
+        assert node.calls['getreceivedbyaddress'] <= 20
+        assert ticks <= node.calls['listunspent'] <= ticks + node.calls['getreceivedbyaddress']
+    finally:
+        for k in ('LOCALAPPDATA', 'DEPOSIT_POLL_INTERVAL_SEC'):
+            os.environ.pop(k, None)
+
+
+def test_walletnotify_credits_the_owning_job_at_once():
+    node = fake.FakeAbcmintNode(seed=43)
+    svc = mixing_service.MixingService.__new__(mixing_service.MixingService)
+    svc.iface = _iface(node)
+    svc.deposits = dw.DepositWatcher(svc.iface, interval=60)
+    addrs = [node.call('getnewaddress', []) for _ in range(3)]
+    for i, a in enumerate(addrs):
+        svc.deposits.index[a] = dw._Watch('j%d' % i)
+    txid = node.fund(addrs[1], Decimal('4'))
+    node.reset_stats()
+    assert svc.wallet_notify(txid) == {'txid': txid, 'jobs': ['j1']}
+    assert node.calls['gettransaction'] == 1 and node.calls['listunspent'] == 1
+    assert svc.deposits.wait(addrs[1], 0) == {'total': Decimal('4'), 'ready': 0, 'utxos': 1}
+    assert svc.deposits.wait(addrs[0], 0) is None and svc.deposits.notified_at > 0
+    # the next block re-credits only the deposit waiting for a confirmation
+    node.generate(1)
+    svc.deposits.on_block(0)
+    assert svc.deposits.wait(addrs[1], 0)['ready'] == 1 and node.calls['listunspent'] == 2
+    svc.deposits.on_block(0)
+    assert node.calls['listunspent'] == 2
+
+
+def test_unwatched_address_blocks_and_the_monitor_rewatches(tmp_path):
+    os.environ.update(LOCALAPPDATA=str(tmp_path), DEPOSIT_POLL_INTERVAL_SEC='0.1')
+    try:
+        node = fake.FakeAbcmintNode(seed=44)
+        svc = mixing_service.MixingService.__new__(mixing_service.MixingService)
+        svc.jobs, svc.monitors, svc.lock = {}, {}, threading.Lock()
+        svc._init_store()
+        svc.iface = _iface(node)
+        svc.deposits = dw.DepositWatcher(svc.iface)
+        t0 = time.time()
+        assert svc.deposits.wait('8unknown', 0.2) is None and time.time() - t0 >= 0.18
+        started = []
+        svc._execute_mixing = started.append
+        addr = node.call('getnewaddress', [])
+        svc.jobs['j1'] = mixing_service.MixJob(job_id='j1', target_address='8T', amount=Decimal(1),
+                                               deposit_address=addr, deposit_required=Decimal('1.1'))
+        svc._spawn(svc._monitor_deposit, 'j1')
+        deadline = time.time() + 5
+        while time.time() < deadline and svc.deposits.job_for(addr) is None:
+            time.sleep(0.01)
+        # the address falls out of the index under the running monitor
+        svc.deposits.unwatch(addr)
+        node.fund(addr, Decimal('1.1'), confirmations=1)
+        while time.time() < deadline and not started:
+            time.sleep(0.05)
+        assert started == ['j1'] and svc.jobs['j1'].status == 'deposit_received'
+        # backed off rather than spinning: a handful of ticks, not thousands of loops
+        assert svc.deposits.ticks < 60
+    finally:
+        for k in ('LOCALAPPDATA', 'DEPOSIT_POLL_INTERVAL_SEC'):
+            os.environ.pop(k, None)
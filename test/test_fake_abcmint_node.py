@@ -0,0 +1,90 @@
+import os
+import sys
+from decimal import Decimal
+import importlib.util
+
+jm_root = os.path.join(os.path.dirname(__file__), '..', 'joinmarket-clientserver-master', 'src')
+if jm_root not in sys.path:
+    sys.path.insert(0, os.path.abspath(jm_root))
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+fake = _load(os.path.join(here, 'fake_abcmint_node.py'), 'fake_abcmint_node')
+abcmint_interface = _load(os.path.join(here, '..', 'src', 'jmclient', 'abcmint_interface.py'), 'abcmint_interface')
+
+
+def test_send_through_interface_and_confirm():
+    node = fake.FakeAbcmintNode(seed=7)
+    iface = abcmint_interface.ABCmintBlockchainInterface(node, '')
+    src = iface.get_new_address()
+    node.fund(src, '2.5', confirmations=1)
+    utxos = iface.listunspent_for_addresses([src], minconf=1)
+    assert len(utxos) == 1 and utxos[0]['amount'] == Decimal('2.5')
+    dst = iface.get_new_address()
+    raw = iface.create_raw_transaction([{'txid': utxos[0]['txid'], 'vout': utxos[0]['vout']}], {dst: Decimal('2.49')})
+    signed = iface.sign_raw_transaction(raw)
+    txid = iface.broadcast_raw_transaction(signed)
+    assert node.rpc_getrawmempool() == [txid]
+    assert iface.listunspent_for_addresses([dst], minconf=1) == []
+    assert len(iface.listunspent_for_addresses([dst], minconf=0)) == 1
+    node.generate(2)
+    assert iface.get_transaction(bytes.fromhex(txid))['confirmations'] == 2
+    assert node.rpc_getrawmempool() == []
+    try:
+        iface.broadcast_raw_transaction(signed)
+        assert False
+    except fake.FakeRpcError as e:
+        assert e.code == -27
+
+
+def test_chain_limit_and_injected_failures():
+    node = fake.FakeAbcmintNode(seed=3, ancestor_limit=2)
+    a = node.rpc_getnewaddress()
+    node.fund(a, '1.0', confirmations=1)
+    prev = node.rpc_listunspent(1, 9999999, [a])[0]
+    amt = Decimal('1.0')
+    sent = 0
+    for _ in range(3):
+        amt -= Decimal('0.01')
+        nxt = node.rpc_getnewaddress()
+        raw = node.rpc_createrawtransaction([{'txid': prev['txid'], 'vout': prev['vout']}], {nxt: amt})
+        try:
+            txid = node.call('sendrawtransaction', [node.call('signrawtransaction', [raw])['hex']])
+        except fake.FakeRpcError as e:
+            assert 'too-long-mempool-chain' in e.message
+            break
+        sent += 1
+        prev = {'txid': txid, 'vout': 0}
+    assert sent == 2
+    node.fail_next('getblockcount', 'node busy')
+    try:
+        node.call('getblockcount', [])
+        assert False
+    except fake.FakeRpcError as e:
+        assert e.message == 'node busy'
+    assert node.call('getblockcount', []) == node.start_height + 1
+    assert node.calls['getblockcount'] == 2
+
+
+def test_http_json_rpc_roundtrip():
+    jsonrpc = _load(os.path.join(here, '..', 'joinmarket-clientserver-master', 'src', 'jmclient', 'jsonrpc.py'), 'jm_jsonrpc')
+    node = fake.FakeAbcmintNode(seed=5)
+    host, port = node.serve(user='u', password='p')
+    try:
+        rpc = jsonrpc.JsonRpc(host, port, 'u', 'p')
+        iface = abcmint_interface.ABCmintBlockchainInterface(rpc, '')
+        addr = iface.get_new_address()
+        node.fund(addr, '0.5', confirmations=6)
+        assert iface.get_current_block_height() == node.start_height + 6
+        u = iface.listunspent_for_addresses([addr], minconf=6)
+        assert u and u[0]['amount'] == Decimal('0.5')
+        assert iface.estimate_fee_coins_for_counts(1, 2) == Decimal('0.01')
+    finally:
+        node.stop()
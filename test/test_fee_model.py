@@ -0,0 +1,74 @@
+import os
+import random
+from decimal import Decimal
+import importlib.util
+
+_mod_path = os.path.join(os.path.dirname(__file__), '..', 'service', 'fee_model.py')
+spec = importlib.util.spec_from_file_location('fee_model', os.path.abspath(_mod_path))
+fee_model = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(fee_model)
+
+
+def _amounts(n):
+    rng = random.Random(42)
+    return [Decimal(rng.randint(1, 50000 * 10 ** 8)) / Decimal(10 ** 8) for _ in range(n)] + [Decimal('0.001'), Decimal('0.5')]
+
+
+def _check_matches_scalar(amounts, shards, hops):
+    qm = fee_model.quote_many(amounts, shards, hops)
+    for i, a in enumerate(amounts):
+        q = fee_model.quote(a, shards, hops)
+        assert qm['abs_fee_ding'][i] == int(q['abs_fee'] * fee_model.DING)
+        assert qm['net_amount_ding'][i] == int(q['net_amount'] * fee_model.DING)
+    assert qm['miner_fee'] == q['miner_fee'] and qm['percent'] == q['percent']
+
+
+def test_quote_many_matches_quote_python_path():
+    np_saved = fee_model.np
+    fee_model.np = None
+    try:
+        for sh, hp in ((3, 1), (5, 2), (8, 3), (20, 12)):
+            _check_matches_scalar(_amounts(100), sh, hp)
+    finally:
+        fee_model.np = np_saved
+
+
+def test_quote_many_matches_quote_numpy_path():
+    if fee_model.np is None:
+        return
+    _check_matches_scalar(_amounts(500), 8, 3)
+
+
+def test_matrix_rebuilds_on_config_change():
+    saved = os.environ.get('FEE_BASE_P')
+    os.environ['FEE_BASE_P'] = '0.003'
+    try:
+        fee_model.refresh_config()
+        p1 = fee_model.quote(10, 3, 1)['percent']
+        os.environ['FEE_BASE_P'] = '0.004'
+        # settings are read once per refresh, not on every quote
+        assert fee_model.quote(10, 3, 1)['percent'] == p1
+        fee_model.refresh_config()
+        p2 = fee_model.quote(10, 3, 1)['percent']
+        assert p2 - p1 == Decimal('0.001')
+    finally:
+        if saved is None:
+            os.environ.pop('FEE_BASE_P', None)
+        else:
+            os.environ['FEE_BASE_P'] = saved
+        fee_model.refresh_config()
+
+
+def test_sized_miner_fee_uses_node_rate():
+    fee_model.set_node_fee_rate(Decimal('0.001'))
+    try:
+        assert fee_model.tx_fee(1, 2) == Decimal('0.001')
+        assert fee_model.tx_fee(7, 2) == Decimal('0.002')
+        assert fee_model.quote(10, 3, 1)['miner_fee'] == Decimal('0.009')
+        os.environ['MINER_FEE_MODE'] = 'flat'
+        fee_model.refresh_config()
+        assert fee_model.quote(10, 3, 1)['miner_fee'] == Decimal('0.09')
+    finally:
+        os.environ.pop('MINER_FEE_MODE', None)
+        fee_model.set_node_fee_rate(None)
+    assert fee_model.tx_fee(1, 2) == Decimal('0.01')
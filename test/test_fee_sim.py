@@ -0,0 +1,46 @@
+import os
+import sys
+from decimal import Decimal
+import importlib.util
+
+_mod_path = os.path.join(os.path.dirname(__file__), '..', 'service', 'fee_sim.py')
+spec = importlib.util.spec_from_file_location('fee_sim', os.path.abspath(_mod_path))
+fee_sim = importlib.util.module_from_spec(spec)
+# worker processes look run_point up by module name
+sys.modules['fee_sim'] = fee_sim
+spec.loader.exec_module(fee_sim)
+
+
+def test_simulated_job_conserves_deposit():
+    for amount, sh, hp in (('0.5', 8, 3), ('20', 3, 1), ('1000', 5, 2)):
+        r = fee_sim.simulate_job(Decimal(amount), sh, hp)
+        assert not r['failed']
+        out = r['delivered'] + r['service_fee'] + r['retained'] + r['miner'] + r['dust_loss']
+        assert out == r['deposit']
+    r = fee_sim.simulate_job(Decimal('20'), 3, 1)
+    assert r['delivered'] == r['quoted_net'] and r['abandoned'] == 0
+
+
+def test_sized_fees_follow_node_rate():
+    points = fee_sim.parse_grid(['MINER_FEE_MODE=flat,sized', 'TX_FEE_PER_TX=0.01', 'NODE_PAYTXFEE=0.001'])
+    assert len(points) == 2
+    jobs = fee_sim.sample_jobs(50, fee_sim.parse_tiers('SL1:1,4x2:1'), 20.0, 1.0, 0.5, 3)
+    rows = {r['MINER_FEE_MODE']: r for r in fee_sim.run_grid(points, jobs, workers=2)}
+    assert rows['sized']['miner'] * 5 < rows['flat']['miner']
+    assert rows['sized']['dust_loss_rate'] == 0.0 and rows['sized']['abandoned_shards'] == 0.0
+    assert rows['sized']['user_cost_rate'] < rows['flat']['user_cost_rate']
+    assert 'NODE_PAYTXFEE' not in os.environ
+
+
+def test_in_process_run_restores_node_rate():
+    fee_model = fee_sim.fee_model
+    saved = dict(fee_model._node_rate)
+    try:
+        fee_model.set_node_fee_rate('0.0002')
+        before = fee_model.tx_fee(1, 2)
+        jobs = fee_sim.sample_jobs(5, fee_sim.parse_tiers('SL1'), 20.0, 1.0, 0.5, 1)
+        fee_sim.run_grid(fee_sim.parse_grid(['NODE_PAYTXFEE=0.01']), jobs, workers=1)
+        assert fee_model.node_fee_rate() == Decimal('0.0002') and fee_model.tx_fee(1, 2) == before
+    finally:
+        fee_model._node_rate.update(saved)
+        fee_model.refresh_config()
@@ -0,0 +1,78 @@
+import os
+import json
+import threading
+from decimal import Decimal
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+
+
+def _service(tmp_path, **env):
+    os.environ.update(LOCALAPPDATA=str(tmp_path), JOB_CACHE_SIZE='5', **env)
+    svc = mixing_service.MixingService.__new__(mixing_service.MixingService)
+    svc.jobs, svc.monitors, svc.lock = {}, {}, threading.Lock()
+    svc._init_store()
+    return svc
+
+
+def _jobs(svc, done, active):
+    for i in range(done + active):
+        job = mixing_service.MixJob(job_id='j%d' % i, target_address='8T', amount=Decimal(i + 1), deposit_address='8D',
+                                    shard_txids_final=['%064x' % i] * 3)
+        job.status = 'completed' if i < done else 'waiting_deposit'
+        svc.jobs[job.job_id] = job
+
+
+def test_completed_jobs_leave_memory_and_load_on_demand(tmp_path):
+    try:
+        svc = _service(tmp_path)
+        _jobs(svc, 40, 2)
+        svc.monitors['j41'] = 'deposit'
+        svc._archive_finished()
+        assert sorted(svc.jobs) == ['j40', 'j41']
+        with open(svc._state_path(), encoding='utf-8') as f:
+            assert sorted(json.load(f)) == ['j40', 'j41']
+        assert len(svc.recent.data) == 5
+        old = svc.get_job('j0')
+        assert old.status == 'completed' and old.amount == Decimal('1') and old.shard_txids_final[0] == '%064x' % 0
+        assert svc.get_job('j0') is old and 'j0' not in svc.jobs
+        assert svc.get_job('missing') is None
+        assert not hasattr(old, '__dict__')
+        # a restart only brings the active jobs back
+        again = _service(tmp_path)
+        again._load_state()
+        assert sorted(again.jobs) == ['j40', 'j41'] and again.get_job('j39').amount == Decimal('40')
+    finally:
+        for k in ('LOCALAPPDATA', 'JOB_CACHE_SIZE'):
+            os.environ.pop(k, None)
+
+
+def test_shared_store_keeps_completed_jobs_out_of_workers(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    try:
+        a = _service(tmp_path, JOB_STORE=path)
+        b = _service(tmp_path, JOB_STORE=path)
+        _jobs(a, 3, 1)
+        a._save_state()
+        b._load_state()
+        assert sorted(b.jobs) == ['j3']
+        a._archive_finished()
+        assert sorted(a.jobs) == ['j3']
+        assert b.get_job('j1').status == 'completed' and 'j1' not in b.jobs
+        # finished on worker a: b drops its active copy at the next load
+        a.jobs['j3'].status = 'completed'
+        a._save_state()
+        b._load_state()
+        assert b.jobs == {} and b.get_job('j3').status == 'completed'
+    finally:
+        for k in ('LOCALAPPDATA', 'JOB_CACHE_SIZE', 'JOB_STORE'):
+            os.environ.pop(k, None)
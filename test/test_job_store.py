@@ -0,0 +1,145 @@
+import os
+import time
+import threading
+from decimal import Decimal
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+job_store = mixing_service.job_store
+
+
+def test_each_job_is_claimed_by_exactly_one_worker(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    seed = job_store.JobStore(path)
+    for i in range(40):
+        seed.insert('job%d' % i, '{}', 'waiting_deposit')
+    won = {}
+
+    def worker(name):
+        # separate connections lock the file exactly as separate processes do
+        store = job_store.JobStore(path)
+        for i in range(40):
+            if store.claim('job%d' % i, name, 'deposit', 60):
+                won.setdefault('job%d' % i, []).append(name)
+
+    threads = [threading.Thread(target=worker, args=('w%d' % n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(won) == 40 and all(len(v) == 1 for v in won.values())
+    # writes need the lease, or a free lease and the current version
+    assert seed.claim('job0', 'other', 'deposit', 60) is None
+    assert seed.save('job0', '{"x": 1}', 'error', 'other', 1) is None
+    owner = won['job0'][0]
+    assert seed.save('job0', '{"x": 1}', 'error', owner, 1) == 2
+    seed.release('job0', owner)
+    assert seed.save('job0', '{"x": 2}', 'error', 'other', 1) is None
+    assert seed.save('job0', '{"x": 2}', 'error', 'other', 2) == 3
+    assert 'job0' not in seed.leases() and len(seed.leases()) == 39
+
+
+def _worker(path):
+    os.environ['JOB_STORE'] = path
+    svc = mixing_service.MixingService.__new__(mixing_service.MixingService)
+    svc.jobs, svc.monitors, svc.lock = {}, {}, threading.Lock()
+    svc._init_store()
+    return svc
+
+
+def test_workers_share_jobs_and_hand_over_on_lease_expiry(tmp_path):
+    os.environ['JOB_LEASE_SEC'] = '0.3'
+    try:
+        a = _worker(str(tmp_path / 'shared.sqlite3'))
+        b = _worker(str(tmp_path / 'shared.sqlite3'))
+        job = mixing_service.MixJob(job_id='j1', target_address='8T', amount=Decimal('1'), deposit_address='8D')
+        a.jobs['j1'] = job
+        a._save_state()
+        b._load_state()
+        assert b.get_job('j1').amount == Decimal('1')
+        assert a._claim('j1', 'deposit') and not b._claim('j1', 'deposit')
+        # claiming adopts the stored copy, as a worker would after another's crash
+        job = a.jobs['j1']
+        a._set_status(job, 'deposit_received')
+        a._save_state()
+        assert b.get_job('j1').status == 'deposit_received'
+        # a stale write from a worker without the lease is dropped
+        b.jobs['j1'].status = 'error'
+        b._save_state()
+        assert b.get_job('j1').status == 'deposit_received'
+        # worker a stalls past its lease; b takes over and a stops at its next step
+        time.sleep(0.4)
+        assert b._claim('j1', 'deposit')
+        a._renew_leases()
+        assert 'j1' not in a.monitors
+        try:
+            a._set_status(job, 'mixing_step1')
+            raised = False
+        except RuntimeError:
+            raised = True
+        assert raised
+        b._set_status(b.jobs['j1'], 'mixing_step1')
+        b._release('j1')
+        assert a.get_job('j1').status == 'mixing_step1' and b.store.leases() == {}
+    finally:
+        os.environ.pop('JOB_LEASE_SEC', None)
+        os.environ.pop('JOB_STORE', None)
+
+
+def test_one_monitor_per_job_within_a_worker(tmp_path):
+    try:
+        svc = _worker(str(tmp_path / 'jobs.sqlite3'))
+        svc.jobs['j1'] = mixing_service.MixJob(job_id='j1', target_address='8T', amount=Decimal('1'), deposit_address='8D')
+        svc._save_state()
+        wins = []
+        gate = threading.Barrier(8)
+
+        def grab(kind):
+            gate.wait()
+            if svc._claim('j1', kind):
+                wins.append(kind)
+        threads = [threading.Thread(target=grab, args=(k,)) for k in ('deposit', 'confirm') * 4]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(wins) == 1 and svc.monitors == {'j1': wins[0]}
+        # the store would let this worker take its own lease again; the monitors map does not
+        assert svc.store.claim('j1', svc.worker_id, 'shard', 60) is not None
+        assert not svc._claim('j1', 'shard')
+        svc._release('j1')
+        assert svc._claim('j1', 'shard')
+    finally:
+        os.environ.pop('JOB_STORE', None)
+
+
+def test_stalled_worker_cannot_broadcast_past_its_lease(tmp_path):
+    os.environ['JOB_LEASE_SEC'] = '0.3'
+    try:
+        svc = _worker(str(tmp_path / 'jobs.sqlite3'))
+        job = mixing_service.MixJob(job_id='j1', target_address='8T', amount=Decimal('1'), deposit_address='8D')
+        svc.jobs['j1'] = job
+        svc._save_state()
+        assert svc._claim('j1', 'shard')
+        # stalled past the lease and the guardian has not run yet
+        time.sleep(0.4)
+        assert 'j1' not in svc._lost
+        with mixing_service.tracing.bind(svc.jobs['j1']):
+            try:
+                svc._send_signed('hop', '00')
+                raised = False
+            except mixing_service.LeaseLost:
+                raised = True
+        assert raised
+    finally:
+        os.environ.pop('JOB_LEASE_SEC', None)
+        os.environ.pop('JOB_STORE', None)
@@ -0,0 +1,66 @@
+import os
+from decimal import Decimal
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+fake = _load(os.path.join(here, 'fake_abcmint_node.py'), 'fake_abcmint_node')
+
+
+def _setup(seed):
+    node = fake.FakeAbcmintNode(seed=seed)
+    iface = mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, '')
+    confs = mixing_service.conf_tracker.ConfirmationTracker(iface)
+    confs.on_block(node.call('getblockcount', []))
+    return node, iface, confs, mixing_service.mempool_monitor.MempoolMonitor(iface, confs, interval=60)
+
+
+def test_events_for_watched_txids_only():
+    node, iface, confs, mon = _setup(47)
+    addrs = [node.call('getnewaddress', []) for _ in range(4)]
+    noise = [node.fund(a, Decimal('1')) for a in addrs]
+    events = []
+    mon.subscribe(lambda ev, t: events.append((ev, t)))
+    mon.poll()
+    mined, dropped = node.fund(addrs[0], Decimal('2')), node.fund(addrs[1], Decimal('3'))
+    for t in (mined, dropped):
+        confs.watch(t)
+        mon.watch(t)
+    node.reset_stats()
+    assert sorted(mon.poll()['accepted']) == sorted([mined, dropped])
+    assert mon.txids == frozenset(noise + [mined, dropped])
+    assert node.calls['getrawmempool'] == 1 and sum(node.calls.values()) == 1
+    assert sorted(events) == sorted([('accepted', mined), ('accepted', dropped)])
+    node.evict(dropped)
+    node.generate(1)
+    assert mon.poll() == {'accepted': [], 'confirmed': [mined], 'evicted': [dropped]}
+    assert mon.stats()['last_changes'] == len(noise) + 2 and mon.stats()['size'] == 0
+    # a quiet interval costs one RPC and emits nothing
+    node.reset_stats()
+    assert mon.poll() == {'accepted': [], 'confirmed': [], 'evicted': []} and sum(node.calls.values()) == 1
+
+
+def test_rebroadcast_uses_the_snapshot_and_eviction_events(tmp_path):
+    node, iface, confs, mon = _setup(48)
+    mgr = mixing_service.rebroadcast.RebroadcastManager(iface, confs, str(tmp_path / 'b.sqlite3'))
+    mgr.use_mempool(mon)
+    a, b = node.call('getnewaddress', []), node.call('getnewaddress', [])
+    raw = node.call('createrawtransaction', [[{'txid': node.fund(a, Decimal('5'), confirmations=1), 'vout': 0}],
+                                             {b: Decimal('4.9')}])
+    tx_hex = node.call('signrawtransaction', [raw])['hex']
+    txid = iface.broadcast_raw_transaction(tx_hex)
+    mgr.track(txid, tx_hex, 'final', 'job1')
+    mon.poll()
+    node.evict(txid)
+    mon.poll()
+    assert mgr._wake.is_set()
+    node.reset_stats()
+    assert mgr.check()['resent'] == [txid] and node.calls['getrawmempool'] == 0
@@ -0,0 +1,121 @@
+import os
+import threading
+import importlib.util
+
+_mod_path = os.path.join(os.path.dirname(__file__), '..', 'service', 'node_status.py')
+spec = importlib.util.spec_from_file_location('node_status', os.path.abspath(_mod_path))
+node_status = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(node_status)
+
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class DummyIface:
+    def __init__(self, connectioncount=True):
+        self.height = 100
+        self.connectioncount = connectioncount
+        self.connectioncount_error = None
+        self.calls = []
+
+    def _rpc(self, method, args=[]):
+        self.calls.append(method)
+        if method == 'getblockcount':
+            return self.height
+        if method == 'getconnectioncount':
+            if self.connectioncount_error is not None:
+                raise self.connectioncount_error
+            if not self.connectioncount:
+                raise RpcError(-32601, 'Method not found')
+            return 8
+        if method == 'getpeerinfo':
+            return [{}] * 5
+        if method == 'getdifficulty':
+            return 1234.5
+        return None
+
+
+def test_refresh_only_on_new_block():
+    iface = DummyIface()
+    cache = node_status.NodeStatusCache(iface, interval=1, max_age=3600)
+    seen = []
+    cache.add_block_listener(seen.append)
+    assert cache.snapshot() is None
+    cache.refresh()
+    assert cache.snapshot()['peerCount'] == 8
+    assert cache.snapshot()['difficulty'] == 1234
+    iface.calls.clear()
+    cache.refresh()
+    assert iface.calls == ['getblockcount']
+    iface.height = 101
+    cache.refresh()
+    assert cache.snapshot()['blockHeight'] == 101
+    assert 'getdifficulty' in iface.calls
+    assert cache.wait_listeners(5) and seen == [101]
+
+
+def test_peer_count_falls_back_to_getpeerinfo_once():
+    iface = DummyIface(connectioncount=False)
+    cache = node_status.NodeStatusCache(iface, interval=1, max_age=0)
+    cache.refresh()
+    cache.refresh(force=True)
+    assert cache.snapshot()['peerCount'] == 5
+    assert iface.calls.count('getconnectioncount') == 1
+
+
+def test_transient_connectioncount_error_does_not_disable_it():
+    iface = DummyIface()
+    cache = node_status.NodeStatusCache(iface, interval=1, max_age=0)
+    iface.connectioncount_error = RpcError(-28, 'Loading block index...')
+    assert cache.refresh() is None and 'Loading' in cache.last_error
+    iface.connectioncount_error = TimeoutError('timed out')
+    assert cache.refresh() is None
+    assert 'getpeerinfo' not in iface.calls
+    iface.connectioncount_error = None
+    assert cache.refresh()['peerCount'] == 8
+
+
+def test_slow_listener_blocks_neither_polling_nor_others():
+    iface = DummyIface()
+    cache = node_status.NodeStatusCache(iface, interval=1, max_age=3600)
+    gate = threading.Event()
+    slow, fast = [], []
+    cache.add_block_listener(lambda h: (gate.wait(5), slow.append(h)))
+    cache.add_block_listener(fast.append)
+    cache.refresh()
+    for h in (101, 102, 103):
+        iface.height = h
+        cache.refresh()
+    assert cache.snapshot()['blockHeight'] == 103
+    assert cache._listeners[1].wait_idle(5) and fast[-1] == 103 and not cache.wait_listeners(0.1)
+    gate.set()
+    # heights that queued up behind the slow listener collapse into the latest
+    assert cache.wait_listeners(5) and slow[0] == 101 and slow[-1] == 103 and len(slow) <= 2
+
+
+def test_concurrent_refreshes_run_one_at_a_time():
+    iface = DummyIface()
+    cache = node_status.NodeStatusCache(iface, interval=1, max_age=0)
+    inside, most = [0], [0]
+    guard = threading.Lock()
+    rpc = iface._rpc
+
+    def slow_rpc(method, args=[]):
+        with guard:
+            inside[0] += 1
+            most[0] = max(most[0], inside[0])
+        threading.Event().wait(0.01)
+        with guard:
+            inside[0] -= 1
+        return rpc(method, args)
+
+    iface._rpc = slow_rpc
+    threads = [threading.Thread(target=cache.refresh) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert most[0] == 1 and cache.snapshot()['peerCount'] == 8
@@ -0,0 +1,73 @@
+import os
+from decimal import Decimal
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+fake = _load(os.path.join(here, 'fake_abcmint_node.py'), 'fake_abcmint_node')
+rb = mixing_service.rebroadcast
+
+
+def _spend(node, txid, to, amount):
+    raw = node.call('createrawtransaction', [[{'txid': txid, 'vout': 0}], {to: amount}])
+    return node.call('signrawtransaction', [raw])['hex']
+
+
+def _setup(seed, tmp_path):
+    node = fake.FakeAbcmintNode(seed=seed)
+    iface = mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, '')
+    confs = mixing_service.conf_tracker.ConfirmationTracker(iface)
+    confs.on_block(node.call('getblockcount', []))
+    mgr = rb.RebroadcastManager(iface, confs, str(tmp_path / 'b.sqlite3'))
+    mgr.backoff = mgr.max_backoff = 0
+    return node, iface, confs, mgr
+
+
+def test_evicted_chain_goes_back_parent_first(tmp_path):
+    node, iface, confs, mgr = _setup(46, tmp_path)
+    a, b, c = (node.call('getnewaddress', []) for _ in range(3))
+    parent_hex = _spend(node, node.fund(a, Decimal('5'), confirmations=1), b, Decimal('4.9'))
+    parent = iface.broadcast_raw_transaction(parent_hex)
+    child_hex = _spend(node, parent, c, Decimal('4.8'))
+    child = iface.broadcast_raw_transaction(child_hex)
+    mgr.track(parent, parent_hex, 'hop', 'job1')
+    mgr.track(child, child_hex, 'final', 'job1')
+    node.reset_stats()
+    assert mgr.check() == {'resent': [], 'conflicts': [], 'dropped': []}
+    assert node.calls['getrawmempool'] == 1 and node.calls['sendrawtransaction'] == 0
+    node.evict(parent)
+    assert child not in node.mempool
+    assert mgr.check()['resent'] == [parent, child]
+    assert list(node.mempool)[-2:] == [parent, child]
+    # a restart still knows them; buried ones are dropped
+    node.generate(6)
+    confs.on_block(node.call('getblockcount', []))
+    again = rb.RebroadcastManager(iface, confs, str(tmp_path / 'b.sqlite3'))
+    assert again.stats()['pending'] == 2
+    assert sorted(again.check()['dropped']) == sorted([parent, child]) and again.stats()['pending'] == 0
+
+
+def test_double_spent_tx_is_reported_as_conflict(tmp_path):
+    node, iface, confs, mgr = _setup(47, tmp_path)
+    mgr.max_conflicts = 2
+    seen = []
+    mgr.on_conflict = lambda owner, txid, err: seen.append((owner, txid))
+    a, b = node.call('getnewaddress', []), node.call('getnewaddress', [])
+    funding = node.fund(a, Decimal('3'), confirmations=1)
+    tx_hex = _spend(node, funding, b, Decimal('2.9'))
+    txid = iface.broadcast_raw_transaction(tx_hex)
+    mgr.track(txid, tx_hex, 'hop', 'job7')
+    node.evict(txid)
+    iface.broadcast_raw_transaction(_spend(node, funding, b, Decimal('2.8')))
+    assert mgr.check()['conflicts'] == [] and seen == []
+    assert mgr.check()['conflicts'] == [txid]
+    assert seen == [('job7', txid)] and mgr.conflicts()[0]['jobId'] == 'job7'
+    assert mgr.check()['resent'] == [] and mgr.stats()['conflicts'] == 1
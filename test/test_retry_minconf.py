@@ -33,6 +33,7 @@ class FakeService(mixing_service.MixingService):
     def __init__(self):
         self.iface = FakeIface()
         self.addr_pool = ['8A'*34]
+        self.rawtx = mixing_service.rawtx.RawTxBuilder()
     def _get_address(self):
         return '8A0'*10
 def test_retry_on_unconfirmed_chain():
@@ -0,0 +1,107 @@
+import os
+import time
+import socket
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+fake = _load(os.path.join(here, 'fake_abcmint_node.py'), 'fake_abcmint_node')
+rpc_pool = mixing_service.rpc_pool
+
+
+def _nodes(n, **kw):
+    nodes = [fake.FakeAbcmintNode(seed=20 + i, **kw) for i in range(n)]
+    return nodes, [node.serve() for node in nodes]
+
+
+def test_routes_by_role_and_fans_out_broadcasts():
+    nodes, addrs = _nodes(3)
+    wallet, replica, relay = nodes
+    spec = ','.join(['%s:%d#wallet' % addrs[0], '%s:%d#read' % addrs[1], '%s:%d#broadcast' % addrs[2]])
+    pool = rpc_pool.RpcPool(rpc_pool.parse_nodes(spec), mixing_service.jm_jsonrpc.JsonRpc)
+    try:
+        for n in nodes:
+            n.reset_stats()
+        addr = pool.call('getnewaddress', [])
+        wallet.fund(addr, '2', confirmations=1)
+        pool.call('getblockcount', [])
+        pool.call('getrawmempool', [])
+        utxo = pool.call('listunspent', [1, 9999999, [addr]])[0]
+        to = pool.call('getnewaddress', [])
+        raw = pool.call('createrawtransaction', [[{'txid': utxo['txid'], 'vout': utxo['vout']}], {to: '1.99'}])
+        signed = pool.call('signrawtransaction', [raw])['hex']
+        txid = pool.call('sendrawtransaction', [signed])
+        # the replica never saw our broadcast; the wallet node answers for it
+        assert pool.call('getrawtransaction', [txid, 1])['txid'] == txid
+        time.sleep(0.2)
+    finally:
+        for n in nodes:
+            n.stop()
+    assert txid in wallet.mempool
+    assert wallet.calls['getnewaddress'] == 2 and wallet.calls['signrawtransaction'] == 1
+    assert wallet.calls['getblockcount'] == 0 and wallet.calls['createrawtransaction'] == 0
+    assert replica.calls['getblockcount'] == 1 and replica.calls['getrawmempool'] == 0
+    # mempool and utxo queries are pinned to the wallet node
+    assert wallet.calls['getrawmempool'] == 1 and replica.calls['getrawtransaction'] == 0
+    assert replica.calls['listunspent'] == 0 and replica.calls['sendrawtransaction'] == 0
+    # the relay node saw the broadcast even though it cannot validate this chain
+    assert relay.calls['sendrawtransaction'] == 1
+
+
+def _closed_port():
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def test_fails_over_and_prefers_fast_replicas():
+    os.environ['RPC_NODE_BACKOFF_SEC'] = '60'
+    nodes, addrs = _nodes(3)
+    wallet, fast, slow = nodes
+    slow.set_latency(None, 0.05)
+    dead = '127.0.0.1:%d' % _closed_port()
+    spec = ','.join(['%s:%d#wallet' % addrs[0], '%s:%d#read' % addrs[1], '%s:%d#read' % addrs[2], dead + '#read'])
+    pool = rpc_pool.RpcPool(rpc_pool.parse_nodes(spec), mixing_service.jm_jsonrpc.JsonRpc)
+    try:
+        for n in nodes:
+            n.reset_stats()
+        # every call succeeds; the dead replica is tried once and then backs off
+        for _ in range(20):
+            assert pool.call('getblockcount', []) == wallet.call('getblockcount', [])
+        assert fast.calls['getblockcount'] > slow.calls['getblockcount']
+        stats = {s['name']: s for s in pool.stats()}
+        assert not stats[dead]['healthy'] and stats[dead]['errors'] == 1
+        # a node answering with an RPC error is healthy and not failed over
+        fast.fail_next('getblockhash', 'Block height out of range', code=-8)
+        slow.fail_next('getblockhash', 'Block height out of range', code=-8)
+        try:
+            pool.call('getblockhash', [999])
+            raised = None
+        except Exception as e:
+            raised = e
+        assert getattr(raised, 'code', None) == -8
+        assert fast.calls['getblockhash'] + slow.calls['getblockhash'] == 1
+    finally:
+        os.environ.pop('RPC_NODE_BACKOFF_SEC', None)
+        for n in nodes:
+            n.stop()
+
+
+def test_sends_are_only_retried_when_refused():
+    timeout = OSError('timed out')
+    assert rpc_pool.retryable('getblockcount', timeout) and rpc_pool.retryable('gettxout', timeout)
+    assert not rpc_pool.retryable('sendrawtransaction', timeout) and not rpc_pool.retryable('sendtoaddress', timeout)
+    refused = mixing_service.jm_jsonrpc.JsonRpcConnectionError('JSON-RPC connection refused.')
+    assert rpc_pool.retryable('sendrawtransaction', refused) and rpc_pool.retryable('sendtoaddress', ConnectionRefusedError())
+    answered = fake.FakeRpcError(-26, 'bad-txns-inputs-spent')
+    assert not rpc_pool.retryable('getblockcount', answered)
@@ -0,0 +1,75 @@
+import os
+import json
+from decimal import Decimal
+
+import importlib.util
+
+svc_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'service', 'mixing_service.py')
+spec = importlib.util.spec_from_file_location('mixing_service', svc_path)
+mixing_service = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mixing_service)
+tracing = mixing_service.tracing
+
+
+def _job():
+    return mixing_service.MixJob(job_id='0b6f3a3e-8d6c-4a47-9d53-3b1a5f1f7c11', target_address='8T',
+                                 amount=Decimal('1.0'), deposit_address='8D', shard_count=2, hop_count=1)
+
+
+def test_phase_spans_follow_status_and_count_rpcs():
+    job = _job()
+    with tracing.bind(job):
+        tracing.phase(job, 'waiting_deposit')
+        tracing.count_rpc('listunspent')
+        tracing.count_rpc('listunspent')
+        tracing.phase(job, 'mixing_step1')
+        with tracing.span(job, 'broadcast', tx_kind='step1'):
+            tracing.count_rpc('createrawtransaction')
+            tracing.count_rpc('sendrawtransaction')
+        tracing.phase(job, 'completed')
+    phases = [s for s in job.spans if s['kind'] == 'phase']
+    assert [p['name'] for p in phases] == ['waiting_deposit', 'mixing_step1', 'completed']
+    assert all(p['end'] is not None for p in phases)
+    assert phases[0]['rpc_calls'] == 2
+    assert phases[0]['attrs']['rpc_methods'] == {'listunspent': 2}
+    bc = [s for s in job.spans if s['name'] == 'broadcast'][0]
+    assert bc['rpc_calls'] == 2
+    assert bc['parent_id'] == phases[1]['span_id']
+    tl = tracing.timeline(job)
+    assert tl['phaseTotals']['mixing_step1']['rpcCalls'] == 2
+    assert tl['broadcasts'][0]['tx_kind'] == 'step1'
+
+
+def test_failed_span_and_exports():
+    job = _job()
+    tracing.phase(job, 'mixing_step2')
+    try:
+        with tracing.span(job, 'hop', shard=0, hop=0):
+            raise RuntimeError('boom')
+    except RuntimeError:
+        pass
+    hop = [s for s in job.spans if s['name'] == 'hop'][0]
+    assert hop['status'] == 'error' and hop['error'] == 'boom'
+    lines = [json.loads(l) for l in tracing.to_jsonl(job).splitlines()]
+    assert len(lines) == 2 and lines[0]['job_id'] == job.job_id
+    otlp = tracing.to_otlp([job])
+    spans = otlp['resourceSpans'][0]['scopeSpans'][0]['spans']
+    assert len(spans) == 2
+    assert all(len(s['traceId']) == 32 for s in spans)
+    assert spans[1]['status']['code'] == 2
+
+
+def test_saved_state_keeps_phases_and_newest_spans():
+    os.environ['TRACE_PERSIST_SPANS'] = '3'
+    job = _job()
+    try:
+        tracing.phase(job, 'mixing_step2')
+        for h in range(10):
+            with tracing.span(job, 'hop', shard=0, hop=h):
+                pass
+        saved = mixing_service.MixingService._job_dict(job)['spans']
+    finally:
+        os.environ.pop('TRACE_PERSIST_SPANS', None)
+    assert len(job.spans) == 11
+    assert [s['kind'] for s in saved] == ['phase', 'span', 'span', 'span']
+    assert [s['attrs']['hop'] for s in saved[1:]] == [7, 8, 9]
@@ -0,0 +1,85 @@
+import os
+from decimal import Decimal
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+fake = _load(os.path.join(here, 'fake_abcmint_node.py'), 'fake_abcmint_node')
+tc = mixing_service.tx_cache
+
+
+def _iface(node, root):
+    iface = mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, '')
+    iface.tx_cache = tc.TxCache(root, min_conf=3, size=2)
+    iface.tx_cache.on_block(node.call('getblockcount', []))
+    return iface
+
+
+def test_buried_transactions_are_served_from_memory_then_disk(tmp_path):
+    node = fake.FakeAbcmintNode(seed=50)
+    iface = _iface(node, str(tmp_path))
+    txids = [node.fund(node.call('getnewaddress', []), Decimal('1.23456789')) for _ in range(3)]
+    node.generate(1)
+    node.reset_stats()
+    # too shallow: always asked
+    assert iface.get_wallet_transaction(txids[0])['confirmations'] == 1
+    assert iface.get_wallet_transaction(txids[0])['confirmations'] == 1
+    # deep enough, and the cache has not heard of these blocks yet
+    node.generate(2)
+    for t in txids:
+        iface.get_wallet_transaction(t)
+        iface.get_raw_transaction(t)
+        iface.get_wallet_transaction(t)
+    assert node.calls['gettransaction'] == 5 and node.calls['getrawtransaction'] == 3
+    node.generate(1)
+    iface.tx_cache.on_block(node.call('getblockcount', []))
+    fresh = node.call('gettransaction', [txids[2]])
+    assert iface.get_wallet_transaction(txids[2]) == fresh and fresh['amount'] == Decimal('1.23456789')
+    # evicted from the two-entry memory tier: read back from disk
+    assert iface.get_raw_transaction(txids[0]) == node.call('getrawtransaction', [txids[0], 1])
+    node.reset_stats()
+    iface.get_transaction(bytes.fromhex(txids[1]))
+    assert sum(node.calls.values()) == 0
+    st = iface.tx_cache.stats()
+    assert st['hits_memory'] >= 1 and st['hits_disk'] >= 1 and 0 < st['hit_ratio'] < 1
+    # a restart starts warm
+    again = _iface(node, str(tmp_path))
+    assert again.get_raw_transaction(txids[2])['txid'] == txids[2] and sum(node.calls.values()) == 1
+
+
+class _Status:
+    def __init__(self, node):
+        self.node = node
+
+    def snapshot(self):
+        return {'blockHeight': self.node._height(), 'stale': False}
+
+
+def test_tip_comes_from_node_status_and_bad_files_are_misses(tmp_path):
+    node = fake.FakeAbcmintNode(seed=51)
+    iface = mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, '')
+    iface.tx_cache = tc.TxCache(str(tmp_path), min_conf=3, size=1)
+    iface.tx_cache.status = _Status(node)
+    txids = [node.fund(node.call('getnewaddress', []), Decimal('1')) for _ in range(2)]
+    node.generate(3)
+    node.reset_stats()
+    # never told about a block: seeded from the poller, no getblockcount per miss
+    for t in txids:
+        iface.get_raw_transaction(t)
+    assert node.calls['getblockcount'] == 0 and node.calls['getrawtransaction'] == 2
+    node.reset_stats()
+    assert iface.get_raw_transaction(txids[1])['confirmations'] == 3 and sum(node.calls.values()) == 0
+    # another transaction's file under this txid is refetched, not trusted
+    with open(iface.tx_cache._path(txids[1]), 'r', encoding='utf-8') as f:
+        other = f.read()
+    with open(iface.tx_cache._path(txids[0]), 'w', encoding='utf-8') as f:
+        f.write(other)
+    assert iface.get_raw_transaction(txids[0])['txid'] == txids[0] and node.calls['getrawtransaction'] == 1
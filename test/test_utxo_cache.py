@@ -0,0 +1,71 @@
+import os
+from decimal import Decimal
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+fake = _load(os.path.join(here, 'fake_abcmint_node.py'), 'fake_abcmint_node')
+uc = mixing_service.utxo_cache
+
+
+def test_bloom_front_and_persistence(tmp_path):
+    cache = uc.UtxoCache(str(tmp_path / 'u.sqlite3'), bloom_bits=1 << 16)
+    spent = [('%064x' % i, i % 3) for i in range(2000)]
+    cache.add_spent(spent)
+    assert all(cache.lookup(t, n) is False for t, n in spent)
+    assert all(cache.lookup('%064x' % (i + 10 ** 6), 0) is None for i in range(2000))
+    st = cache.stats()
+    assert st['spent'] == 2000 and st['hits_spent'] == 2000 and st['misses'] == 2000
+    # most misses never reach the table
+    assert st['bloom_false_positives'] < 100
+    again = uc.UtxoCache(str(tmp_path / 'u.sqlite3'), bloom_bits=1 << 16)
+    assert again.stats()['spent'] == 2000 and again.lookup(*spent[7]) is False
+
+
+def test_query_utxo_set_answers_repeats_locally():
+    node = fake.FakeAbcmintNode(seed=48)
+    iface = mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, '')
+    iface.utxo_cache = cache = uc.UtxoCache()
+    a, b = node.call('getnewaddress', []), node.call('getnewaddress', [])
+    funding = node.fund(a, Decimal('5'), confirmations=1)
+    op = (bytes.fromhex(funding), 0)
+    node.reset_stats()
+    first = iface.query_utxo_set(op, includeconfs=True)
+    assert first[0]['confirms'] == 1 and iface.query_utxo_set([op, op], includeconfs=True) == first * 2
+    assert node.calls['gettxout'] == 1
+    # our own spend drops it from the unspent cache
+    raw = node.call('createrawtransaction', [[{'txid': funding, 'vout': 0}], {b: Decimal('4.9')}])
+    signed = node.call('signrawtransaction', [raw])['hex']
+    iface.broadcast_raw_transaction(signed)
+    cache.spending(mixing_service.MixingService._tx_inputs(signed))
+    assert iface.query_utxo_set(op) == [None] and node.calls['gettxout'] == 2
+    # buried: answered as spent without the node
+    node.generate(6)
+    cache.on_block(node.call('getblockcount', []))
+    cache.add_spent(mixing_service.MixingService._tx_inputs(signed))
+    assert iface.query_utxo_set([op] * 5) == [None] * 5 and node.calls['gettxout'] == 2
+
+
+def test_unspent_answers_are_kept_per_mempool_mode():
+    node = fake.FakeAbcmintNode(seed=49)
+    iface = mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, '')
+    iface.utxo_cache = uc.UtxoCache()
+    a, b = node.call('getnewaddress', []), node.call('getnewaddress', [])
+    funding = node.fund(a, Decimal('5'), confirmations=1)
+    op = (bytes.fromhex(funding), 0)
+    # a chain-only answer, then a spend the cache is not told about
+    assert iface.query_utxo_set(op, include_mempool=False)[0] is not None
+    raw = node.call('createrawtransaction', [[{'txid': funding, 'vout': 0}], {b: Decimal('4.9')}])
+    node.call('sendrawtransaction', [node.call('signrawtransaction', [raw])['hex']])
+    node.reset_stats()
+    assert iface.query_utxo_set(op, include_mempool=False)[0] is not None and node.calls['gettxout'] == 0
+    # the mempool view is asked for, and sees the spend
+    assert iface.query_utxo_set(op) == [None] and node.calls['gettxout'] == 1
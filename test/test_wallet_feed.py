@@ -0,0 +1,96 @@
+import os
+import threading
+from decimal import Decimal
+import importlib.util
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+here = os.path.dirname(__file__)
+mixing_service = _load(os.path.join(here, '..', 'service', 'mixing_service.py'), 'mixing_service')
+fake = _load(os.path.join(here, 'fake_abcmint_node.py'), 'fake_abcmint_node')
+wf = mixing_service.wallet_feed
+
+
+def _rows(rows):
+    return [(r['txid'], r['category'], r['address'], Decimal(str(r['amount'])), r['confirmations']) for r in rows]
+
+
+def test_feed_follows_the_wallet_from_a_persisted_cursor(tmp_path):
+    node = fake.FakeAbcmintNode(seed=42)
+    iface = mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, '')
+    path = str(tmp_path / 'wallet_feed.sqlite3')
+    feed = wf.WalletFeed(iface, path, depth=2)
+    seen = []
+    feed.subscribe(lambda ev, txid, rec: seen.append((ev, txid)))
+    addrs = [node.call('getnewaddress', []) for _ in range(4)]
+    paid = [node.fund(a, Decimal(i + 1), confirmations=1) for i, a in enumerate(addrs)]
+    assert feed.refresh() and [t for ev, t in seen] == paid and {ev for ev, t in seen} == {'new'}
+    node.generate(1)
+    seen.clear()
+    feed.refresh()
+    # confirmations follow the tip without events; only a new block for a tx is an update
+    assert seen == [] and feed.confirmations(paid[0]) == 5
+    late = node.fund(addrs[1], Decimal('3'))
+    feed.refresh()
+    node.generate(1)
+    feed.refresh()
+    assert seen == [('new', late), ('updated', late)] and feed.confirmations(late) == 1
+    assert _rows(feed.entries(3, 1)) == _rows(node.call('listtransactions', ['*', 3, 1]))
+    assert feed.txids_for(addrs[2], ('receive',)) == [paid[2]] and feed.txids_for(addrs[2], ('send',)) == []
+    iface.tx_feed = feed
+    node.reset_stats()
+    assert _rows(iface.list_transactions(2)) == _rows(node.call('listtransactions', ['*', 2]))
+    assert node.calls['listsinceblock'] == 0
+    # a restart resumes from the checkpoint instead of rescanning
+    again = wf.WalletFeed(iface, path, depth=2)
+    assert again.cursor == feed.cursor and again.entries() == feed.entries()
+    later = node.fund(addrs[0], Decimal('9'))
+    again.refresh()
+    assert again.txids_for(addrs[0]) == [paid[0], later] and again.stats()['txs'] == 6
+
+
+def test_service_falls_back_when_the_node_lacks_listsinceblock(tmp_path):
+    node = fake.FakeAbcmintNode(seed=43)
+    svc = mixing_service.MixingService.__new__(mixing_service.MixingService)
+    svc.iface = mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, '')
+    svc.wallet_feed = wf.WalletFeed(svc.iface)
+    a, b = node.call('getnewaddress', []), node.call('getnewaddress', [])
+    node.fund(a, Decimal('1'))
+    node.fund(b, Decimal('2'))
+    assert _rows(svc.wallet_entries(10, address=b)) == _rows(node.call('listtransactions', ['*', 1]))
+    # a cursor on a block the node does not know starts over
+    svc.wallet_feed.cursor = '11' * 32
+    svc.wallet_feed.synced_at = 0
+    assert svc.wallet_feed.sync() and svc.wallet_feed.cursor == node.call('getbestblockhash', [])
+    old = wf.WalletFeed(svc.iface)
+    node.fail_next('listsinceblock', 'Method not found', -32601)
+    svc.wallet_feed = old
+    assert len(svc.wallet_entries(10)) == 2 and old.supported is False and not old.sync()
+
+
+def test_buried_records_leave_memory_and_syncs_share_one_call(tmp_path):
+    node = fake.FakeAbcmintNode(seed=44)
+    iface = mixing_service.abcmint_iface.ABCmintBlockchainInterface(node, '')
+    feed = wf.WalletFeed(iface, str(tmp_path / 'wallet_feed.sqlite3'), depth=2)
+    a = node.call('getnewaddress', [])
+    paid = [node.fund(a, Decimal(i + 1), confirmations=1) for i in range(3)]
+    node.generate(3)
+    feed.refresh()
+    # buried past the window: read back from the table, not held in memory
+    assert feed.txs == {} and feed.txids_for(a) == paid and feed.confirmations(paid[0]) == 6
+    fresh = node.fund(a, Decimal('5'))
+    feed.synced_at = 0
+    node.reset_stats()
+    threads = [threading.Thread(target=feed.sync, args=(60,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert node.calls['listsinceblock'] == 1 and list(feed.txs) == [fresh]
+    assert [r['txid'] for r in feed.entries(address=a)] == paid + [fresh]